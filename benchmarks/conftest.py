@@ -0,0 +1,95 @@
+"""Shared fixtures for smartmailbox benchmarks.
+
+Synchronous hot-path benchmarks use pytest-benchmark (``--benchmark-json``).
+Setup/unload latency has to be measured inside the running event loop, so
+those results are collected here and written to ``--latency-json``.
+"""
+
+from __future__ import annotations
+
+import json
+import platform
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+import pytest
+from homeassistant.core import Event, HomeAssistant, State
+from homeassistant.const import EVENT_STATE_CHANGED
+
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.smartmailbox.const import (
+    CONF_FLAP_ENTITY,
+    CONF_DOOR_ENTITY,
+    CONF_FLAP_TRIGGER_MODE,
+    TRIGGER_MODE_THRESHOLD,
+)
+
+from tests.conftest import (  # noqa: F401
+    auto_enable_custom_integrations,
+    auto_isolate_config_dir,
+)
+
+_LATENCY_RESULTS: list[dict] = []
+
+
+def pytest_addoption(parser: pytest.Parser) -> None:
+    parser.addoption(
+        "--latency-json",
+        action="store",
+        default=None,
+        help="Write setup/unload latency results to this JSON file.",
+    )
+
+
+def pytest_sessionfinish(session: pytest.Session, exitstatus: int) -> None:
+    path = session.config.getoption("--latency-json")
+    if not path or not _LATENCY_RESULTS:
+        return
+    Path(path).write_text(
+        json.dumps(
+            {
+                "machine_info": {
+                    "python": platform.python_version(),
+                    "machine": platform.machine(),
+                },
+                "results": _LATENCY_RESULTS,
+            },
+            indent=2,
+        )
+    )
+
+
+@pytest.fixture
+def record_latency():
+    """Time a block and add the result to the latency report."""
+
+    @contextmanager
+    def _record(name: str, **params):
+        start = time.perf_counter()
+        yield
+        _LATENCY_RESULTS.append(
+            {"name": name, "params": params, "seconds": time.perf_counter() - start}
+        )
+
+    return _record
+
+
+def seed_states(hass: HomeAssistant, entry: MockConfigEntry) -> None:
+    """Give the entry's source entities an initial state."""
+    initial = "0" if entry.data[CONF_FLAP_TRIGGER_MODE] == TRIGGER_MODE_THRESHOLD else "off"
+    hass.states.async_set(entry.data[CONF_FLAP_ENTITY], initial)
+    hass.states.async_set(entry.data[CONF_DOOR_ENTITY], initial)
+
+
+def state_event(entity_id: str, old: str, new: str) -> Event:
+    """Build a state_changed event without going through the state machine."""
+    return Event(
+        EVENT_STATE_CHANGED,
+        {
+            "entity_id": entity_id,
+            "old_state": State(entity_id, old),
+            "new_state": State(entity_id, new),
+        },
+    )
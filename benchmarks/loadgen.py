@@ -0,0 +1,372 @@
+"""Synthetic load generator and trace replay for the smartmailbox integration.
+
+Drives a test Home Assistant instance with state changes and reports
+throughput, accepted vs debounced triggers and event-loop latency.
+
+Examples::
+
+    # 500 mailboxes with bouncing binary flaps, 10 s at real time
+    python -m benchmarks.loadgen --mailboxes 500 --scenario bouncing
+
+    # 50 noisy angle sensors sampled at 20 Hz
+    python -m benchmarks.loadgen --mailboxes 50 --scenario angle --rate 20
+
+    # Replay a recorded trace through one mailbox
+    python -m benchmarks.loadgen --replay trace.csv \\
+        --flap sensor.flap_angle --door binary_sensor.door --mode threshold
+
+Traces are CSV (``time,entity_id,state`` with an optional header row) or
+JSONL (``{"time": ..., "entity_id": ..., "state": ...}``); ``time`` is
+either seconds or an ISO timestamp. Events are paced on the event loop's
+monotonic clock, which is also what debounce measures, so at ``--speed 1``
+a trace is debounced as it was recorded. Other values shift events into
+or out of the window; with ``--speed 0`` events arrive as fast as they can
+be sent, and most triggers after a sensor's first are debounced.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import csv
+import json
+import random
+import statistics
+import sys
+import tempfile
+import time
+from collections.abc import Iterable
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from homeassistant.core import HomeAssistant, State
+from homeassistant import loader
+from homeassistant.setup import async_setup_component
+from homeassistant.util import dt as dt_util
+
+from pytest_homeassistant_custom_component.common import (
+    MockConfigEntry,
+    async_test_home_assistant,
+)
+
+from custom_components.smartmailbox.const import (
+    DOMAIN,
+    CONF_DEBOUNCE_SECONDS,
+    CONF_FLAP_THRESHOLD,
+    CONF_DOOR_THRESHOLD,
+    TRIGGER_MODE_BINARY,
+    TRIGGER_MODE_THRESHOLD,
+)
+from custom_components.smartmailbox.trigger import compile_trigger_plan
+
+from tests.conftest import make_mailbox_entry
+
+# (offset in seconds, entity_id, state)
+TimedEvent = tuple[float, str, str]
+
+SCENARIOS = ("bouncing", "angle")
+
+
+@dataclass
+class Report:
+    mailboxes: int
+    events: int = 0
+    triggers: int = 0
+    accepted: int = 0
+    seconds: float = 0.0
+    loop_lag_ms: list[float] = field(default_factory=list)
+
+    def as_dict(self) -> dict:
+        lag = sorted(self.loop_lag_ms) or [0.0]
+        return {
+            "mailboxes": self.mailboxes,
+            "events": self.events,
+            "events_per_second": round(self.events / self.seconds, 1)
+            if self.seconds
+            else 0.0,
+            "triggers": self.triggers,
+            "accepted": self.accepted,
+            "debounced": self.triggers - self.accepted,
+            "seconds": round(self.seconds, 3),
+            "loop_lag_ms": {
+                "p50": round(statistics.median(lag), 3),
+                "p99": round(lag[int(0.99 * (len(lag) - 1))], 3),
+                "max": round(lag[-1], 3),
+            },
+        }
+
+
+def _entry_data(args: argparse.Namespace) -> dict:
+    return {
+        CONF_DEBOUNCE_SECONDS: args.debounce,
+        CONF_FLAP_THRESHOLD: args.threshold,
+        CONF_DOOR_THRESHOLD: args.threshold,
+    }
+
+
+# ---------------------------------------------------------------------------
+# Event sources
+# ---------------------------------------------------------------------------
+
+
+def bouncing_flaps(
+    mailboxes: int, duration: float, rate: float, rng: random.Random
+) -> list[TimedEvent]:
+    """Deliveries at `rate` per second overall, each bouncing 2–6 times."""
+    events: list[TimedEvent] = []
+    offset = 0.0
+    while True:
+        offset += rng.expovariate(rate)
+        if offset >= duration:
+            break
+        flap = f"binary_sensor.load_flap_{rng.randrange(mailboxes)}"
+        at = offset
+        for _ in range(rng.randint(2, 6)):
+            events.append((at, flap, "on"))
+            at += rng.uniform(0.02, 0.15)
+            events.append((at, flap, "off"))
+            at += rng.uniform(0.02, 0.15)
+    events.sort()
+    return events
+
+
+def noisy_angles(
+    mailboxes: int, duration: float, rate: float, rng: random.Random
+) -> list[TimedEvent]:
+    """Every flap angle sensor sampled at `rate` Hz with jitter and openings."""
+    events: list[TimedEvent] = []
+    samples = int(duration * rate)
+    for idx in range(mailboxes):
+        flap = f"sensor.load_flap_{idx}"
+        open_until = -1
+        for sample in range(samples):
+            if sample > open_until and rng.random() < 0.2 / rate:
+                open_until = sample + int(rate)  # flap held open ~1 s
+            base = 60.0 if sample <= open_until else 5.0
+            value = base + rng.gauss(0, 3.0)
+            events.append((sample / rate, flap, f"{value:.1f}"))
+    events.sort()
+    return events
+
+
+def read_trace(path: Path) -> list[TimedEvent]:
+    """Load a CSV or JSONL trace, rebasing time to the first event."""
+    rows: Iterable[tuple[str, str, str]]
+    with path.open(encoding="utf-8") as fp:
+        if path.suffix == ".jsonl":
+            rows = [
+                (str(obj["time"]), obj["entity_id"], str(obj["state"]))
+                for obj in map(json.loads, filter(str.strip, fp))
+            ]
+        else:
+            rows = [
+                (row[0], row[1], row[2])
+                for row in csv.reader(fp)
+                if row and row[0] != "time"
+            ]
+
+    events: list[TimedEvent] = []
+    for when, entity_id, state in rows:
+        try:
+            seconds = float(when)
+        except ValueError:
+            parsed = dt_util.parse_datetime(when)
+            if parsed is None:
+                raise ValueError(f"Unparseable time in trace: {when!r}") from None
+            seconds = parsed.timestamp()
+        events.append((seconds, entity_id, state))
+    if not events:
+        return events
+    start = events[0][0]
+    return [(when - start, entity_id, state) for when, entity_id, state in events]
+
+
+# ---------------------------------------------------------------------------
+# Driver
+# ---------------------------------------------------------------------------
+
+
+async def _sample_loop_lag(report: Report, interval: float = 0.01) -> None:
+    loop = asyncio.get_running_loop()
+    while True:
+        expected = loop.time() + interval
+        await asyncio.sleep(interval)
+        report.loop_lag_ms.append(max(0.0, (loop.time() - expected) * 1000))
+
+
+def _count_triggers(
+    entries: list[MockConfigEntry], events: list[TimedEvent], initial: dict[str, str]
+) -> int:
+    """Count events that satisfy a trigger condition (before debounce)."""
+    triggers = {}
+    for entry in entries:
+        triggers.update(compile_trigger_plan(entry).triggers)
+    last = dict(initial)
+    count = 0
+    for _, entity_id, state in events:
+        old = last.get(entity_id)
+        last[entity_id] = state
+        spec = triggers.get(entity_id)
+        if (
+            spec is None
+            or old is None
+            or old == state
+            or old in ("unavailable", "unknown")
+            or state in ("unavailable", "unknown")
+        ):
+            continue
+        if spec.evaluate(State(entity_id, state), State(entity_id, old)):
+            count += 1
+    return count
+
+
+async def run(
+    entries: list[MockConfigEntry],
+    initial: dict[str, str],
+    events: list[TimedEvent],
+    speed: float,
+) -> Report:
+    report = Report(mailboxes=len(entries))
+    with tempfile.TemporaryDirectory() as config_dir:
+        async with async_test_home_assistant(storage_dir=config_dir) as hass:
+            hass.data.pop(loader.DATA_CUSTOM_COMPONENTS)
+            for entity_id, state in initial.items():
+                hass.states.async_set(entity_id, state)
+            for entry in entries:
+                entry.add_to_hass(hass)
+            assert await async_setup_component(hass, DOMAIN, {})
+            await hass.async_block_till_done()
+
+            report.accepted = await _drive(hass, entries, events, speed, report)
+            await hass.async_stop(force=True)
+
+    report.triggers = _count_triggers(entries, events, initial)
+    return report
+
+
+async def _drive(
+    hass: HomeAssistant,
+    entries: list[MockConfigEntry],
+    events: list[TimedEvent],
+    speed: float,
+    report: Report,
+) -> int:
+    accepted = 0
+
+    def _on_accepted() -> None:
+        nonlocal accepted
+        accepted += 1
+
+    unsubs = [
+        hass.data[DOMAIN][entry.entry_id]["coordinator"].async_add_listener(
+            _on_accepted
+        )
+        for entry in entries
+    ]
+    sampler = asyncio.create_task(_sample_loop_lag(report))
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    wall_start = time.perf_counter()
+
+    for idx, (offset, entity_id, state) in enumerate(events):
+        if speed > 0:
+            delay = start + offset / speed - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+        elif idx % 100 == 0:
+            await asyncio.sleep(0)
+        hass.states.async_set(entity_id, state)
+        report.events += 1
+
+    await hass.async_block_till_done()
+    report.seconds = time.perf_counter() - wall_start
+    sampler.cancel()
+    for unsub in unsubs:
+        unsub()
+    return accepted
+
+
+def _build_synthetic(
+    args: argparse.Namespace, rng: random.Random
+) -> tuple[list[MockConfigEntry], dict[str, str], list[TimedEvent]]:
+    if args.scenario == "bouncing":
+        domain, mode, idle = "binary_sensor", TRIGGER_MODE_BINARY, "off"
+        events = bouncing_flaps(args.mailboxes, args.duration, args.rate, rng)
+    else:
+        domain, mode, idle = "sensor", TRIGGER_MODE_THRESHOLD, "5.0"
+        events = noisy_angles(args.mailboxes, args.duration, args.rate, rng)
+
+    entries, initial = [], {}
+    for idx in range(args.mailboxes):
+        flap, door = f"{domain}.load_flap_{idx}", f"{domain}.load_door_{idx}"
+        entries.append(make_mailbox_entry(idx, mode, flap, door, _entry_data(args)))
+        initial[flap] = initial[door] = idle
+    return entries, initial, events
+
+
+def _build_replay(
+    args: argparse.Namespace,
+) -> tuple[list[MockConfigEntry], dict[str, str], list[TimedEvent]]:
+    if not args.flap or not args.door:
+        raise SystemExit("--replay needs --flap and --door")
+    events = read_trace(Path(args.replay))
+    mode = args.mode or (
+        TRIGGER_MODE_BINARY
+        if args.flap.startswith("binary_sensor.")
+        else TRIGGER_MODE_THRESHOLD
+    )
+    entry = make_mailbox_entry(0, mode, args.flap, args.door, _entry_data(args))
+
+    # Start the flap and door idle so the first recorded transition is not
+    # swallowed by the startup guard (unknown -> any).
+    idle = "off" if mode == TRIGGER_MODE_BINARY else "0"
+    initial: dict[str, str] = {args.flap: idle, args.door: idle}
+    for _, entity_id, state in events:
+        initial.setdefault(entity_id, state)
+    return [entry], initial, events
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.loadgen", description=__doc__.split("\n\n")[0]
+    )
+    parser.add_argument("--mailboxes", type=int, default=100)
+    parser.add_argument("--scenario", choices=SCENARIOS, default="bouncing")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds")
+    parser.add_argument(
+        "--rate",
+        type=float,
+        default=10.0,
+        help="deliveries/s (bouncing) or samples/s per sensor (angle)",
+    )
+    parser.add_argument("--debounce", type=int, default=3)
+    parser.add_argument("--threshold", type=float, default=30.0)
+    parser.add_argument("--replay", help="CSV or JSONL trace to replay")
+    parser.add_argument("--flap", help="flap entity for --replay")
+    parser.add_argument("--door", help="door entity for --replay")
+    parser.add_argument("--mode", choices=(TRIGGER_MODE_BINARY, TRIGGER_MODE_THRESHOLD))
+    parser.add_argument(
+        "--speed",
+        type=float,
+        default=1.0,
+        help="time compression factor; 0 sends events as fast as possible",
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="write the report to this file")
+    args = parser.parse_args(argv)
+
+    if args.replay:
+        entries, initial, events = _build_replay(args)
+    else:
+        entries, initial, events = _build_synthetic(args, random.Random(args.seed))
+
+    report = asyncio.run(run(entries, initial, events, args.speed)).as_dict()
+    output = json.dumps(report, indent=2)
+    if args.json:
+        Path(args.json).write_text(output)
+    print(output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
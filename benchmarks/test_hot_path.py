@@ -0,0 +1,127 @@
+"""Benchmarks for the state-change hot path and state serialization."""
+
+from __future__ import annotations
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from homeassistant.core import HomeAssistant
+from homeassistant.util import dt as dt_util
+
+from custom_components.smartmailbox import MailboxState, _serialize_state
+from custom_components.smartmailbox.const import (
+    CONF_DEBOUNCE_SECONDS,
+    TRIGGER_MODE_THRESHOLD,
+)
+from custom_components.smartmailbox.trigger import (
+    _is_triggered_threshold,
+    _parse_float,
+)
+
+from tests.conftest import make_mailbox_entry
+
+from .conftest import seed_states, state_event
+
+
+async def _post_sensor(hass: HomeAssistant, entry):
+    seed_states(hass, entry)
+    entry.add_to_hass(hass)
+    await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+    component = hass.data["binary_sensor"]
+    return component.get_entity(f"binary_sensor.{entry.title.lower().replace(' ', '_')}_mail")
+
+
+# ---------------------------------------------------------------------------
+# _changed throughput
+# ---------------------------------------------------------------------------
+
+
+async def test_changed_binary_rejected(hass: HomeAssistant, benchmark):
+    """on → off on the flap: evaluated and rejected (most common event)."""
+    sensor = await _post_sensor(hass, make_mailbox_entry(0))
+    event = state_event("binary_sensor.flap0", "on", "off")
+
+    benchmark(sensor._changed, event)
+
+
+async def test_changed_binary_debounced(hass: HomeAssistant, benchmark):
+    """A bouncing flap: triggers, but lands inside the debounce window."""
+    sensor = await _post_sensor(hass, make_mailbox_entry(0))
+    event = state_event("binary_sensor.flap0", "off", "on")
+    sensor._changed(event)
+
+    benchmark(sensor._changed, event)
+    await hass.async_block_till_done()
+
+
+async def test_changed_binary_accepted(hass: HomeAssistant, benchmark):
+    """Accepted delivery: state mutation, save scheduling and fan-out."""
+    sensor = await _post_sensor(hass, make_mailbox_entry(0, data={CONF_DEBOUNCE_SECONDS: 0}))
+    event = state_event("binary_sensor.flap0", "off", "on")
+
+    benchmark.pedantic(sensor._changed, args=(event,), rounds=500, iterations=1)
+    await hass.async_block_till_done()
+
+
+async def test_changed_threshold_rejected(hass: HomeAssistant, benchmark):
+    """Noisy angle sensor below the threshold: parsed and rejected."""
+    sensor = await _post_sensor(hass, make_mailbox_entry(0, TRIGGER_MODE_THRESHOLD))
+    event = state_event("sensor.flap_angle0", "12.5", "13.0")
+
+    benchmark(sensor._changed, event)
+
+
+async def test_changed_threshold_debounced(hass: HomeAssistant, benchmark):
+    """Angle sensor crossing the threshold inside the debounce window."""
+    sensor = await _post_sensor(hass, make_mailbox_entry(0, TRIGGER_MODE_THRESHOLD))
+    event = state_event("sensor.flap_angle0", "12.5", "45.0")
+    sensor._changed(event)
+
+    benchmark(sensor._changed, event)
+    await hass.async_block_till_done()
+
+
+async def test_changed_unrelated_entity(hass: HomeAssistant, benchmark):
+    """Event for an entity the plan does not watch."""
+    sensor = await _post_sensor(hass, make_mailbox_entry(0))
+    event = state_event("binary_sensor.somewhere_else", "off", "on")
+
+    benchmark(sensor._changed, event)
+
+
+# ---------------------------------------------------------------------------
+# Trigger helpers
+# ---------------------------------------------------------------------------
+
+
+def test_parse_float_valid(benchmark):
+    benchmark(_parse_float, "42.5")
+
+
+def test_parse_float_invalid(benchmark):
+    benchmark(_parse_float, "unavailable")
+
+
+def test_is_triggered_threshold(benchmark):
+    benchmark(_is_triggered_threshold, 35.0, 10.0, 30.0, "above")
+
+
+# ---------------------------------------------------------------------------
+# Persistence
+# ---------------------------------------------------------------------------
+
+
+def test_serialize_state(benchmark):
+    now = dt_util.utcnow()
+    state = MailboxState(
+        post_present=True,
+        last_delivery=now,
+        last_empty=now,
+        counter=12,
+        notified_for_current_post=True,
+        last_flap_trigger=now,
+    )
+
+    benchmark(_serialize_state, state)
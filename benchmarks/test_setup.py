@@ -0,0 +1,33 @@
+"""Setup and unload latency for a growing number of mailboxes."""
+
+from __future__ import annotations
+
+import pytest
+from homeassistant.core import HomeAssistant
+from homeassistant.setup import async_setup_component
+
+from custom_components.smartmailbox.const import DOMAIN
+
+from tests.conftest import make_mailbox_entry
+
+from .conftest import seed_states
+
+
+@pytest.mark.parametrize("count", [1, 100, 1000])
+async def test_setup_unload_latency(hass: HomeAssistant, record_latency, count: int):
+    entries = [make_mailbox_entry(idx) for idx in range(count)]
+    for entry in entries:
+        seed_states(hass, entry)
+        entry.add_to_hass(hass)
+
+    # Setting up the integration sets up every entry of the domain
+    with record_latency("setup", entries=count):
+        assert await async_setup_component(hass, DOMAIN, {})
+        await hass.async_block_till_done()
+
+    assert len(hass.states.async_entity_ids("binary_sensor")) == 3 * count
+
+    with record_latency("unload", entries=count):
+        for entry in entries:
+            await hass.config_entries.async_unload(entry.entry_id)
+        await hass.async_block_till_done()
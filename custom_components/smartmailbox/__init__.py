@@ -1,24 +1,48 @@
 from __future__ import annotations
 
+import asyncio
 import logging
-from dataclasses import dataclass
 from datetime import datetime
+from functools import partial
 from typing import Any
 
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant, ServiceCall
-from homeassistant.helpers.storage import Store
+from homeassistant.core import (
+    HomeAssistant,
+    ServiceCall,
+    ServiceResponse,
+    SupportsResponse,
+)
 from homeassistant.util import dt as dt_util
+from homeassistant.helpers import config_validation as cv
 from homeassistant.helpers.dispatcher import async_dispatcher_send
+from homeassistant.helpers.service import async_extract_referenced_entity_ids
+import voluptuous as vol
 
 from .const import (
     DOMAIN,
     PLATFORMS,
     SERVICE_RESET_COUNTER,
     SERVICE_MARK_EMPTY,
-    SIGNAL_PREFIX,
-    STORAGE_KEY_PREFIX,
-    STORAGE_VERSION,
+    SERVICE_GET_STATE,
+    SERVICE_PROFILE,
+    SIGNAL_OPTIONS_PREFIX,
+    CONF_SAVE_DELAY,
+    DEFAULT_SAVE_DELAY,
+    CONF_STORAGE_BACKEND,
+    DEFAULT_STORAGE_BACKEND,
+    CONF_ENABLE_COUNTER,
+    DEFAULT_ENABLE_COUNTER,
+    CONF_ENABLE_AGE,
+    DEFAULT_ENABLE_AGE,
+    CONF_AGE_UNIT,
+    DEFAULT_AGE_UNIT,
+    CONF_INSTRUMENTATION,
+    DEFAULT_INSTRUMENTATION,
+    STORAGE_BACKEND_SHARED,
+    JOURNAL_EVENT_COUNTER_RESET,
+    JOURNAL_EVENT_EMPTY,
+    SOURCE_SERVICE,
     CONF_FLAP_ENTITY,
     CONF_DOOR_ENTITY,
     CONF_FLAP_TRIGGER_MODE,
@@ -26,9 +50,53 @@ from .const import (
     TRIGGER_MODE_BINARY,
     TRIGGER_MODE_THRESHOLD,
 )
+from .coordinator import MailboxCoordinator
+from .device import async_get_device_info
+from .instrumentation import MailboxStats
+from .journal import MailboxJournal, async_remove_journal
+from .preload import async_get_preloader
+from .profiler import async_get_profiler
+from .registry import MailboxRegistry, async_get_registry
+from .storage import MailboxStore, SharedEntryStore, async_get_shared_store
 
 _LOGGER = logging.getLogger(__name__)
 
+ATTR_ENTRY_ID = "entry_id"
+ATTR_INCLUDE_JOURNAL = "include_journal"
+ATTR_SECONDS = "seconds"
+
+# Standard target fields (entity_id, device_id, area_id and, on newer cores,
+# label_id) plus our own entry_id list.
+_TARGET_KEYS = frozenset(str(key) for key in cv.TARGET_SERVICE_FIELDS)
+
+SERVICE_SCHEMA = vol.Schema(
+    {
+        **cv.TARGET_SERVICE_FIELDS,
+        vol.Optional(ATTR_ENTRY_ID): vol.All(cv.ensure_list, [cv.string]),
+    }
+)
+
+GET_STATE_SCHEMA = SERVICE_SCHEMA.extend(
+    {vol.Optional(ATTR_INCLUDE_JOURNAL, default=False): cv.boolean}
+)
+
+PROFILE_SCHEMA = vol.Schema(
+    {
+        vol.Optional(ATTR_SECONDS, default=60): vol.All(
+            vol.Coerce(float), vol.Range(min=1, max=3600)
+        ),
+    }
+)
+
+# Changing any of these rebuilds the entry; other options apply in place
+_RELOAD_OPTIONS = (
+    (CONF_ENABLE_COUNTER, DEFAULT_ENABLE_COUNTER),
+    (CONF_ENABLE_AGE, DEFAULT_ENABLE_AGE),
+    (CONF_AGE_UNIT, DEFAULT_AGE_UNIT),
+    (CONF_STORAGE_BACKEND, DEFAULT_STORAGE_BACKEND),
+    (CONF_INSTRUMENTATION, DEFAULT_INSTRUMENTATION),
+)
+
 
 async def async_migrate_entry(hass: HomeAssistant, config_entry: ConfigEntry) -> bool:
     """Migrate config entries to the current version."""
@@ -58,124 +126,304 @@ async def async_migrate_entry(hass: HomeAssistant, config_entry: ConfigEntry) ->
     return True
 
 
-@dataclass
+class _Timestamp:
+    """Datetime attribute kept as an epoch float in the `<name>_ts` slot."""
+
+    def __set_name__(self, owner: type, name: str) -> None:
+        self._slot = f"{name}_ts"
+
+    def __get__(self, obj: Any, objtype: type | None = None) -> Any:
+        if obj is None:
+            return self
+        ts = getattr(obj, self._slot)
+        return None if ts is None else dt_util.utc_from_timestamp(ts)
+
+    def __set__(self, obj: Any, value: datetime | None) -> None:
+        setattr(obj, self._slot, None if value is None else value.timestamp())
+
+
 class MailboxState:
-    post_present: bool = False
-    last_delivery: datetime | None = None
-    last_empty: datetime | None = None
-    counter: int = 0
-    notified_for_current_post: bool = False
-    last_flap_trigger: datetime | None = None
+    """Mutable state of one mailbox.
+
+    Timestamps are held as epoch seconds; the datetime attributes are
+    computed on access, and storage reads and writes the floats directly.
+    """
+
+    __slots__ = (
+        "post_present",
+        "counter",
+        "notified_for_current_post",
+        "last_delivery_ts",
+        "last_empty_ts",
+        "last_flap_trigger_ts",
+    )
+
+    last_delivery = _Timestamp()
+    last_empty = _Timestamp()
+    last_flap_trigger = _Timestamp()
+
+    def __init__(
+        self,
+        post_present: bool = False,
+        last_delivery: datetime | None = None,
+        last_empty: datetime | None = None,
+        counter: int = 0,
+        notified_for_current_post: bool = False,
+        last_flap_trigger: datetime | None = None,
+    ) -> None:
+        self.post_present = post_present
+        self.counter = counter
+        self.notified_for_current_post = notified_for_current_post
+        self.last_delivery = last_delivery
+        self.last_empty = last_empty
+        self.last_flap_trigger = last_flap_trigger
 
 
 def _dt_to_iso(dt: datetime | None) -> str | None:
     return dt.isoformat() if dt else None
 
 
-def _iso_to_dt(value: str | None) -> datetime | None:
-    if not value:
-        return None
-    try:
-        # parse_datetime handles timezone-aware and naive strings
-        dt = dt_util.parse_datetime(value) or datetime.fromisoformat(value)
-        if dt and dt.tzinfo is None:
-            return dt.replace(tzinfo=dt_util.UTC)
-        return dt
-    except Exception:
-        return None
+def _as_ts(value: Any) -> float | None:
+    return float(value) if isinstance(value, (int, float)) else None
 
 
-async def _load_state(hass: HomeAssistant, entry: ConfigEntry) -> MailboxState:
-    store = Store(hass, STORAGE_VERSION, f"{STORAGE_KEY_PREFIX}{entry.entry_id}")
-    data = await store.async_load() or {}
-    return MailboxState(
+def _deserialize_state(data: dict[str, Any]) -> MailboxState:
+    state = MailboxState(
         post_present=bool(data.get("post_present", False)),
-        last_delivery=_iso_to_dt(data.get("last_delivery")),
-        last_empty=_iso_to_dt(data.get("last_empty")),
         counter=int(data.get("counter", 0)),
         notified_for_current_post=bool(data.get("notified_for_current_post", False)),
-        last_flap_trigger=_iso_to_dt(data.get("last_flap_trigger")),
     )
+    state.last_delivery_ts = _as_ts(data.get("last_delivery"))
+    state.last_empty_ts = _as_ts(data.get("last_empty"))
+    state.last_flap_trigger_ts = _as_ts(data.get("last_flap_trigger"))
+    return state
+
+
+def _serialize_state(state: MailboxState) -> dict[str, Any]:
+    return {
+        "post_present": state.post_present,
+        "last_delivery": state.last_delivery_ts,
+        "last_empty": state.last_empty_ts,
+        "counter": state.counter,
+        "notified_for_current_post": state.notified_for_current_post,
+        "last_flap_trigger": state.last_flap_trigger_ts,
+    }
 
 
-async def _save_state(
-    hass: HomeAssistant, entry: ConfigEntry, state: MailboxState
-) -> None:
-    store = Store(hass, STORAGE_VERSION, f"{STORAGE_KEY_PREFIX}{entry.entry_id}")
-    await store.async_save(
-        {
-            "post_present": state.post_present,
-            "last_delivery": _dt_to_iso(state.last_delivery),
-            "last_empty": _dt_to_iso(state.last_empty),
-            "counter": state.counter,
-            "notified_for_current_post": state.notified_for_current_post,
-            "last_flap_trigger": _dt_to_iso(state.last_flap_trigger),
-        }
+async def _load_state(
+    hass: HomeAssistant, entry_id: str, store: MailboxStore | SharedEntryStore
+) -> MailboxState:
+    data = await store.async_load()
+    if data is None and isinstance(store, MailboxStore):
+        # Switched back from the shared file: own copy first, then drop it there
+        shared = async_get_shared_store(hass)
+        if (data := await shared.async_get_entry(entry_id)) is not None:
+            store.async_mark_dirty(partial(dict, data))
+            await store.async_flush()
+            shared.async_remove_entry(entry_id)
+    return _deserialize_state(data or {})
+
+
+async def _async_load_entry(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> tuple[MailboxStore | SharedEntryStore, MailboxState, MailboxJournal]:
+    save_delay = entry.options.get(
+        CONF_SAVE_DELAY, entry.data.get(CONF_SAVE_DELAY, DEFAULT_SAVE_DELAY)
     )
+    backend = entry.options.get(
+        CONF_STORAGE_BACKEND,
+        entry.data.get(CONF_STORAGE_BACKEND, DEFAULT_STORAGE_BACKEND),
+    )
+    if backend == STORAGE_BACKEND_SHARED:
+        store = SharedEntryStore(
+            async_get_shared_store(hass), entry.entry_id, save_delay
+        )
+    else:
+        store = MailboxStore(hass, entry.entry_id, save_delay)
+    journal = MailboxJournal(hass, entry.entry_id, save_delay)
+    state, _ = await asyncio.gather(
+        _load_state(hass, entry.entry_id, store), journal.async_load()
+    )
+    return store, state, journal
 
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     hass.data.setdefault(DOMAIN, {})
-    state = await _load_state(hass, entry)
-    hass.data[DOMAIN][entry.entry_id] = {
+    preloader = async_get_preloader(hass)
+    store, state, journal = await preloader.async_get(entry, _async_load_entry)
+    serialize = partial(_serialize_state, state)
+    data = hass.data[DOMAIN][entry.entry_id] = {
         "state": state,
-        "save": lambda: hass.async_create_task(_save_state(hass, entry, state)),
+        "store": store,
+        "journal": journal,
+        "serialize": serialize,
+        "save": partial(store.async_schedule_save, serialize),
+        "coordinator": MailboxCoordinator(),
+        "stats": MailboxStats() if _instrumented(entry) else None,
+        "device_info": await async_get_device_info(hass, entry),
+        "composition": _composition(entry),
     }
+    registry = async_get_registry(hass)
+    registry.async_add(entry.entry_id, data)
 
     if not hass.data[DOMAIN].get("_service_registered"):
-
-        async def handle_reset_counter(call: ServiceCall) -> None:
-            target_entry_id = call.data.get("entry_id")
-            for entry_id, data in list(hass.data[DOMAIN].items()):
-                if entry_id.startswith("_"):
-                    continue
-                if target_entry_id and target_entry_id != entry_id:
-                    continue
-                data["state"].counter = 0
-                data["save"]()
-                async_dispatcher_send(hass, f"{SIGNAL_PREFIX}{entry_id}")
-
-        async def handle_mark_empty(call: ServiceCall) -> None:
-            target_entry_id = call.data.get("entry_id")
-            for entry_id, data in list(hass.data[DOMAIN].items()):
-                if entry_id.startswith("_"):
-                    continue
-                if target_entry_id and target_entry_id != entry_id:
-                    continue
-                data["state"].post_present = False
-                data["state"].notified_for_current_post = False
-                data["save"]()
-                async_dispatcher_send(hass, f"{SIGNAL_PREFIX}{entry_id}")
-
-        hass.services.async_register(
-            DOMAIN,
-            SERVICE_RESET_COUNTER,
-            handle_reset_counter,
-        )
-        hass.services.async_register(
-            DOMAIN,
-            SERVICE_MARK_EMPTY,
-            handle_mark_empty,
-        )
+        _async_register_services(hass, registry)
         hass.data[DOMAIN]["_service_registered"] = True
 
     entry.async_on_unload(entry.add_update_listener(_update_listener))
 
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
+    preloader.async_setup_done(entry.entry_id)
     return True
 
 
+def _targets(
+    hass: HomeAssistant, registry: MailboxRegistry, call: ServiceCall
+) -> dict[str, dict[str, Any]]:
+    """Resolve entry_id and standard target fields; no target means all."""
+    entry_ids = call.data.get(ATTR_ENTRY_ID, [])
+    if not entry_ids and not _TARGET_KEYS.intersection(call.data):
+        return registry.async_resolve()
+
+    selected = async_extract_referenced_entity_ids(hass, call)
+    entity_ids = selected.referenced | selected.indirectly_referenced
+    if not (entry_ids or entity_ids or selected.referenced_devices):
+        return {}
+    return registry.async_resolve(
+        entry_ids,
+        selected.referenced_devices,
+        entity_ids=entity_ids,
+    )
+
+
+def _async_register_services(hass: HomeAssistant, registry: MailboxRegistry) -> None:
+    async def handle_reset_counter(call: ServiceCall) -> None:
+        targets = _targets(hass, registry, call)
+        now = dt_util.utcnow()
+        for data in targets.values():
+            data["state"].counter = 0
+            data["journal"].async_append(
+                JOURNAL_EVENT_COUNTER_RESET, SOURCE_SERVICE, now
+            )
+            data["coordinator"].async_update_listeners()
+        registry.async_schedule_save(targets)
+
+    async def handle_mark_empty(call: ServiceCall) -> None:
+        targets = _targets(hass, registry, call)
+        now = dt_util.utcnow()
+        for data in targets.values():
+            data["state"].post_present = False
+            data["state"].notified_for_current_post = False
+            data["journal"].async_append(JOURNAL_EVENT_EMPTY, SOURCE_SERVICE, now)
+            data["coordinator"].async_update_listeners()
+        registry.async_schedule_save(targets)
+
+    async def handle_get_state(call: ServiceCall) -> ServiceResponse:
+        include_journal = call.data[ATTR_INCLUDE_JOURNAL]
+        mailboxes = {}
+        for entry_id, data in _targets(hass, registry, call).items():
+            entry = hass.config_entries.async_get_entry(entry_id)
+            state = data["state"]
+            result = {
+                "title": entry.title if entry else None,
+                "post_present": state.post_present,
+                "last_delivery": _dt_to_iso(state.last_delivery),
+                "last_empty": _dt_to_iso(state.last_empty),
+                "counter": state.counter,
+                "notified_for_current_post": state.notified_for_current_post,
+                "last_flap_trigger": _dt_to_iso(state.last_flap_trigger),
+            }
+            if include_journal:
+                result["journal"] = [
+                    {**event, "time": event["time"].isoformat()}
+                    for event in data["journal"].events()
+                ]
+            mailboxes[entry_id] = result
+        return {"mailboxes": mailboxes}
+
+    async def handle_profile(call: ServiceCall) -> ServiceResponse:
+        return await async_get_profiler(hass).async_profile(call.data[ATTR_SECONDS])
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_RESET_COUNTER,
+        handle_reset_counter,
+        schema=SERVICE_SCHEMA,
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_MARK_EMPTY,
+        handle_mark_empty,
+        schema=SERVICE_SCHEMA,
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_GET_STATE,
+        handle_get_state,
+        schema=GET_STATE_SCHEMA,
+        supports_response=SupportsResponse.ONLY,
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_PROFILE,
+        handle_profile,
+        schema=PROFILE_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+
+
+def _instrumented(entry: ConfigEntry) -> bool:
+    return entry.options.get(
+        CONF_INSTRUMENTATION,
+        entry.data.get(CONF_INSTRUMENTATION, DEFAULT_INSTRUMENTATION),
+    )
+
+
+def _composition(entry: ConfigEntry) -> tuple[Any, ...]:
+    """Options that decide which entities and stores exist."""
+    options = {**entry.data, **entry.options}
+    return tuple(options.get(key, default) for key, default in _RELOAD_OPTIONS)
+
+
 async def _update_listener(hass: HomeAssistant, entry: ConfigEntry) -> None:
-    # Reload to apply option changes (enable/disable sensors, debounce, notify, etc.)
-    await hass.config_entries.async_reload(entry.entry_id)
+    data = hass.data[DOMAIN].get(entry.entry_id)
+    if data is None or data["composition"] != _composition(entry):
+        # Entities come or go (or change their unit): rebuild the entry
+        await hass.config_entries.async_reload(entry.entry_id)
+        return
+
+    # Everything else is applied in place: no teardown, no disk reads
+    save_delay = entry.options.get(
+        CONF_SAVE_DELAY, entry.data.get(CONF_SAVE_DELAY, DEFAULT_SAVE_DELAY)
+    )
+    data["store"].delay = data["journal"].delay = save_delay
+    async_dispatcher_send(hass, f"{SIGNAL_OPTIONS_PREFIX}{entry.entry_id}")
 
 
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     unloaded = await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
     if unloaded:
-        hass.data[DOMAIN].pop(entry.entry_id, None)
-        if not [k for k in hass.data[DOMAIN].keys() if not k.startswith("_")]:
+        registry = async_get_registry(hass)
+        registry.async_remove(entry.entry_id)
+        data = hass.data[DOMAIN].pop(entry.entry_id, None)
+        if data:
+            await data["store"].async_flush()
+            await data["journal"].async_flush()
+        if not registry:
             hass.services.async_remove(DOMAIN, SERVICE_RESET_COUNTER)
             hass.services.async_remove(DOMAIN, SERVICE_MARK_EMPTY)
+            hass.services.async_remove(DOMAIN, SERVICE_GET_STATE)
+            hass.services.async_remove(DOMAIN, SERVICE_PROFILE)
             hass.data[DOMAIN].pop("_service_registered", None)
+            if (notifier := hass.data[DOMAIN].pop("_notifier", None)) is not None:
+                notifier.async_shutdown()
     return unloaded
+
+
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Drop a deleted mailbox from the shared state file and its journal."""
+    hass.data.setdefault(DOMAIN, {})
+    shared = async_get_shared_store(hass)
+    if await shared.async_get_entry(entry.entry_id) is not None:
+        shared.async_remove_entry(entry.entry_id)
+    await async_remove_journal(hass, entry.entry_id)
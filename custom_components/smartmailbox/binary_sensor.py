@@ -1,50 +1,42 @@
 from __future__ import annotations
 
-import logging
-from datetime import timedelta
+from functools import partial
+from time import perf_counter
 
 from homeassistant.components.binary_sensor import BinarySensorEntity
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant, callback
-from homeassistant.helpers.dispatcher import (
-    async_dispatcher_send,
-    async_dispatcher_connect,
-)
-from homeassistant.helpers.event import async_track_state_change_event
+from homeassistant.const import MAJOR_VERSION, MINOR_VERSION
+from homeassistant.core import CALLBACK_TYPE, Event, HomeAssistant, callback
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
+from homeassistant.helpers.event import async_call_later
 from homeassistant.util import dt as dt_util
 
-_LOGGER = logging.getLogger(__name__)
-
-from homeassistant.helpers.translation import async_get_translations
-
 from .const import (
     DOMAIN,
-    CONF_NAME,
-    CONF_FLAP_ENTITY,
-    CONF_DOOR_ENTITY,
-    CONF_DEBOUNCE_SECONDS,
-    CONF_NOTIFY_ENABLED,
-    CONF_NOTIFY_SERVICE,
-    CONF_NOTIFY_MESSAGE,
-    CONF_DOOR_NOTIFY_ENABLED,
-    CONF_DOOR_NOTIFY_SERVICE,
-    CONF_DOOR_NOTIFY_MESSAGE,
-    CONF_RESET_ON_EMPTY,
-    CONF_FLAP_TRIGGER_MODE,
-    CONF_FLAP_THRESHOLD,
-    CONF_FLAP_THRESHOLD_DIRECTION,
-    CONF_DOOR_TRIGGER_MODE,
-    CONF_DOOR_THRESHOLD,
-    CONF_DOOR_THRESHOLD_DIRECTION,
-    TRIGGER_MODE_BINARY,
-    TRIGGER_MODE_THRESHOLD,
-    THRESHOLD_DIRECTION_ABOVE,
-    DEFAULT_TRIGGER_MODE,
-    DEFAULT_THRESHOLD,
-    DEFAULT_THRESHOLD_DIRECTION,
-    TRANSLATION_KEY_DEFAULT_NOTIFY,
-    TRANSLATION_KEY_DEFAULT_DOOR_NOTIFY,
-    SIGNAL_PREFIX,
+    ROLE_FLAP,
+    ROLE_DOOR,
+    JOURNAL_EVENT_DELIVERY,
+    JOURNAL_EVENT_EMPTY,
+    SIGNAL_OPTIONS_PREFIX,
+)
+from .coordinator import MailboxCoordinatorEntity
+from .instrumentation import MailboxStats
+from .notifications import async_get_default_messages, async_get_dispatcher
+from .profiler import async_get_profiler
+from .router import async_get_router
+from .trigger import (
+    EventTrigger,
+    RateLimiter,
+    TriggerPlan,
+    TriggerSpec,
+    compile_trigger_plan,
+    notifications_enabled,
+)
+
+# Older cores schedule bus listeners unless run_immediately is passed; from
+# 2024.5 on callback listeners always run immediately and the flag is deprecated
+_LISTEN_KWARGS = (
+    {"run_immediately": True} if (MAJOR_VERSION, MINOR_VERSION) < (2024, 5) else {}
 )
 
 
@@ -54,254 +46,240 @@ async def async_setup_entry(
     async_add_entities([MailboxPostSensor(hass, entry)])
 
 
-def _get_option(entry: ConfigEntry, key: str, default=None):
-    """Get a config value from options first, then data, then default."""
-    return entry.options.get(key, entry.data.get(key, default))
-
-
-def _is_triggered_threshold(
-    new_state_val: float, old_state_val: float | None, threshold: float, direction: str
-) -> bool:
-    """Check if a threshold crossing occurred (edge detection).
-
-    Returns True only if the new value crosses the threshold while the old value
-    did not meet the condition — preventing repeated triggers at a constant value.
-    """
-    if direction == THRESHOLD_DIRECTION_ABOVE:
-        new_meets = new_state_val >= threshold
-        old_meets = old_state_val is not None and old_state_val >= threshold
-    else:  # below
-        new_meets = new_state_val <= threshold
-        old_meets = old_state_val is not None and old_state_val <= threshold
-
-    return new_meets and not old_meets
-
-
-def _parse_float(state_str: str) -> float | None:
-    """Safely parse a state string to float."""
-    try:
-        return float(state_str)
-    except (ValueError, TypeError):
-        return None
-
-
-class MailboxPostSensor(BinarySensorEntity):
+class MailboxPostSensor(MailboxCoordinatorEntity, BinarySensorEntity):
     _attr_has_entity_name = True
     _attr_translation_key = "post"
     _attr_icon = "mdi:mailbox-outline"
     _attr_device_class = "occupancy"
+    _unrecorded_attributes = frozenset({"flap_debounced", "door_debounced"})
 
     def __init__(self, hass: HomeAssistant, entry: ConfigEntry):
+        super().__init__(hass.data[DOMAIN][entry.entry_id]["coordinator"])
         self.hass = hass
         self.entry = entry
         self._attr_unique_id = f"{entry.entry_id}_mailbox_post"
 
-        device_name = entry.data.get(CONF_NAME, "Smart Mailbox")
-        self._attr_device_info = {
-            "identifiers": {(DOMAIN, entry.entry_id)},
-            "name": device_name,
-            "manufacturer": "Danny Smolinsky",
-            "model": "Smart Mailbox",
-        }
+        self._attr_device_info = hass.data[DOMAIN][entry.entry_id]["device_info"]
 
         self._state_ref = hass.data[DOMAIN][entry.entry_id]["state"]
         self._save = hass.data[DOMAIN][entry.entry_id]["save"]
+        self._journal = hass.data[DOMAIN][entry.entry_id]["journal"]
+        self._stats: MailboxStats | None = hass.data[DOMAIN][entry.entry_id]["stats"]
 
         self._unsub = None
-        self._unsub_dispatcher = None
-        self._default_notify_message = ""
-        self._default_door_notify_message = ""
+        self._unsub_options = None
+        self._plan: TriggerPlan | None = None
+        # Triggers waiting out their dwell time, keyed by entity_id
+        self._dwell_timers: dict[str, CALLBACK_TYPE] = {}
+        self._unsub_events: list[CALLBACK_TYPE] = []
+        self._limiter = RateLimiter()
+        self._notifier = async_get_dispatcher(hass)
+        self._profiler = async_get_profiler(hass)
 
     async def async_added_to_hass(self) -> None:
-        translations = await async_get_translations(
-            self.hass, self.hass.config.language, "options", {DOMAIN}
-        )
-        self._default_notify_message = translations.get(
-            TRANSLATION_KEY_DEFAULT_NOTIFY, ""
-        )
-        self._default_door_notify_message = translations.get(
-            TRANSLATION_KEY_DEFAULT_DOOR_NOTIFY, ""
-        )
+        # Options are resolved once into a plan; an options change swaps in a
+        # freshly compiled plan without reloading the entry.
+        await super().async_added_to_hass()
+        self._async_set_plan(await self._async_compile_plan())
 
-        self._unsub_dispatcher = async_dispatcher_connect(
+        self._unsub_options = async_dispatcher_connect(
             self.hass,
-            f"{SIGNAL_PREFIX}{self.entry.entry_id}",
-            self._handle_dispatcher_update,
+            f"{SIGNAL_OPTIONS_PREFIX}{self.entry.entry_id}",
+            self._async_options_updated,
+        )
+        self._unsub = partial(
+            async_get_router(self.hass).async_remove_entry, self.entry.entry_id
         )
 
-        flap = _get_option(self.entry, CONF_FLAP_ENTITY)
-        door = _get_option(self.entry, CONF_DOOR_ENTITY)
+    async def _async_compile_plan(self) -> TriggerPlan:
+        defaults = ("", "")
+        if notifications_enabled(self.entry):
+            defaults = await async_get_default_messages(self.hass)
+        return compile_trigger_plan(self.entry, *defaults)
 
-        # Load trigger configuration
-        flap_mode = _get_option(
-            self.entry, CONF_FLAP_TRIGGER_MODE, DEFAULT_TRIGGER_MODE
-        )
-        flap_threshold = float(
-            _get_option(self.entry, CONF_FLAP_THRESHOLD, DEFAULT_THRESHOLD)
-        )
-        flap_direction = _get_option(
-            self.entry, CONF_FLAP_THRESHOLD_DIRECTION, DEFAULT_THRESHOLD_DIRECTION
+    @callback
+    def _async_set_plan(self, plan: TriggerPlan) -> None:
+        # Pending dwells were armed under the old conditions
+        for cancel in self._dwell_timers.values():
+            cancel()
+        self._dwell_timers.clear()
+        self._plan = plan
+        async_get_router(self.hass).async_set_entry(
+            self.entry.entry_id,
+            {entity_id: spec.role for entity_id, spec in plan.triggers.items()},
+            self._changed if self._stats is None else self._changed_timed,
         )
+        self._async_listen_events(plan)
 
-        door_mode = _get_option(
-            self.entry, CONF_DOOR_TRIGGER_MODE, DEFAULT_TRIGGER_MODE
-        )
-        door_threshold = float(
-            _get_option(self.entry, CONF_DOOR_THRESHOLD, DEFAULT_THRESHOLD)
-        )
-        door_direction = _get_option(
-            self.entry, CONF_DOOR_THRESHOLD_DIRECTION, DEFAULT_THRESHOLD_DIRECTION
+    @callback
+    def _async_listen_events(self, plan: TriggerPlan) -> None:
+        for unsub in self._unsub_events:
+            unsub()
+        # Matching runs as the bus event filter: events for other devices or
+        # commands never get a job scheduled for this mailbox.
+        self._unsub_events = [
+            self.hass.bus.async_listen(
+                trigger.event_type,
+                partial(self._event_fired, trigger),
+                event_filter=trigger.matches,
+                **_LISTEN_KWARGS,
+            )
+            for trigger in plan.events
+        ]
+
+    async def _async_options_updated(self) -> None:
+        self._async_set_plan(await self._async_compile_plan())
+        self.async_write_ha_state()
+
+    @callback
+    def _changed_timed(self, event: Event) -> None:
+        start = perf_counter()
+        self._stats.counters["received"] += 1
+        self._changed(event)
+        self._stats.event_latency.record(perf_counter() - start)
+
+    @callback
+    def _event_fired(self, trigger: EventTrigger, event: Event) -> None:
+        # Button-style events are stateless, so there is nothing to dwell on
+        self._count("received")
+        self._profiler.run(self._accept, trigger.key, trigger.spec)
+
+    @callback
+    def _count(self, counter: str) -> None:
+        if self._stats is not None:
+            self._stats.counters[counter] += 1
+
+    @callback
+    def _changed(self, event: Event) -> None:
+        new_state = event.data.get("new_state")
+        old_state = event.data.get("old_state")
+        if new_state is None:
+            return
+
+        entity_id = event.data.get("entity_id")
+        plan = self._plan
+        spec = plan.triggers.get(entity_id)
+        if spec is None:
+            return
+
+        # Ignore state transitions during startup (unavailable/unknown → any)
+        # and transitions TO unavailable/unknown
+        ignored = (
+            old_state is None
+            or old_state.state in ("unavailable", "unknown")
+            or new_state.state in ("unavailable", "unknown")
         )
+        # Evaluate first so a smoothing filter has taken in the new reading
+        # before a pending dwell is judged on the smoothed value
+        fired = not ignored and spec.evaluate(new_state, old_state)
+
+        # A pending dwell is abandoned as soon as the condition stops holding
+        if entity_id in self._dwell_timers and not spec.holds(new_state):
+            self._dwell_timers.pop(entity_id)()
+
+        if ignored:
+            self._count("ignored_unavailable")
+            return
+        if not fired:
+            return
+
+        if spec.dwell > 0:
+            if entity_id not in self._dwell_timers:
+                self._dwell_timers[entity_id] = async_call_later(
+                    self.hass, spec.dwell, self._dwell_elapsed(entity_id, spec)
+                )
+            return
+
+        self._accept(entity_id, spec)
 
+    def _dwell_elapsed(self, entity_id: str, spec: TriggerSpec):
         @callback
-        def _changed(event):
-            entity_id = event.data.get("entity_id")
-            new_state = event.data.get("new_state")
-            old_state = event.data.get("old_state")
-            if new_state is None:
-                return
-
-            # Ignore state transitions during startup (unavailable/unknown → any)
-            if old_state is None or old_state.state in ("unavailable", "unknown"):
-                return
-            # Ignore transitions TO unavailable/unknown
-            if new_state.state in ("unavailable", "unknown"):
-                return
-
-            # Determine which sensor fired and check trigger condition
-            if entity_id == flap:
-                triggered = self._check_trigger(
-                    flap_mode, new_state, old_state, flap_threshold, flap_direction
-                )
-            elif entity_id == door:
-                triggered = self._check_trigger(
-                    door_mode, new_state, old_state, door_threshold, door_direction
-                )
-            else:
-                return
-
-            if not triggered:
-                return
-
-            now = dt_util.utcnow()
-            debounce_s = _get_option(self.entry, CONF_DEBOUNCE_SECONDS, 3)
-            debounce = timedelta(seconds=int(debounce_s))
-
-            # Flap: delivery
-            if entity_id == flap:
-                if (
-                    self._state_ref.last_flap_trigger
-                    and (now - self._state_ref.last_flap_trigger) < debounce
-                ):
-                    return
-
-                self._state_ref.last_flap_trigger = now
-                self._state_ref.last_delivery = now
-                self._state_ref.post_present = True
-
-                # Push only once per "post_present period"
-                if not self._state_ref.notified_for_current_post:
-                    notify_enabled = _get_option(self.entry, CONF_NOTIFY_ENABLED, False)
-                    notify_services = _get_option(self.entry, CONF_NOTIFY_SERVICE, [])
-                    if notify_enabled and notify_services:
-                        message = _get_option(
-                            self.entry,
-                            CONF_NOTIFY_MESSAGE,
-                            self._default_notify_message,
-                        )
-                        self._send_notifications(notify_services, message)
-                    self._state_ref.notified_for_current_post = True
-
-                # Counter increments on every accepted flap event
-                self._state_ref.counter += 1
-
-            # Door: emptying
-            elif entity_id == door:
-                self._state_ref.last_empty = now
-                self._state_ref.post_present = False
-                self._state_ref.notified_for_current_post = False
-
-                if _get_option(self.entry, CONF_RESET_ON_EMPTY, False):
-                    self._state_ref.counter = 0
-
-                door_notify_enabled = _get_option(
-                    self.entry, CONF_DOOR_NOTIFY_ENABLED, False
-                )
-                door_notify_services = _get_option(
-                    self.entry, CONF_DOOR_NOTIFY_SERVICE, []
-                )
-                if door_notify_enabled and door_notify_services:
-                    door_message = _get_option(
-                        self.entry,
-                        CONF_DOOR_NOTIFY_MESSAGE,
-                        self._default_door_notify_message,
-                    )
-                    self._send_notifications(door_notify_services, door_message)
+        def _elapsed(_now) -> None:
+            self._dwell_timers.pop(entity_id, None)
+            state = self.hass.states.get(entity_id)
+            if state is not None and spec.holds(state):
+                self._accept(entity_id, spec)
 
-            self._save()
-            async_dispatcher_send(self.hass, f"{SIGNAL_PREFIX}{self.entry.entry_id}")
-            self.schedule_update_ha_state()
+        return _elapsed
 
-        self._unsub = async_track_state_change_event(self.hass, [flap, door], _changed)
+    @callback
+    def _accept(self, entity_id: str, spec: TriggerSpec) -> None:
+        if not self._limiter.allow(entity_id, spec.debounce):
+            self._count("debounced")
+            return
+        self._count("accepted")
+
+        plan = self._plan
+        now = dt_util.utcnow()
+        ts = now.timestamp()
+        state = self._state_ref
+
+        # Flap: delivery
+        if spec.role == ROLE_FLAP:
+            state.last_flap_trigger_ts = ts
+            state.last_delivery_ts = ts
+            state.post_present = True
+
+            # Push only once per "post_present period"
+            if not state.notified_for_current_post:
+                if plan.notify_services:
+                    self._notifier.async_notify(
+                        plan.notify_services, plan.notify_message, plan.notify_window
+                    )
+                state.notified_for_current_post = True
 
-    @staticmethod
-    def _check_trigger(
-        mode: str, new_state, old_state, threshold: float, direction: str
-    ) -> bool:
-        """Check if a state change constitutes a trigger event."""
-        if mode == TRIGGER_MODE_BINARY:
-            return new_state.state == "on"
+            # Counter increments on every accepted flap event
+            state.counter += 1
+            self._journal.async_append(JOURNAL_EVENT_DELIVERY, ROLE_FLAP, now)
 
-        if mode == TRIGGER_MODE_THRESHOLD:
-            new_val = _parse_float(new_state.state)
-            if new_val is None:
-                return False
-            old_val = _parse_float(old_state.state) if old_state else None
-            return _is_triggered_threshold(new_val, old_val, threshold, direction)
+        # Door: emptying
+        else:
+            state.last_empty_ts = ts
+            state.post_present = False
+            state.notified_for_current_post = False
+
+            if plan.reset_on_empty:
+                state.counter = 0
+            self._journal.async_append(JOURNAL_EVENT_EMPTY, ROLE_DOOR, now)
+
+            if plan.door_notify_services:
+                self._notifier.async_notify(
+                    plan.door_notify_services,
+                    plan.door_notify_message,
+                    plan.notify_window,
+                )
 
-        return False
+        self._save()
+        self.coordinator.async_update_listeners()
 
     async def async_will_remove_from_hass(self) -> None:
         if self._unsub:
             self._unsub()
             self._unsub = None
-        if self._unsub_dispatcher:
-            self._unsub_dispatcher()
-            self._unsub_dispatcher = None
-
-    @callback
-    def _handle_dispatcher_update(self) -> None:
-        self.schedule_update_ha_state()
-
-    @callback
-    def _send_notifications(self, notify_services: list | str, message: str) -> None:
-        """Send notifications to configured services."""
-        # Support both list (EntitySelector) and comma-separated string (legacy)
-        if isinstance(notify_services, str):
-            services = [s.strip() for s in notify_services.split(",") if s.strip()]
-        else:
-            services = notify_services
-
-        for notify_service in services:
-            try:
-                if "." in notify_service:
-                    domain, service = notify_service.split(".", 1)
-                else:
-                    domain, service = "notify", notify_service
-                _LOGGER.debug("Sending notification via %s.%s", domain, service)
-                self.hass.async_create_task(
-                    self.hass.services.async_call(
-                        domain,
-                        service,
-                        {"message": message},
-                        blocking=False,
-                    )
-                )
-            except Exception as err:
-                _LOGGER.error(
-                    "Failed to send notification via %s: %s", notify_service, err
-                )
+        if self._unsub_options:
+            self._unsub_options()
+            self._unsub_options = None
+        for unsub in self._unsub_events:
+            unsub()
+        self._unsub_events.clear()
+        for cancel in self._dwell_timers.values():
+            cancel()
+        self._dwell_timers.clear()
+
+    def _snapshot(self) -> tuple:
+        return self.is_on, self.extra_state_attributes
 
     @property
     def is_on(self) -> bool:
         return bool(self._state_ref.post_present)
+
+    @property
+    def extra_state_attributes(self) -> dict[str, int] | None:
+        # Drops are only counted; they show up with the next state write.
+        if self._plan is None:
+            return None
+        dropped = self._limiter.dropped
+        return {
+            "flap_debounced": dropped.get(self._plan.flap_entity, 0),
+            "door_debounced": dropped.get(self._plan.door_entity, 0),
+        }
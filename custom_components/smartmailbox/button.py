@@ -3,43 +3,49 @@ from __future__ import annotations
 from homeassistant.components.button import ButtonEntity
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant
-from homeassistant.helpers.dispatcher import async_dispatcher_send
+from homeassistant.util import dt as dt_util
 
-from .const import DOMAIN, CONF_NAME, SIGNAL_PREFIX
+from .const import (
+    DOMAIN,
+    SOURCE_BUTTON,
+    JOURNAL_EVENT_COUNTER_RESET,
+    JOURNAL_EVENT_EMPTY,
+)
 
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry, async_add_entities):
     """Set up button entities."""
     state_ref = hass.data[DOMAIN][entry.entry_id]["state"]
     save_fn = hass.data[DOMAIN][entry.entry_id]["save"]
+    journal = hass.data[DOMAIN][entry.entry_id]["journal"]
 
     async_add_entities([
-        ResetCounterButton(hass, entry, state_ref, save_fn),
-        MarkEmptyButton(hass, entry, state_ref, save_fn),
+        ResetCounterButton(hass, entry, state_ref, save_fn, journal),
+        MarkEmptyButton(hass, entry, state_ref, save_fn, journal),
     ])
 
 
 class _MailboxButtonBase(ButtonEntity):
     """Base class for mailbox buttons."""
 
-    def __init__(self, hass: HomeAssistant, entry: ConfigEntry, state_ref, save_fn):
+    _attr_should_poll = False
+
+    def __init__(
+        self, hass: HomeAssistant, entry: ConfigEntry, state_ref, save_fn, journal
+    ):
         self.hass = hass
         self.entry = entry
         self._state_ref = state_ref
         self._save = save_fn
+        self._journal = journal
+        self._coordinator = hass.data[DOMAIN][entry.entry_id]["coordinator"]
 
-        device_name = entry.data.get(CONF_NAME, "Smart Mailbox")
-        self._attr_device_info = {
-            "identifiers": {(DOMAIN, entry.entry_id)},
-            "name": device_name,
-            "manufacturer": "Danny Smolinsky",
-            "model": "Smart Mailbox",
-        }
+        self._attr_device_info = hass.data[DOMAIN][entry.entry_id]["device_info"]
 
     def _notify_update(self):
-        """Save state and notify listeners."""
+        """Save state and update the mailbox entities."""
         self._save()
-        async_dispatcher_send(self.hass, f"{SIGNAL_PREFIX}{self.entry.entry_id}")
+        self._coordinator.async_update_listeners()
 
 
 class ResetCounterButton(_MailboxButtonBase):
@@ -49,13 +55,18 @@ class ResetCounterButton(_MailboxButtonBase):
     _attr_translation_key = "reset_counter"
     _attr_icon = "mdi:counter"
 
-    def __init__(self, hass: HomeAssistant, entry: ConfigEntry, state_ref, save_fn):
-        super().__init__(hass, entry, state_ref, save_fn)
+    def __init__(
+        self, hass: HomeAssistant, entry: ConfigEntry, state_ref, save_fn, journal
+    ):
+        super().__init__(hass, entry, state_ref, save_fn, journal)
         self._attr_unique_id = f"{entry.entry_id}_reset_counter_button"
 
     async def async_press(self) -> None:
         """Handle button press."""
         self._state_ref.counter = 0
+        self._journal.async_append(
+            JOURNAL_EVENT_COUNTER_RESET, SOURCE_BUTTON, dt_util.utcnow()
+        )
         self._notify_update()
 
 
@@ -66,12 +77,15 @@ class MarkEmptyButton(_MailboxButtonBase):
     _attr_translation_key = "mark_empty"
     _attr_icon = "mdi:mailbox-open-outline"
 
-    def __init__(self, hass: HomeAssistant, entry: ConfigEntry, state_ref, save_fn):
-        super().__init__(hass, entry, state_ref, save_fn)
+    def __init__(
+        self, hass: HomeAssistant, entry: ConfigEntry, state_ref, save_fn, journal
+    ):
+        super().__init__(hass, entry, state_ref, save_fn, journal)
         self._attr_unique_id = f"{entry.entry_id}_mark_empty_button"
 
     async def async_press(self) -> None:
         """Handle button press."""
         self._state_ref.post_present = False
         self._state_ref.notified_for_current_post = False
+        self._journal.async_append(JOURNAL_EVENT_EMPTY, SOURCE_BUTTON, dt_util.utcnow())
         self._notify_update()
@@ -7,6 +7,7 @@ from homeassistant.helpers.selector import (
     NumberSelector,
     NumberSelectorConfig,
     NumberSelectorMode,
+    ObjectSelector,
     SelectSelector,
     SelectSelectorConfig,
     SelectSelectorMode,
@@ -20,6 +21,7 @@ from .const import (
     CONF_FLAP_ENTITY,
     CONF_DOOR_ENTITY,
     CONF_DEBOUNCE_SECONDS,
+    CONF_DOOR_DEBOUNCE_SECONDS,
     CONF_NOTIFY_ENABLED,
     CONF_NOTIFY_SERVICE,
     CONF_NOTIFY_MESSAGE,
@@ -30,28 +32,62 @@ from .const import (
     CONF_ENABLE_AGE,
     CONF_AGE_UNIT,
     CONF_RESET_ON_EMPTY,
+    CONF_SAVE_DELAY,
+    CONF_NOTIFY_COALESCE_SECONDS,
+    CONF_STORAGE_BACKEND,
+    CONF_INSTRUMENTATION,
     CONF_FLAP_TRIGGER_MODE,
     CONF_FLAP_THRESHOLD,
     CONF_FLAP_THRESHOLD_DIRECTION,
     CONF_DOOR_TRIGGER_MODE,
     CONF_DOOR_THRESHOLD,
     CONF_DOOR_THRESHOLD_DIRECTION,
+    CONF_FLAP_HYSTERESIS,
+    CONF_DOOR_HYSTERESIS,
+    CONF_FLAP_DWELL,
+    CONF_DOOR_DWELL,
+    CONF_FLAP_FILTER,
+    CONF_DOOR_FILTER,
+    CONF_FLAP_FILTER_WINDOW,
+    CONF_DOOR_FILTER_WINDOW,
+    CONF_FLAP_ATTRIBUTE,
+    CONF_DOOR_ATTRIBUTE,
+    CONF_FLAP_EVENT_TYPE,
+    CONF_DOOR_EVENT_TYPE,
+    CONF_FLAP_EVENT_DATA,
+    CONF_DOOR_EVENT_DATA,
     TRIGGER_MODE_BINARY,
     TRIGGER_MODE_THRESHOLD,
+    TRIGGER_MODE_ATTRIBUTE,
     THRESHOLD_DIRECTION_ABOVE,
     THRESHOLD_DIRECTION_BELOW,
+    FILTER_NONE,
+    FILTER_EMA,
+    FILTER_MEDIAN,
+    FILTER_MEDIAN_EMA,
     DEFAULT_DEBOUNCE_SECONDS,
+    DEFAULT_DOOR_DEBOUNCE_SECONDS,
     DEFAULT_NOTIFY_ENABLED,
     DEFAULT_DOOR_NOTIFY_ENABLED,
     DEFAULT_TRIGGER_MODE,
     DEFAULT_THRESHOLD,
     DEFAULT_THRESHOLD_DIRECTION,
+    DEFAULT_HYSTERESIS,
+    DEFAULT_DWELL_SECONDS,
+    DEFAULT_FILTER,
+    DEFAULT_FILTER_WINDOW,
     TRANSLATION_KEY_DEFAULT_NOTIFY,
     TRANSLATION_KEY_DEFAULT_DOOR_NOTIFY,
     DEFAULT_ENABLE_COUNTER,
     DEFAULT_ENABLE_AGE,
     DEFAULT_AGE_UNIT,
     DEFAULT_RESET_ON_EMPTY,
+    DEFAULT_SAVE_DELAY,
+    DEFAULT_NOTIFY_COALESCE_SECONDS,
+    DEFAULT_STORAGE_BACKEND,
+    DEFAULT_INSTRUMENTATION,
+    STORAGE_BACKEND_ENTRY,
+    STORAGE_BACKEND_SHARED,
 )
 
 # Accept both binary_sensor and sensor domains
@@ -63,6 +99,24 @@ _THRESHOLD_SELECTOR = NumberSelector(
     NumberSelectorConfig(min=-1000, max=1000, step=0.1, mode=NumberSelectorMode.BOX)
 )
 
+_HYSTERESIS_SELECTOR = NumberSelector(
+    NumberSelectorConfig(min=0, max=1000, step=0.1, mode=NumberSelectorMode.BOX)
+)
+
+_DWELL_VALIDATOR = vol.All(vol.Coerce(float), vol.Range(min=0, max=60))
+
+_FILTER_SELECTOR = SelectSelector(
+    SelectSelectorConfig(
+        options=[
+            {"value": kind, "label": kind}
+            for kind in (FILTER_NONE, FILTER_EMA, FILTER_MEDIAN, FILTER_MEDIAN_EMA)
+        ],
+        mode=SelectSelectorMode.DROPDOWN,
+    )
+)
+
+_FILTER_WINDOW_VALIDATOR = vol.All(vol.Coerce(int), vol.Range(min=2, max=30))
+
 _DIRECTION_SELECTOR = SelectSelector(
     SelectSelectorConfig(
         options=[
@@ -96,6 +150,15 @@ def _is_non_binary(hass, entity_id: str) -> bool:
     return not entity_id.startswith("binary_sensor.")
 
 
+def _trigger_mode(hass, entity_id: str, attribute: str) -> str:
+    """Derive the trigger mode from the selected entity and attribute."""
+    if attribute:
+        return TRIGGER_MODE_ATTRIBUTE
+    if _is_non_binary(hass, entity_id):
+        return TRIGGER_MODE_THRESHOLD
+    return TRIGGER_MODE_BINARY
+
+
 def _user_schema(hass) -> vol.Schema:
     return vol.Schema(
         {
@@ -125,6 +188,15 @@ def _triggers_schema(
                 CONF_FLAP_THRESHOLD_DIRECTION, default=DEFAULT_THRESHOLD_DIRECTION
             )
         ] = _DIRECTION_SELECTOR
+        fields[vol.Optional(CONF_FLAP_HYSTERESIS, default=DEFAULT_HYSTERESIS)] = (
+            _HYSTERESIS_SELECTOR
+        )
+        fields[vol.Optional(CONF_FLAP_FILTER, default=DEFAULT_FILTER)] = (
+            _FILTER_SELECTOR
+        )
+        fields[
+            vol.Optional(CONF_FLAP_FILTER_WINDOW, default=DEFAULT_FILTER_WINDOW)
+        ] = _FILTER_WINDOW_VALIDATOR
     if door_needs_threshold:
         fields[vol.Required(CONF_DOOR_THRESHOLD, default=DEFAULT_THRESHOLD)] = (
             _THRESHOLD_SELECTOR
@@ -134,6 +206,15 @@ def _triggers_schema(
                 CONF_DOOR_THRESHOLD_DIRECTION, default=DEFAULT_THRESHOLD_DIRECTION
             )
         ] = _DIRECTION_SELECTOR
+        fields[vol.Optional(CONF_DOOR_HYSTERESIS, default=DEFAULT_HYSTERESIS)] = (
+            _HYSTERESIS_SELECTOR
+        )
+        fields[vol.Optional(CONF_DOOR_FILTER, default=DEFAULT_FILTER)] = (
+            _FILTER_SELECTOR
+        )
+        fields[
+            vol.Optional(CONF_DOOR_FILTER_WINDOW, default=DEFAULT_FILTER_WINDOW)
+        ] = _FILTER_WINDOW_VALIDATOR
     return vol.Schema(fields)
 
 
@@ -159,6 +240,32 @@ def _options_schema(options: dict, hass) -> vol.Schema:
             CONF_DEBOUNCE_SECONDS,
             default=options.get(CONF_DEBOUNCE_SECONDS, DEFAULT_DEBOUNCE_SECONDS),
         ): vol.Coerce(int),
+        vol.Optional(
+            CONF_DOOR_DEBOUNCE_SECONDS,
+            default=options.get(
+                CONF_DOOR_DEBOUNCE_SECONDS, DEFAULT_DOOR_DEBOUNCE_SECONDS
+            ),
+        ): vol.Coerce(int),
+        vol.Optional(
+            CONF_SAVE_DELAY,
+            default=options.get(CONF_SAVE_DELAY, DEFAULT_SAVE_DELAY),
+        ): vol.All(vol.Coerce(int), vol.Range(min=0, max=300)),
+        vol.Optional(
+            CONF_STORAGE_BACKEND,
+            default=options.get(CONF_STORAGE_BACKEND, DEFAULT_STORAGE_BACKEND),
+        ): vol.In([STORAGE_BACKEND_ENTRY, STORAGE_BACKEND_SHARED]),
+        vol.Optional(
+            CONF_INSTRUMENTATION,
+            default=options.get(CONF_INSTRUMENTATION, DEFAULT_INSTRUMENTATION),
+        ): bool,
+        vol.Optional(
+            CONF_FLAP_DWELL,
+            default=options.get(CONF_FLAP_DWELL, DEFAULT_DWELL_SECONDS),
+        ): _DWELL_VALIDATOR,
+        vol.Optional(
+            CONF_DOOR_DWELL,
+            default=options.get(CONF_DOOR_DWELL, DEFAULT_DWELL_SECONDS),
+        ): _DWELL_VALIDATOR,
         vol.Optional(
             CONF_NOTIFY_ENABLED,
             default=options.get(CONF_NOTIFY_ENABLED, DEFAULT_NOTIFY_ENABLED),
@@ -179,17 +286,41 @@ def _options_schema(options: dict, hass) -> vol.Schema:
         vol.Optional(
             CONF_DOOR_NOTIFY_MESSAGE, default=options.get(CONF_DOOR_NOTIFY_MESSAGE, "")
         ): str,
+        vol.Optional(
+            CONF_NOTIFY_COALESCE_SECONDS,
+            default=options.get(
+                CONF_NOTIFY_COALESCE_SECONDS, DEFAULT_NOTIFY_COALESCE_SECONDS
+            ),
+        ): vol.All(vol.Coerce(int), vol.Range(min=0, max=600)),
         vol.Optional(
             CONF_FLAP_ENTITY, default=options.get(CONF_FLAP_ENTITY, "")
         ): _ENTITY_SELECTOR,
         vol.Optional(
             CONF_DOOR_ENTITY, default=options.get(CONF_DOOR_ENTITY, "")
         ): _ENTITY_SELECTOR,
+        vol.Optional(
+            CONF_FLAP_ATTRIBUTE, default=options.get(CONF_FLAP_ATTRIBUTE, "")
+        ): str,
+        vol.Optional(
+            CONF_DOOR_ATTRIBUTE, default=options.get(CONF_DOOR_ATTRIBUTE, "")
+        ): str,
+        vol.Optional(
+            CONF_FLAP_EVENT_TYPE, default=options.get(CONF_FLAP_EVENT_TYPE, "")
+        ): str,
+        vol.Optional(
+            CONF_FLAP_EVENT_DATA, default=options.get(CONF_FLAP_EVENT_DATA, {})
+        ): ObjectSelector(),
+        vol.Optional(
+            CONF_DOOR_EVENT_TYPE, default=options.get(CONF_DOOR_EVENT_TYPE, "")
+        ): str,
+        vol.Optional(
+            CONF_DOOR_EVENT_DATA, default=options.get(CONF_DOOR_EVENT_DATA, {})
+        ): ObjectSelector(),
     }
 
-    # Show threshold fields if flap sensor is non-binary
+    # Show threshold fields if flap sensor is non-binary or read by attribute
     flap_entity = options.get(CONF_FLAP_ENTITY, "")
-    if _is_non_binary(hass, flap_entity):
+    if _is_non_binary(hass, flap_entity) or options.get(CONF_FLAP_ATTRIBUTE):
         fields[
             vol.Optional(
                 CONF_FLAP_THRESHOLD,
@@ -204,10 +335,28 @@ def _options_schema(options: dict, hass) -> vol.Schema:
                 ),
             )
         ] = _DIRECTION_SELECTOR
+        fields[
+            vol.Optional(
+                CONF_FLAP_HYSTERESIS,
+                default=options.get(CONF_FLAP_HYSTERESIS, DEFAULT_HYSTERESIS),
+            )
+        ] = _HYSTERESIS_SELECTOR
+        fields[
+            vol.Optional(
+                CONF_FLAP_FILTER,
+                default=options.get(CONF_FLAP_FILTER, DEFAULT_FILTER),
+            )
+        ] = _FILTER_SELECTOR
+        fields[
+            vol.Optional(
+                CONF_FLAP_FILTER_WINDOW,
+                default=options.get(CONF_FLAP_FILTER_WINDOW, DEFAULT_FILTER_WINDOW),
+            )
+        ] = _FILTER_WINDOW_VALIDATOR
 
-    # Show threshold fields if door sensor is non-binary
+    # Show threshold fields if door sensor is non-binary or read by attribute
     door_entity = options.get(CONF_DOOR_ENTITY, "")
-    if _is_non_binary(hass, door_entity):
+    if _is_non_binary(hass, door_entity) or options.get(CONF_DOOR_ATTRIBUTE):
         fields[
             vol.Optional(
                 CONF_DOOR_THRESHOLD,
@@ -222,6 +371,24 @@ def _options_schema(options: dict, hass) -> vol.Schema:
                 ),
             )
         ] = _DIRECTION_SELECTOR
+        fields[
+            vol.Optional(
+                CONF_DOOR_HYSTERESIS,
+                default=options.get(CONF_DOOR_HYSTERESIS, DEFAULT_HYSTERESIS),
+            )
+        ] = _HYSTERESIS_SELECTOR
+        fields[
+            vol.Optional(
+                CONF_DOOR_FILTER,
+                default=options.get(CONF_DOOR_FILTER, DEFAULT_FILTER),
+            )
+        ] = _FILTER_SELECTOR
+        fields[
+            vol.Optional(
+                CONF_DOOR_FILTER_WINDOW,
+                default=options.get(CONF_DOOR_FILTER_WINDOW, DEFAULT_FILTER_WINDOW),
+            )
+        ] = _FILTER_WINDOW_VALIDATOR
 
     return vol.Schema(fields)
 
@@ -298,19 +465,37 @@ class MailboxOptionsFlow(config_entries.OptionsFlow):
         self.entry = entry
 
     async def async_step_init(self, user_input=None):
+        errors = {}
         if user_input is not None:
-            # Derive trigger modes from selected entities
-            flap = user_input.get(CONF_FLAP_ENTITY, "")
-            door = user_input.get(CONF_DOOR_ENTITY, "")
-            user_input[CONF_FLAP_TRIGGER_MODE] = (
-                TRIGGER_MODE_THRESHOLD
-                if _is_non_binary(self.hass, flap)
-                else TRIGGER_MODE_BINARY
+            # The event data filter is matched key by key against event data
+            for type_key, data_key in (
+                (CONF_FLAP_EVENT_TYPE, CONF_FLAP_EVENT_DATA),
+                (CONF_DOOR_EVENT_TYPE, CONF_DOOR_EVENT_DATA),
+            ):
+                event_data = user_input.get(data_key) or {}
+                if not isinstance(event_data, dict):
+                    errors[data_key] = "invalid_event_data"
+                elif user_input.get(type_key, "").strip() and not event_data:
+                    # Every event of a type like zha_event would count
+                    errors[data_key] = "event_data_required"
+        if user_input is not None and not errors:
+            # Derive trigger modes from selected entities and attributes
+            for text_key in (
+                CONF_FLAP_ATTRIBUTE,
+                CONF_DOOR_ATTRIBUTE,
+                CONF_FLAP_EVENT_TYPE,
+                CONF_DOOR_EVENT_TYPE,
+            ):
+                user_input[text_key] = user_input.get(text_key, "").strip()
+            user_input[CONF_FLAP_TRIGGER_MODE] = _trigger_mode(
+                self.hass,
+                user_input.get(CONF_FLAP_ENTITY, ""),
+                user_input[CONF_FLAP_ATTRIBUTE],
             )
-            user_input[CONF_DOOR_TRIGGER_MODE] = (
-                TRIGGER_MODE_THRESHOLD
-                if _is_non_binary(self.hass, door)
-                else TRIGGER_MODE_BINARY
+            user_input[CONF_DOOR_TRIGGER_MODE] = _trigger_mode(
+                self.hass,
+                user_input.get(CONF_DOOR_ENTITY, ""),
+                user_input[CONF_DOOR_ATTRIBUTE],
             )
             return self.async_create_entry(title="", data=user_input)
 
@@ -329,6 +514,11 @@ class MailboxOptionsFlow(config_entries.OptionsFlow):
                 merged[CONF_DOOR_NOTIFY_MESSAGE] = translations.get(
                     TRANSLATION_KEY_DEFAULT_DOOR_NOTIFY, ""
                 )
+        if user_input is not None:
+            # Keep what was entered when the form is shown again with errors
+            merged.update(user_input)
         return self.async_show_form(
-            step_id="init", data_schema=_options_schema(merged, self.hass)
+            step_id="init",
+            data_schema=_options_schema(merged, self.hass),
+            errors=errors,
         )
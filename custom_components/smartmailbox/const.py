@@ -3,11 +3,15 @@ from __future__ import annotations
 DOMAIN = "smartmailbox"
 PLATFORMS = ["binary_sensor", "sensor", "button"]
 
+DEVICE_MANUFACTURER = "Danny Smolinsky"
+DEVICE_MODEL = "Smart Mailbox"
+
 # Config / options keys
 CONF_NAME = "name"
 CONF_FLAP_ENTITY = "flap_entity"
 CONF_DOOR_ENTITY = "door_entity"
 CONF_DEBOUNCE_SECONDS = "debounce_seconds"
+CONF_DOOR_DEBOUNCE_SECONDS = "door_debounce_seconds"
 CONF_NOTIFY_ENABLED = "notify"
 CONF_NOTIFY_SERVICE = "notify_service"
 CONF_NOTIFY_MESSAGE = "notify_message"
@@ -19,6 +23,10 @@ CONF_ENABLE_COUNTER = "enable_counter"
 CONF_ENABLE_AGE = "enable_age"
 CONF_AGE_UNIT = "age_unit"  # "hours" or "days"
 CONF_RESET_ON_EMPTY = "reset_on_empty"
+CONF_SAVE_DELAY = "save_delay"
+CONF_NOTIFY_COALESCE_SECONDS = "notify_coalesce_seconds"
+CONF_STORAGE_BACKEND = "storage_backend"
+CONF_INSTRUMENTATION = "instrumentation"
 
 # Trigger mode (per sensor)
 CONF_FLAP_TRIGGER_MODE = "flap_trigger_mode"
@@ -27,17 +35,48 @@ CONF_FLAP_THRESHOLD_DIRECTION = "flap_threshold_direction"
 CONF_DOOR_TRIGGER_MODE = "door_trigger_mode"
 CONF_DOOR_THRESHOLD = "door_threshold"
 CONF_DOOR_THRESHOLD_DIRECTION = "door_threshold_direction"
+CONF_FLAP_HYSTERESIS = "flap_hysteresis"
+CONF_DOOR_HYSTERESIS = "door_hysteresis"
+CONF_FLAP_DWELL = "flap_dwell_seconds"
+CONF_DOOR_DWELL = "door_dwell_seconds"
+CONF_FLAP_FILTER = "flap_filter"
+CONF_DOOR_FILTER = "door_filter"
+CONF_FLAP_FILTER_WINDOW = "flap_filter_window"
+CONF_DOOR_FILTER_WINDOW = "door_filter_window"
+CONF_FLAP_ATTRIBUTE = "flap_attribute"
+CONF_DOOR_ATTRIBUTE = "door_attribute"
+CONF_FLAP_EVENT_TYPE = "flap_event_type"
+CONF_DOOR_EVENT_TYPE = "door_event_type"
+CONF_FLAP_EVENT_DATA = "flap_event_data"
+CONF_DOOR_EVENT_DATA = "door_event_data"
 
 TRIGGER_MODE_BINARY = "binary"
 TRIGGER_MODE_THRESHOLD = "threshold"
+TRIGGER_MODE_ATTRIBUTE = "attribute"  # numeric threshold on an attribute
+
+ROLE_FLAP = "flap"
+ROLE_DOOR = "door"
+SOURCE_BUTTON = "button"
+SOURCE_SERVICE = "service"
 
 THRESHOLD_DIRECTION_ABOVE = "above"
 THRESHOLD_DIRECTION_BELOW = "below"
 
+# Smoothing of numeric readings before the threshold check
+FILTER_NONE = "none"
+FILTER_EMA = "ema"
+FILTER_MEDIAN = "median"
+FILTER_MEDIAN_EMA = "median_ema"  # median against spikes, then EMA
+
 DEFAULT_DEBOUNCE_SECONDS = 3
+DEFAULT_DOOR_DEBOUNCE_SECONDS = 0
 DEFAULT_TRIGGER_MODE = TRIGGER_MODE_BINARY
 DEFAULT_THRESHOLD = 30.0
 DEFAULT_THRESHOLD_DIRECTION = THRESHOLD_DIRECTION_ABOVE
+DEFAULT_HYSTERESIS = 0.0
+DEFAULT_DWELL_SECONDS = 0.0
+DEFAULT_FILTER = FILTER_NONE
+DEFAULT_FILTER_WINDOW = 5
 DEFAULT_NOTIFY_ENABLED = False
 DEFAULT_DOOR_NOTIFY_ENABLED = False
 TRANSLATION_KEY_DEFAULT_NOTIFY = (
@@ -50,13 +89,47 @@ DEFAULT_ENABLE_COUNTER = True
 DEFAULT_ENABLE_AGE = True
 DEFAULT_AGE_UNIT = "hours"
 DEFAULT_RESET_ON_EMPTY = False
+DEFAULT_SAVE_DELAY = 5
+DEFAULT_NOTIFY_COALESCE_SECONDS = 0
+DEFAULT_STORAGE_BACKEND = "entry"
+DEFAULT_INSTRUMENTATION = False
+
+# Notification dispatcher (shared by all mailboxes)
+NOTIFY_QUEUE_SIZE = 200
+NOTIFY_CONCURRENCY = 4
+NOTIFY_BURST = 5  # calls a single notify service may take back to back
+NOTIFY_RATE = 0.5  # sustained calls per second and service
+NOTIFY_RETRIES = 3
+NOTIFY_BACKOFF = 2.0  # seconds before the first retry, doubled each time
+NOTIFY_TIMEOUT = 30
 
 SERVICE_RESET_COUNTER = "reset_counter"
 SERVICE_MARK_EMPTY = "mark_empty"
+SERVICE_GET_STATE = "get_state"
+SERVICE_PROFILE = "profile"
 
 # Dispatcher signal prefix
-SIGNAL_PREFIX = "smartmailbox_update_"
+SIGNAL_OPTIONS_PREFIX = "smartmailbox_options_"
 
 # Storage
-STORAGE_VERSION = 1
+# v2: per-entry files keep their layout; the shared file holds
+# {"entries": {entry_id: state}} for mailboxes using the shared backend.
+# v3: timestamps are stored as epoch seconds instead of ISO strings.
+STORAGE_VERSION = 3
 STORAGE_KEY_PREFIX = "smartmailbox_state_"
+STORAGE_KEY_SHARED = "smartmailbox_state"
+STORAGE_BACKEND_ENTRY = "entry"
+STORAGE_BACKEND_SHARED = "shared"
+
+# Event journal (stored on disk as indexes into these tuples — append only)
+JOURNAL_KEY_PREFIX = "smartmailbox_journal_"
+JOURNAL_CAPACITY = 500
+JOURNAL_EVENT_DELIVERY = "delivery"
+JOURNAL_EVENT_EMPTY = "empty"
+JOURNAL_EVENT_COUNTER_RESET = "counter_reset"
+JOURNAL_EVENTS = (
+    JOURNAL_EVENT_DELIVERY,
+    JOURNAL_EVENT_EMPTY,
+    JOURNAL_EVENT_COUNTER_RESET,
+)
+JOURNAL_SOURCES = (ROLE_FLAP, ROLE_DOOR, SOURCE_BUTTON, SOURCE_SERVICE)
@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.core import CALLBACK_TYPE, callback
+from homeassistant.helpers.entity import Entity
+
+
+class MailboxCoordinator:
+    """Push state changes of one mailbox to its entities.
+
+    Whatever changes the mailbox state (a trigger, a button, a service)
+    calls `async_update_listeners` once. Nothing is polled or fetched: the
+    state object is shared, so listeners only have to decide whether their
+    own value moved.
+    """
+
+    def __init__(self) -> None:
+        # A dict keeps insertion order, so entities update in setup order
+        self._listeners: dict[CALLBACK_TYPE, None] = {}
+
+    @callback
+    def async_add_listener(self, update_callback: CALLBACK_TYPE) -> CALLBACK_TYPE:
+        """Call `update_callback` on every change; returns the unsubscribe."""
+        self._listeners[update_callback] = None
+
+        @callback
+        def _remove() -> None:
+            self._listeners.pop(update_callback, None)
+
+        return _remove
+
+    @callback
+    def async_update_listeners(self) -> None:
+        for update_callback in list(self._listeners):
+            update_callback()
+
+
+class MailboxCoordinatorEntity(Entity):
+    """Entity that writes its state only when its value actually changed.
+
+    Subclasses return what their state is made of from `_snapshot`; an
+    update writes the state if the snapshot differs from the one taken at
+    the last write, and does nothing otherwise.
+    """
+
+    _attr_should_poll = False
+
+    def __init__(self, coordinator: MailboxCoordinator) -> None:
+        self.coordinator = coordinator
+        self._written: Any = None
+
+    def _snapshot(self) -> Any:
+        return self.state
+
+    async def async_added_to_hass(self) -> None:
+        await super().async_added_to_hass()
+        self.async_on_remove(
+            self.coordinator.async_add_listener(self._handle_coordinator_update)
+        )
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        if self._snapshot() != self._written:
+            self.async_write_ha_state()
+
+    @callback
+    def async_write_ha_state(self) -> None:
+        self._written = self._snapshot()
+        super().async_write_ha_state()
@@ -0,0 +1,25 @@
+from __future__ import annotations
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.device_registry import DeviceInfo
+from homeassistant.loader import async_get_integration
+
+from .const import DOMAIN, CONF_NAME, DEVICE_MANUFACTURER, DEVICE_MODEL
+
+CONFIGURATION_URL = f"homeassistant://config/integrations/integration/{DOMAIN}"
+
+
+async def async_get_device_info(hass: HomeAssistant, entry: ConfigEntry) -> DeviceInfo:
+    """Describe the mailbox device; shared by every entity of the entry."""
+    integration = await async_get_integration(hass, DOMAIN)
+    # hw_version stays unset: the mailbox has no hardware revision of its own,
+    # and the source sensors' devices already list their models
+    return DeviceInfo(
+        identifiers={(DOMAIN, entry.entry_id)},
+        name=entry.data.get(CONF_NAME, "Smart Mailbox"),
+        manufacturer=DEVICE_MANUFACTURER,
+        model=DEVICE_MODEL,
+        sw_version=str(integration.version or ""),
+        configuration_url=CONFIGURATION_URL,
+    )
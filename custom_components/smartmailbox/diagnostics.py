@@ -0,0 +1,47 @@
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from .const import DOMAIN, CONF_NOTIFY_SERVICE, CONF_DOOR_NOTIFY_SERVICE
+
+# Notify service names usually carry a person's or a phone's name
+TO_REDACT = {CONF_NOTIFY_SERVICE, CONF_DOOR_NOTIFY_SERVICE}
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> dict[str, Any]:
+    domain_data = hass.data.get(DOMAIN, {})
+    diagnostics: dict[str, Any] = {
+        "entry": {
+            "title": entry.title,
+            "data": async_redact_data(dict(entry.data), TO_REDACT),
+            "options": async_redact_data(dict(entry.options), TO_REDACT),
+        },
+    }
+    if (data := domain_data.get(entry.entry_id)) is None:
+        return diagnostics
+
+    stats = data["stats"]
+    diagnostics.update(
+        {
+            "state": data["serialize"](),
+            "journal_events": len(data["journal"]),
+            "instrumentation": stats.as_dict() if stats is not None else None,
+            "storage": {
+                "pending": data["store"].pending,
+                "write_latency": data["store"].write_latency.as_dict(),
+            },
+        }
+    )
+    if (registry := domain_data.get("_registry")) is not None:
+        diagnostics["mailboxes"] = len(registry)
+    if (notifier := domain_data.get("_notifier")) is not None:
+        diagnostics["notifications"] = notifier.metrics
+    if (preloader := domain_data.get("_preload")) is not None:
+        diagnostics["preload"] = dict(preloader.stats)
+    return diagnostics
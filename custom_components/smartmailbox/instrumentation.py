@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+from bisect import bisect_left
+from typing import Any
+
+# Upper bucket bounds in milliseconds; anything slower lands in "inf"
+_BUCKETS_MS = (0.1, 0.5, 1, 5, 10, 50, 100, 500, 1000, 5000)
+
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram with count, mean and max.
+
+    Recording is a bisect and two additions, cheap enough for the event
+    hot path; nothing is kept per sample.
+    """
+
+    __slots__ = ("_buckets", "count", "total", "max")
+
+    def __init__(self) -> None:
+        self._buckets = [0] * (len(_BUCKETS_MS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, seconds: float) -> None:
+        ms = seconds * 1000
+        self._buckets[bisect_left(_BUCKETS_MS, ms)] += 1
+        self.count += 1
+        self.total += ms
+        if ms > self.max:
+            self.max = ms
+
+    @property
+    def mean(self) -> float | None:
+        return self.total / self.count if self.count else None
+
+    def as_dict(self) -> dict[str, Any]:
+        mean = self.mean
+        return {
+            "count": self.count,
+            "mean_ms": round(mean, 3) if mean is not None else None,
+            "max_ms": round(self.max, 3),
+            "buckets_ms": {
+                str(bound): hits
+                for bound, hits in zip((*_BUCKETS_MS, "inf"), self._buckets)
+            },
+        }
+
+
+class MailboxStats:
+    """Event counters and trigger handling latency of one mailbox.
+
+    Counters: `received` trigger events routed to the mailbox,
+    `ignored_unavailable` events from or to an unavailable/unknown state,
+    `debounced` events dropped by the debounce window and `accepted`
+    deliveries and collections.
+    """
+
+    def __init__(self) -> None:
+        self.counters = {
+            "received": 0,
+            "ignored_unavailable": 0,
+            "debounced": 0,
+            "accepted": 0,
+        }
+        self.event_latency = LatencyHistogram()
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "counters": dict(self.counters),
+            "event_latency": self.event_latency.as_dict(),
+        }
@@ -0,0 +1,209 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+from array import array
+from datetime import datetime
+from typing import Any
+
+from homeassistant.const import EVENT_HOMEASSISTANT_FINAL_WRITE
+from homeassistant.core import CALLBACK_TYPE, Event, HomeAssistant, callback
+from homeassistant.helpers.event import async_call_later
+from homeassistant.helpers.storage import STORAGE_DIR
+from homeassistant.util import dt as dt_util
+from homeassistant.util.file import WriteError, write_utf8_file
+
+from .const import (
+    JOURNAL_CAPACITY,
+    JOURNAL_EVENTS,
+    JOURNAL_KEY_PREFIX,
+    JOURNAL_SOURCES,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+_EVENT_INDEX = {name: idx for idx, name in enumerate(JOURNAL_EVENTS)}
+_SOURCE_INDEX = {name: idx for idx, name in enumerate(JOURNAL_SOURCES)}
+
+
+def _journal_path(hass: HomeAssistant, entry_id: str) -> str:
+    return hass.config.path(STORAGE_DIR, f"{JOURNAL_KEY_PREFIX}{entry_id}")
+
+
+def _read_lines(path: str) -> list[str]:
+    try:
+        with open(path, encoding="utf-8") as fp:
+            return fp.readlines()
+    except FileNotFoundError:
+        return []
+
+
+def _write_lines(path: str, lines: list[str], append: bool) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    if not append:
+        # A compaction rewrites the history: go through a temporary file so
+        # a crash mid-write leaves the old journal in place
+        write_utf8_file(path, "".join(lines))
+        return
+    with open(path, "a", encoding="utf-8") as fp:
+        fp.writelines(lines)
+
+
+def _remove_file(path: str) -> None:
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+class MailboxJournal:
+    """Append-only log of delivery and empty events for one mailbox.
+
+    The most recent `capacity` events are kept in parallel arrays used as a
+    ring buffer. New events are appended to a small text file (one
+    `timestamp,event,source` line each) after the flush window instead of
+    rewriting the whole history; the file is compacted down to the buffer
+    once it holds twice as many lines.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        entry_id: str,
+        delay: float,
+        capacity: int = JOURNAL_CAPACITY,
+    ) -> None:
+        self.hass = hass
+        self.delay = delay
+        self.capacity = capacity
+        self._path = _journal_path(hass, entry_id)
+
+        self._timestamps = array("d", bytes(8 * capacity))
+        self._events = array("B", bytes(capacity))
+        self._sources = array("B", bytes(capacity))
+        self._head = 0
+        self._size = 0
+
+        self._pending: list[str] = []
+        self._lines_on_disk = 0
+        self._unsub_delay: CALLBACK_TYPE | None = None
+        self._unsub_final_write: CALLBACK_TYPE | None = None
+        # An append must not land between a compaction's write and rename
+        self._lock = asyncio.Lock()
+
+    def __len__(self) -> int:
+        return self._size
+
+    async def async_load(self) -> None:
+        """Fill the ring buffer from the tail of the journal file."""
+        lines = await self.hass.async_add_executor_job(_read_lines, self._path)
+        self._lines_on_disk = len(lines)
+        for line in lines[-self.capacity :]:
+            try:
+                timestamp, event, source = line.split(",")
+                event_idx, source_idx = int(event), int(source)
+                if event_idx >= len(JOURNAL_EVENTS) or source_idx >= len(
+                    JOURNAL_SOURCES
+                ):
+                    raise ValueError
+                self._push(float(timestamp), event_idx, source_idx)
+            except ValueError:
+                _LOGGER.debug("Skipping malformed journal line: %r", line)
+
+    def _push(self, timestamp: float, event: int, source: int) -> None:
+        head = self._head
+        self._timestamps[head] = timestamp
+        self._events[head] = event
+        self._sources[head] = source
+        self._head = (head + 1) % self.capacity
+        if self._size < self.capacity:
+            self._size += 1
+
+    @callback
+    def async_append(self, event: str, source: str, when: datetime) -> None:
+        """Record an event and schedule it to be appended to disk."""
+        timestamp = when.timestamp()
+        event_idx = _EVENT_INDEX[event]
+        source_idx = _SOURCE_INDEX[source]
+        self._push(timestamp, event_idx, source_idx)
+        self._pending.append(f"{timestamp:.3f},{event_idx},{source_idx}\n")
+
+        if self._unsub_delay is None:
+            self._unsub_delay = async_call_later(
+                self.hass, self.delay, self._async_delayed_flush
+            )
+        if self._unsub_final_write is None:
+            self._unsub_final_write = self.hass.bus.async_listen_once(
+                EVENT_HOMEASSISTANT_FINAL_WRITE, self._async_final_write
+            )
+
+    def _indexes(self) -> list[int]:
+        """Ring buffer slots in insertion order, oldest first."""
+        start = (self._head - self._size) % self.capacity
+        return [(start + offset) % self.capacity for offset in range(self._size)]
+
+    def events(self) -> list[dict[str, Any]]:
+        """Return the buffered events, oldest first."""
+        result = []
+        for idx in self._indexes():
+            result.append(
+                {
+                    "time": dt_util.utc_from_timestamp(self._timestamps[idx]),
+                    "event": JOURNAL_EVENTS[self._events[idx]],
+                    "source": JOURNAL_SOURCES[self._sources[idx]],
+                }
+            )
+        return result
+
+    async def _async_delayed_flush(self, _now: datetime) -> None:
+        self._unsub_delay = None
+        await self.async_flush()
+
+    async def _async_final_write(self, _event: Event) -> None:
+        self._unsub_final_write = None
+        await self.async_flush()
+
+    async def async_flush(self) -> None:
+        """Append pending events to disk, compacting the file when needed."""
+        if self._unsub_delay is not None:
+            self._unsub_delay()
+            self._unsub_delay = None
+        if self._unsub_final_write is not None:
+            self._unsub_final_write()
+            self._unsub_final_write = None
+        async with self._lock:
+            if not self._pending:
+                return
+
+            pending, self._pending = self._pending, []
+            lines = pending
+            append = self._lines_on_disk + len(lines) <= 2 * self.capacity
+            if not append:
+                lines = [
+                    f"{self._timestamps[idx]:.3f},"
+                    f"{self._events[idx]},{self._sources[idx]}\n"
+                    for idx in self._indexes()
+                ]
+            try:
+                await self.hass.async_add_executor_job(
+                    _write_lines, self._path, lines, append
+                )
+            except (OSError, WriteError) as err:
+                _LOGGER.error("Error writing journal %s: %s", self._path, err)
+                # Keep the events for the next flush
+                self._pending = pending + self._pending
+                return
+            if append:
+                self._lines_on_disk += len(lines)
+            else:
+                self._lines_on_disk = len(lines)
+
+
+async def async_remove_journal(hass: HomeAssistant, entry_id: str) -> None:
+    """Delete the journal file of a removed mailbox."""
+    path = _journal_path(hass, entry_id)
+    try:
+        await hass.async_add_executor_job(_remove_file, path)
+    except OSError as err:
+        _LOGGER.error("Error removing journal %s: %s", path, err)
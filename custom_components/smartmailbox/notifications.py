@@ -0,0 +1,307 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from collections import deque
+from collections.abc import Iterable
+from functools import partial
+from time import monotonic, perf_counter
+
+import voluptuous as vol
+
+from homeassistant.const import EVENT_CORE_CONFIG_UPDATE
+from homeassistant.core import CALLBACK_TYPE, Event, HomeAssistant, callback
+from homeassistant.exceptions import ServiceNotFound
+from homeassistant.helpers.event import async_call_later
+from homeassistant.helpers.translation import async_get_translations
+
+from .const import (
+    DOMAIN,
+    NOTIFY_QUEUE_SIZE,
+    NOTIFY_CONCURRENCY,
+    NOTIFY_BURST,
+    NOTIFY_RATE,
+    NOTIFY_RETRIES,
+    NOTIFY_BACKOFF,
+    NOTIFY_TIMEOUT,
+    TRANSLATION_KEY_DEFAULT_NOTIFY,
+    TRANSLATION_KEY_DEFAULT_DOOR_NOTIFY,
+)
+from .instrumentation import LatencyHistogram
+from .profiler import async_get_profiler
+
+_LOGGER = logging.getLogger(__name__)
+
+Service = tuple[str, str]
+# service, message, enqueue time, whether a rate limit token is already taken
+_Item = tuple[Service, str, float, bool]
+
+
+def coalesce_messages(messages: list[str]) -> str:
+    """Merge the messages collected within one window into a single text."""
+    if len(messages) == 1:
+        return messages[0]
+    unique = list(dict.fromkeys(messages))
+    if len(unique) == 1:
+        return f"{len(messages)}× {unique[0]}"
+    return "\n".join(unique)
+
+
+class NotificationDispatcher:
+    """Domain-wide delivery of notify service calls.
+
+    Messages go through a bounded queue (the oldest message is dropped when
+    it is full) and are sent by at most `concurrency` workers. Each notify
+    service has a token bucket, so a burst of deliveries across many
+    mailboxes reaches a backend at a sustained `rate` after the first
+    `burst` calls. A message that has to wait for a token is parked on a
+    timer rather than in a worker, so a throttled service does not hold up
+    the others. Failed calls are retried with exponential backoff.
+
+    With a coalescing window, messages for the same service are collected
+    for that long and sent as one message.
+
+    Workers are background tasks: they can sleep through retries and
+    timeouts, and must not hold up `async_block_till_done` or
+    Home Assistant's shutdown.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        max_queue: int = NOTIFY_QUEUE_SIZE,
+        concurrency: int = NOTIFY_CONCURRENCY,
+        burst: int = NOTIFY_BURST,
+        rate: float = NOTIFY_RATE,
+        retries: int = NOTIFY_RETRIES,
+        backoff: float = NOTIFY_BACKOFF,
+        timeout: float = NOTIFY_TIMEOUT,
+    ) -> None:
+        self.hass = hass
+        self._max_queue = max_queue
+        self._concurrency = concurrency
+        self._burst = burst
+        self._rate = rate
+        self._retries = retries
+        self._backoff = backoff
+        self._timeout = timeout
+        self._queue: deque[_Item] = deque()
+        # Messages waiting for a token, oldest first
+        self._deferred: dict[asyncio.TimerHandle, _Item] = {}
+        self._workers = 0
+        self._tasks: set[asyncio.Task[None]] = set()
+        self._profiler = async_get_profiler(hass)
+        # service -> (tokens, last refill)
+        self._buckets: dict[Service, tuple[float, float]] = {}
+        # service -> (messages, timer) while a coalescing window is open
+        self._pending: dict[Service, tuple[list[str], CALLBACK_TYPE]] = {}
+        self.failures: dict[str, int] = {}
+        # Queueing, rate limiting and retries included; successful sends only
+        self.latency = LatencyHistogram()
+        self.counters = {
+            "sent": 0,
+            "failed": 0,
+            "retried": 0,
+            "dropped": 0,
+            "coalesced": 0,
+        }
+
+    @property
+    def metrics(self) -> dict[str, object]:
+        return {
+            **self.counters,
+            "queued": len(self._queue),
+            "deferred": len(self._deferred),
+            "workers": self._workers,
+            "failures": dict(self.failures),
+            "latency": self.latency.as_dict(),
+        }
+
+    @callback
+    def async_notify(
+        self, services: Iterable[Service], message: str, window: float = 0
+    ) -> None:
+        """Queue `message` for every service, coalescing within `window`."""
+        for service in services:
+            if window <= 0:
+                self._async_enqueue(service, message)
+            elif (pending := self._pending.get(service)) is not None:
+                pending[0].append(message)
+                self.counters["coalesced"] += 1
+            else:
+                self._pending[service] = (
+                    [message],
+                    async_call_later(
+                        self.hass,
+                        window,
+                        partial(self._profiler.run, self._async_release, service),
+                    ),
+                )
+
+    @callback
+    def async_shutdown(self) -> None:
+        """Drop open windows and queued messages and stop the workers."""
+        for _, cancel in self._pending.values():
+            cancel()
+        self._pending.clear()
+        self._queue.clear()
+        for handle in self._deferred:
+            handle.cancel()
+        self._deferred.clear()
+        for task in self._tasks:
+            task.cancel()
+
+    @callback
+    def _async_release(self, service: Service, _now=None) -> None:
+        if (pending := self._pending.pop(service, None)) is None:
+            return
+        messages, cancel = pending
+        cancel()
+        self._async_enqueue(service, coalesce_messages(messages))
+
+    @callback
+    def _async_enqueue(self, service: Service, message: str) -> None:
+        if len(self._queue) + len(self._deferred) >= self._max_queue:
+            if self._deferred:
+                handle = next(iter(self._deferred))
+                handle.cancel()
+                dropped_service = self._deferred.pop(handle)[0]
+            else:
+                dropped_service = self._queue.popleft()[0]
+            self.counters["dropped"] += 1
+            _LOGGER.warning(
+                "Notification queue full, dropping oldest message for %s.%s",
+                *dropped_service,
+            )
+        self._queue.append((service, message, perf_counter(), False))
+        self._async_start_worker()
+
+    @callback
+    def _async_defer(self, item: _Item, wait: float) -> None:
+        handle = self.hass.loop.call_later(wait, lambda: self._async_ready(handle))
+        self._deferred[handle] = item
+
+    @callback
+    def _async_ready(self, handle: asyncio.TimerHandle) -> None:
+        if (item := self._deferred.pop(handle, None)) is not None:
+            self._queue.append(item)
+            self._async_start_worker()
+
+    @callback
+    def _async_start_worker(self) -> None:
+        if self._workers < self._concurrency:
+            self._workers += 1
+            task = self.hass.async_create_background_task(
+                self._async_worker(), name=f"{DOMAIN} notification worker"
+            )
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    def _reserve(self, service: Service) -> float:
+        """Take a token for `service`; return how long to wait for it."""
+        now = monotonic()
+        tokens, updated = self._buckets.get(service, (self._burst, now))
+        tokens = min(self._burst, tokens + (now - updated) * self._rate) - 1
+        self._buckets[service] = (tokens, now)
+        return -tokens / self._rate if tokens < 0 else 0.0
+
+    async def _async_worker(self) -> None:
+        try:
+            while self._queue:
+                service, message, queued, reserved = self._queue.popleft()
+                if not reserved and (wait := self._reserve(service)) > 0:
+                    self._async_defer((service, message, queued, True), wait)
+                    continue
+                if await self._async_send(service, message):
+                    self.latency.record(perf_counter() - queued)
+        finally:
+            self._workers -= 1
+
+    async def _async_send(self, service: Service, message: str) -> bool:
+        domain, name = service
+        _LOGGER.debug("Sending notification via %s.%s", domain, name)
+        for attempt in range(self._retries + 1):
+            try:
+                async with asyncio.timeout(self._timeout):
+                    await self.hass.services.async_call(
+                        domain, name, {"message": message}, blocking=True
+                    )
+            except (ServiceNotFound, vol.Invalid) as err:
+                # Retrying will not make a missing service appear
+                _LOGGER.error(
+                    "Failed to send notification via %s.%s: %s", domain, name, err
+                )
+                break
+            except Exception as err:  # pylint: disable=broad-except
+                if attempt < self._retries:
+                    self.counters["retried"] += 1
+                    await asyncio.sleep(self._backoff * 2**attempt)
+                    continue
+                _LOGGER.error(
+                    "Failed to send notification via %s.%s after %d attempts: %s",
+                    domain,
+                    name,
+                    attempt + 1,
+                    err,
+                )
+            else:
+                self.counters["sent"] += 1
+                return True
+        self.counters["failed"] += 1
+        key = f"{domain}.{name}"
+        self.failures[key] = self.failures.get(key, 0) + 1
+        return False
+
+
+def async_get_dispatcher(hass: HomeAssistant) -> NotificationDispatcher:
+    if (dispatcher := hass.data[DOMAIN].get("_notifier")) is None:
+        dispatcher = hass.data[DOMAIN]["_notifier"] = NotificationDispatcher(hass)
+    return dispatcher
+
+
+class DefaultMessageCache:
+    """Localized default notification messages, resolved once per language.
+
+    Concurrent lookups during startup share one pending translation load.
+    The cache is dropped when the configured language changes.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        self.hass = hass
+        self._language = hass.config.language
+        self._loads: dict[str, asyncio.Task[tuple[str, str]]] = {}
+        hass.bus.async_listen(EVENT_CORE_CONFIG_UPDATE, self._async_config_updated)
+
+    async def async_get(self) -> tuple[str, str]:
+        """Return the (delivery, collection) default messages."""
+        language = self.hass.config.language
+        if (load := self._loads.get(language)) is None:
+            load = self._loads[language] = self.hass.async_create_task(
+                self._async_load(language)
+            )
+        try:
+            return await load
+        except Exception:
+            self._loads.pop(language, None)
+            raise
+
+    async def _async_load(self, language: str) -> tuple[str, str]:
+        translations = await async_get_translations(
+            self.hass, language, "options", {DOMAIN}
+        )
+        return (
+            translations.get(TRANSLATION_KEY_DEFAULT_NOTIFY, ""),
+            translations.get(TRANSLATION_KEY_DEFAULT_DOOR_NOTIFY, ""),
+        )
+
+    @callback
+    def _async_config_updated(self, _event: Event) -> None:
+        if self.hass.config.language != self._language:
+            self._language = self.hass.config.language
+            self._loads.clear()
+
+
+async def async_get_default_messages(hass: HomeAssistant) -> tuple[str, str]:
+    if (cache := hass.data[DOMAIN].get("_default_messages")) is None:
+        cache = hass.data[DOMAIN]["_default_messages"] = DefaultMessageCache(hass)
+    return await cache.async_get()
@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from collections.abc import Awaitable, Callable
+from time import monotonic
+from typing import Any, Generic, TypeVar
+
+from homeassistant.config_entries import ConfigEntry, ConfigEntryState
+from homeassistant.core import HomeAssistant, callback
+
+from .const import DOMAIN
+
+_LOGGER = logging.getLogger(__name__)
+
+_T = TypeVar("_T")
+
+Loader = Callable[[HomeAssistant, ConfigEntry], Awaitable[_T]]
+
+
+class StatePreloader(Generic[_T]):
+    """Load persisted state of every mailbox in one concurrent pass.
+
+    The first entry to set up starts loading all entries of the domain that
+    are waiting to be set up; every entry (including the first) then picks
+    its result from the cache instead of reading its files itself. Results
+    are handed out once, so a later reload always goes to disk. Entries that
+    were not part of the pass (new entries, failed loads) fall back to
+    loading on their own.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        self.hass = hass
+        self._task: asyncio.Task[None] | None = None
+        self._loaded: dict[str, _T] = {}
+        self._waiting: set[str] = set()
+        self._started = 0.0
+        self.stats: dict[str, Any] = {
+            "entries": 0,
+            "preload_seconds": None,
+            "setup_seconds": None,
+        }
+
+    async def async_get(self, entry: ConfigEntry, loader: Loader[_T]) -> _T:
+        if self._task is None:
+            self._task = self.hass.async_create_task(self._async_preload(loader))
+        await self._task
+        if entry.entry_id in self._loaded:
+            return self._loaded.pop(entry.entry_id)
+        return await loader(self.hass, entry)
+
+    async def _async_preload(self, loader: Loader[_T]) -> None:
+        self._started = monotonic()
+        entries = [
+            entry
+            for entry in self.hass.config_entries.async_entries(DOMAIN)
+            if entry.disabled_by is None
+            and entry.state
+            in (ConfigEntryState.NOT_LOADED, ConfigEntryState.SETUP_IN_PROGRESS)
+        ]
+        results = await asyncio.gather(
+            *(loader(self.hass, entry) for entry in entries), return_exceptions=True
+        )
+        for entry, result in zip(entries, results):
+            if isinstance(result, Exception):
+                _LOGGER.warning(
+                    "Preloading state of %s failed: %s", entry.title, result
+                )
+                continue
+            self._loaded[entry.entry_id] = result
+            self._waiting.add(entry.entry_id)
+
+        self.stats["entries"] = len(self._loaded)
+        self.stats["preload_seconds"] = monotonic() - self._started
+
+    @callback
+    def async_setup_done(self, entry_id: str) -> None:
+        """Record that a preloaded entry finished setting up."""
+        if entry_id not in self._waiting:
+            return
+        self._waiting.discard(entry_id)
+        if not self._waiting:
+            self.stats["setup_seconds"] = monotonic() - self._started
+            _LOGGER.debug(
+                "Set up %d mailboxes in %.3fs (state preload %.3fs)",
+                self.stats["entries"],
+                self.stats["setup_seconds"],
+                self.stats["preload_seconds"],
+            )
+
+
+def async_get_preloader(hass: HomeAssistant) -> StatePreloader:
+    if (preloader := hass.data[DOMAIN].get("_preload")) is None:
+        preloader = hass.data[DOMAIN]["_preload"] = StatePreloader(hass)
+    return preloader
@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+import asyncio
+import cProfile
+import logging
+import pstats
+from collections.abc import Callable
+from typing import Any, TypeVar
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.util import dt as dt_util
+
+from .const import DOMAIN
+
+_LOGGER = logging.getLogger(__name__)
+
+_T = TypeVar("_T")
+
+
+class DomainProfiler:
+    """Profile the integration's entry points, not the whole event loop.
+
+    While a profile runs, the state-change router, event triggers, storage
+    collection and notification timers call into the integration through
+    `run`, which enables the profiler for the duration of that call only.
+    Other integrations' callbacks run unprofiled, so the file holds the
+    mailboxes' call trees, including the Home Assistant code they called,
+    and the rest of the loop is not slowed down. Awaited work such as notify
+    service calls and executor writes is not included.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        self.hass = hass
+        self.profile: cProfile.Profile | None = None
+        self._depth = 0
+
+    @property
+    def running(self) -> bool:
+        return self.profile is not None
+
+    @callback
+    def run(self, func: Callable[..., _T], *args: Any) -> _T:
+        """Call `func`, profiled if a profile is running."""
+        if (profile := self.profile) is None or self._depth:
+            # Nested entry points are already inside the outer profiled call
+            return func(*args)
+        try:
+            profile.enable()
+        except ValueError as err:
+            # Another profiler started after the session did (Python 3.12+
+            # allows only one): end the session rather than lose the call
+            _LOGGER.warning("Stopping smartmailbox profile: %s", err)
+            self.profile = None
+            return func(*args)
+        self._depth += 1
+        try:
+            return func(*args)
+        finally:
+            profile.disable()
+            self._depth -= 1
+
+    async def async_profile(self, seconds: float) -> dict[str, object]:
+        if self.profile is not None:
+            raise HomeAssistantError("A smartmailbox profile is already running")
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError as err:
+            # Another profiler (e.g. the profiler integration) is active
+            raise HomeAssistantError(f"Cannot start profiling: {err}") from err
+        profile.disable()
+        self.profile = profile
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            self.profile = None
+
+        stats = pstats.Stats(profile)
+        path = self.hass.config.path(
+            f"{DOMAIN}_profile.{dt_util.utcnow().strftime('%Y%m%d_%H%M%S')}.prof"
+        )
+        await self.hass.async_add_executor_job(stats.dump_stats, path)
+        _LOGGER.info(
+            "Wrote %d functions profiled over %ss to %s",
+            len(stats.stats),
+            seconds,
+            path,
+        )
+        return {"path": path, "functions": len(stats.stats)}
+
+
+def async_get_profiler(hass: HomeAssistant) -> DomainProfiler:
+    # Entry points look the profiler up when they are built, which for the
+    # domain-wide helpers can happen before the first entry is set up
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    if (profiler := domain_data.get("_profiler")) is None:
+        profiler = domain_data["_profiler"] = DomainProfiler(hass)
+    return profiler
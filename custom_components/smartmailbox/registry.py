@@ -0,0 +1,151 @@
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Iterable
+from datetime import datetime
+from typing import Any
+
+from homeassistant.const import EVENT_HOMEASSISTANT_FINAL_WRITE
+from homeassistant.core import CALLBACK_TYPE, Event, HomeAssistant, callback
+from homeassistant.helpers import device_registry as dr
+from homeassistant.helpers import entity_registry as er
+from homeassistant.helpers.event import async_call_later
+
+from .const import DOMAIN
+
+
+class MailboxRegistry:
+    """Loaded mailboxes of the domain, indexed for service targeting.
+
+    Entries are looked up directly by entry_id, or through the device and
+    entity registries by device_id, area_id or entity_id. Saves requested through
+    `async_schedule_save` share one flush timer, so a service call that
+    touches many mailboxes results in a single flush pass instead of one
+    timer per entry.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        self.hass = hass
+        self._entries: dict[str, dict[str, Any]] = {}
+        self._dirty: set[str] = set()
+        self._unsub_flush: CALLBACK_TYPE | None = None
+        self._unsub_final_write: CALLBACK_TYPE | None = None
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, entry_id: object) -> bool:
+        return entry_id in self._entries
+
+    def get(self, entry_id: str) -> dict[str, Any] | None:
+        return self._entries.get(entry_id)
+
+    @callback
+    def async_add(self, entry_id: str, data: dict[str, Any]) -> None:
+        self._entries[entry_id] = data
+
+    @callback
+    def async_remove(self, entry_id: str) -> dict[str, Any] | None:
+        self._dirty.discard(entry_id)
+        if not self._dirty:
+            self._async_cancel_flush()
+        return self._entries.pop(entry_id, None)
+
+    @callback
+    def async_resolve(
+        self,
+        entry_ids: Iterable[str] = (),
+        device_ids: Iterable[str] = (),
+        area_ids: Iterable[str] = (),
+        entity_ids: Iterable[str] = (),
+    ) -> dict[str, dict[str, Any]]:
+        """Return the loaded entries matching any target; all if none given."""
+        entry_ids, device_ids, area_ids, entity_ids = (
+            list(entry_ids),
+            list(device_ids),
+            list(area_ids),
+            list(entity_ids),
+        )
+        if not (entry_ids or device_ids or area_ids or entity_ids):
+            return dict(self._entries)
+
+        found = {
+            entry_id: self._entries[entry_id]
+            for entry_id in entry_ids
+            if entry_id in self._entries
+        }
+        if device_ids or area_ids:
+            dev_reg = dr.async_get(self.hass)
+            devices = [dev_reg.async_get(device_id) for device_id in device_ids]
+            for area_id in area_ids:
+                devices.extend(dr.async_entries_for_area(dev_reg, area_id))
+            for device in devices:
+                if device is None:
+                    continue
+                for entry_id in device.config_entries:
+                    if entry_id in self._entries:
+                        found[entry_id] = self._entries[entry_id]
+        if entity_ids:
+            ent_reg = er.async_get(self.hass)
+            for entity_id in entity_ids:
+                entity = ent_reg.async_get(entity_id)
+                if entity is None or entity.config_entry_id not in self._entries:
+                    continue
+                found[entity.config_entry_id] = self._entries[entity.config_entry_id]
+        return found
+
+    @callback
+    def async_schedule_save(self, entry_ids: Iterable[str]) -> None:
+        """Mark entries dirty and flush them together after the save delay."""
+        delay = None
+        for entry_id in entry_ids:
+            data = self._entries[entry_id]
+            store = data["store"]
+            store.async_mark_dirty(data["serialize"])
+            self._dirty.add(entry_id)
+            delay = store.delay if delay is None else min(delay, store.delay)
+
+        if delay is None or self._unsub_flush is not None:
+            return
+        self._unsub_flush = async_call_later(
+            self.hass, delay, self._async_delayed_flush
+        )
+        if self._unsub_final_write is None:
+            self._unsub_final_write = self.hass.bus.async_listen_once(
+                EVENT_HOMEASSISTANT_FINAL_WRITE, self._async_final_write
+            )
+
+    @callback
+    def _async_cancel_flush(self) -> None:
+        if self._unsub_flush is not None:
+            self._unsub_flush()
+            self._unsub_flush = None
+        if self._unsub_final_write is not None:
+            self._unsub_final_write()
+            self._unsub_final_write = None
+
+    async def _async_delayed_flush(self, _now: datetime) -> None:
+        self._unsub_flush = None
+        await self.async_flush()
+
+    async def _async_final_write(self, _event: Event) -> None:
+        self._unsub_final_write = None
+        await self.async_flush()
+
+    async def async_flush(self) -> None:
+        """Write every dirty entry now."""
+        self._async_cancel_flush()
+        dirty, self._dirty = self._dirty, set()
+        await asyncio.gather(
+            *(
+                self._entries[entry_id]["store"].async_flush()
+                for entry_id in dirty
+                if entry_id in self._entries
+            )
+        )
+
+
+def async_get_registry(hass: HomeAssistant) -> MailboxRegistry:
+    if (registry := hass.data[DOMAIN].get("_registry")) is None:
+        registry = hass.data[DOMAIN]["_registry"] = MailboxRegistry(hass)
+    return registry
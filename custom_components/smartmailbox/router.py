@@ -0,0 +1,119 @@
+from __future__ import annotations
+
+import logging
+from collections.abc import Callable, Mapping
+from dataclasses import dataclass
+
+from homeassistant.core import CALLBACK_TYPE, Event, HomeAssistant, callback
+from homeassistant.helpers.event import async_track_state_change_event
+
+from .const import DOMAIN
+from .profiler import async_get_profiler
+
+_LOGGER = logging.getLogger(__name__)
+
+Handler = Callable[[Event], None]
+
+
+@dataclass(frozen=True, slots=True)
+class Route:
+    """One mailbox watching an entity in a given role."""
+
+    entry_id: str
+    role: str
+    handler: Handler
+
+
+class StateChangeRouter:
+    """Single domain-wide fan-out of source sensor state changes.
+
+    Keeps an index from entity_id to the mailboxes watching it and holds
+    exactly one state tracker per distinct entity, however many mailboxes
+    share it. Entries are added, replaced or removed incrementally; only
+    trackers for entities that gain their first or lose their last route
+    are touched.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        self.hass = hass
+        self._routes: dict[str, tuple[Route, ...]] = {}
+        self._entries: dict[str, tuple[str, ...]] = {}
+        self._unsubs: dict[str, CALLBACK_TYPE] = {}
+        self._profiler = async_get_profiler(hass)
+
+    @callback
+    def async_set_entry(
+        self, entry_id: str, roles: Mapping[str, str], handler: Handler
+    ) -> None:
+        """Route state changes of `roles` (entity_id -> role) to `handler`.
+
+        Replacing an entry keeps the trackers of entities it still watches.
+        """
+        dropped = self._async_drop_routes(entry_id)
+        for entity_id, role in roles.items():
+            route = Route(entry_id, role, handler)
+            self._routes[entity_id] = self._routes.get(entity_id, ()) + (route,)
+            if entity_id not in self._unsubs:
+                self._unsubs[entity_id] = async_track_state_change_event(
+                    self.hass, entity_id, self._async_dispatch
+                )
+        self._entries[entry_id] = tuple(roles)
+        self._async_untrack(dropped)
+
+    @callback
+    def async_remove_entry(self, entry_id: str) -> None:
+        self._async_untrack(self._async_drop_routes(entry_id))
+
+    @callback
+    def _async_drop_routes(self, entry_id: str) -> tuple[str, ...]:
+        entity_ids = self._entries.pop(entry_id, ())
+        for entity_id in entity_ids:
+            routes = tuple(
+                route
+                for route in self._routes.get(entity_id, ())
+                if route.entry_id != entry_id
+            )
+            if routes:
+                self._routes[entity_id] = routes
+            else:
+                self._routes.pop(entity_id, None)
+        return entity_ids
+
+    @callback
+    def _async_untrack(self, entity_ids: tuple[str, ...]) -> None:
+        for entity_id in entity_ids:
+            if entity_id in self._routes:
+                continue
+            if (unsub := self._unsubs.pop(entity_id, None)) is not None:
+                unsub()
+
+    def routes(self, entity_id: str) -> tuple[Route, ...]:
+        return self._routes.get(entity_id, ())
+
+    @property
+    def entity_ids(self) -> set[str]:
+        return set(self._routes)
+
+    @callback
+    def _async_dispatch(self, event: Event) -> None:
+        if self._profiler.running:
+            self._profiler.run(self._async_route, event)
+        else:
+            self._async_route(event)
+
+    @callback
+    def _async_route(self, event: Event) -> None:
+        for route in self._routes.get(event.data["entity_id"], ()):
+            # A failing mailbox must not starve others sharing the sensor
+            try:
+                route.handler(event)
+            except Exception:  # pylint: disable=broad-except
+                _LOGGER.exception(
+                    "Error handling %s for entry %s", route.role, route.entry_id
+                )
+
+
+def async_get_router(hass: HomeAssistant) -> StateChangeRouter:
+    if (router := hass.data[DOMAIN].get("_router")) is None:
+        router = hass.data[DOMAIN]["_router"] = StateChangeRouter(hass)
+    return router
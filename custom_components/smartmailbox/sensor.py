@@ -1,21 +1,28 @@
 from __future__ import annotations
 
-from datetime import timedelta
-from homeassistant.components.sensor import SensorEntity
+import heapq
+import math
+from datetime import datetime, timedelta
+from itertools import count
+from homeassistant.components.sensor import (
+    SensorDeviceClass,
+    SensorEntity,
+    SensorStateClass,
+)
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant, callback
-from homeassistant.helpers.dispatcher import async_dispatcher_connect
-from homeassistant.helpers.event import async_track_time_interval
+from homeassistant.const import EntityCategory, UnitOfTime
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.event import async_track_point_in_utc_time
 from homeassistant.util import dt as dt_util
 
 from .const import (
     DOMAIN,
-    CONF_NAME,
     CONF_ENABLE_COUNTER,
     CONF_ENABLE_AGE,
     CONF_AGE_UNIT,
-    SIGNAL_PREFIX,
 )
+from .coordinator import MailboxCoordinatorEntity
+from .instrumentation import MailboxStats
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry, async_add_entities):
     state_ref = hass.data[DOMAIN][entry.entry_id]["state"]
@@ -31,40 +38,110 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry, async_add_e
     if entry.options.get(CONF_ENABLE_AGE, entry.data.get(CONF_ENABLE_AGE, True)):
         entities.append(MailAgeSensor(hass, entry, state_ref, f"{entry.entry_id}_mailbox_mail_age"))
 
+    if (stats := hass.data[DOMAIN][entry.entry_id]["stats"]) is not None:
+        entities.append(EventCountSensor(hass, entry, stats, f"{entry.entry_id}_mailbox_events"))
+        entities.append(EventLatencySensor(hass, entry, stats, f"{entry.entry_id}_mailbox_event_latency"))
+
     async_add_entities(entities)
 
-class _MailboxBaseSensor(SensorEntity):
-    def __init__(self, hass: HomeAssistant, entry: ConfigEntry, state_ref, unique_id: str):
-        self.hass = hass
-        self.entry = entry
-        self._state_ref = state_ref
-        self._attr_unique_id = unique_id
+_AGE_UNIT_SECONDS = {"hours": 3600, "days": 86400}
 
-        device_name = entry.data.get(CONF_NAME, "Smart Mailbox")
-        self._attr_device_info = {
-            "identifiers": {(DOMAIN, entry.entry_id)},
-            "name": device_name,
-            "manufacturer": "Danny Smolinsky",
-            "model": "Smart Mailbox",
-        }
+def _next_age_change(last_delivery: datetime, now: datetime, unit_seconds: int) -> datetime:
+    """Return when round(age / unit, 2) will next change.
 
-        self._unsub = None
+    The rounded value steps every 1/100 unit, halfway between two values, so
+    the next change is at the next (k + 0.5) * step boundary after `now`.
+    """
+    step = unit_seconds / 100
+    elapsed = (now - last_delivery).total_seconds()
+    boundary = (math.floor(elapsed / step + 0.5) + 0.5) * step
+    if boundary <= elapsed:
+        boundary += step
+    # A millisecond past the boundary keeps float error from landing just short
+    return last_delivery + timedelta(seconds=boundary + 0.001)
 
-    async def async_added_to_hass(self):
-        self._unsub = async_dispatcher_connect(
-            self.hass,
-            f"{SIGNAL_PREFIX}{self.entry.entry_id}",
-            self._handle_update,
-        )
+class MailAgeScheduler:
+    """One domain-wide timer that refreshes mail age sensors when due.
 
-    async def async_will_remove_from_hass(self):
+    Each sensor with mail reports when its rounded age will next change; the
+    scheduler keeps those deadlines in a heap and arms a single
+    point-in-time callback for the earliest one. Empty mailboxes have no
+    deadline and cost nothing.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        self.hass = hass
+        self._due: dict[MailAgeSensor, datetime] = {}
+        self._heap: list[tuple[datetime, int, MailAgeSensor]] = []
+        self._seq = count()
+        self._next: datetime | None = None
+        self._unsub: CALLBACK_TYPE | None = None
+
+    @callback
+    def async_schedule(self, sensor: MailAgeSensor, when: datetime | None) -> None:
+        """Set (or clear, with None) the next refresh time for a sensor."""
+        if when is None:
+            if self._due.pop(sensor, None) is None:
+                return
+        else:
+            if self._due.get(sensor) == when:
+                return
+            self._due[sensor] = when
+            heapq.heappush(self._heap, (when, next(self._seq), sensor))
+        self._async_rearm()
+
+    @callback
+    def _async_rearm(self) -> None:
+        heap = self._heap
+        # Drop superseded deadlines (lazy deletion)
+        while heap and self._due.get(heap[0][2]) != heap[0][0]:
+            heapq.heappop(heap)
+
+        when = heap[0][0] if heap else None
+        if when == self._next:
+            return
         if self._unsub:
             self._unsub()
             self._unsub = None
+        self._next = when
+        if when is not None:
+            self._unsub = async_track_point_in_utc_time(
+                self.hass, self._async_fire, when
+            )
 
     @callback
-    def _handle_update(self):
-        self.schedule_update_ha_state()
+    def _async_fire(self, now: datetime) -> None:
+        self._unsub = None
+        self._next = None
+        heap = self._heap
+        due = []
+        while heap and heap[0][0] <= now:
+            when, _, sensor = heapq.heappop(heap)
+            if self._due.get(sensor) == when:
+                del self._due[sensor]
+                due.append(sensor)
+        for sensor in due:
+            sensor.async_refresh_age()
+        self._async_rearm()
+
+@callback
+def _async_get_age_scheduler(hass: HomeAssistant) -> MailAgeScheduler:
+    if (scheduler := hass.data[DOMAIN].get("_age_scheduler")) is None:
+        scheduler = hass.data[DOMAIN]["_age_scheduler"] = MailAgeScheduler(hass)
+    return scheduler
+
+class _MailboxBaseSensor(MailboxCoordinatorEntity, SensorEntity):
+    def __init__(self, hass: HomeAssistant, entry: ConfigEntry, state_ref, unique_id: str):
+        super().__init__(hass.data[DOMAIN][entry.entry_id]["coordinator"])
+        self.hass = hass
+        self.entry = entry
+        self._state_ref = state_ref
+        self._attr_unique_id = unique_id
+
+        self._attr_device_info = hass.data[DOMAIN][entry.entry_id]["device_info"]
+
+    def _snapshot(self):
+        return self.native_value
 
 class LastDeliverySensor(_MailboxBaseSensor):
     _attr_has_entity_name = True
@@ -102,39 +179,104 @@ class MailAgeSensor(_MailboxBaseSensor):
 
     def __init__(self, hass: HomeAssistant, entry: ConfigEntry, state_ref, unique_id: str):
         super().__init__(hass, entry, state_ref, unique_id)
-        self._attr_native_unit_of_measurement = "h"
-        self._unsub_time = None
+        unit = entry.options.get(CONF_AGE_UNIT, entry.data.get(CONF_AGE_UNIT, "hours"))
+        self._unit_seconds = _AGE_UNIT_SECONDS.get(unit, 3600)
+        self._attr_native_unit_of_measurement = "d" if unit == "days" else "h"
+        self._scheduler: MailAgeScheduler | None = None
 
     async def async_added_to_hass(self):
         await super().async_added_to_hass()
-        self._unsub_time = async_track_time_interval(
-            self.hass,
-            self._handle_time_update,
-            timedelta(minutes=1),
-        )
+        self._scheduler = _async_get_age_scheduler(self.hass)
+        self._async_schedule_next()
 
     async def async_will_remove_from_hass(self):
-        if self._unsub_time:
-            self._unsub_time()
-            self._unsub_time = None
+        if self._scheduler:
+            self._scheduler.async_schedule(self, None)
+            self._scheduler = None
         await super().async_will_remove_from_hass()
 
     @callback
-    def _handle_time_update(self, now):
-        self.schedule_update_ha_state()
+    def _handle_coordinator_update(self):
+        self.async_refresh_age()
+
+    @callback
+    def async_refresh_age(self) -> None:
+        """Write the state only if the rounded age changed, then reschedule."""
+        super()._handle_coordinator_update()
+        self._async_schedule_next()
+
+    @callback
+    def _async_schedule_next(self) -> None:
+        if self._scheduler is None:
+            return
+        last_delivery = self._state_ref.last_delivery
+        if not self._state_ref.post_present or not last_delivery:
+            self._scheduler.async_schedule(self, None)
+            return
+        self._scheduler.async_schedule(
+            self,
+            _next_age_change(last_delivery, dt_util.utcnow(), self._unit_seconds),
+        )
 
     @property
     def native_value(self):
         if not self._state_ref.post_present or not self._state_ref.last_delivery:
             return None
 
-        unit = self.entry.options.get(CONF_AGE_UNIT, self.entry.data.get(CONF_AGE_UNIT, "hours"))
         delta = dt_util.utcnow() - self._state_ref.last_delivery
-        seconds = delta.total_seconds()
+        return round(delta.total_seconds() / self._unit_seconds, 2)
 
-        if unit == "days":
-            self._attr_native_unit_of_measurement = "d"
-            return round(seconds / 86400, 2)
+class _MailboxStatsSensor(SensorEntity):
+    """Diagnostic sensor showing a mailbox's instrumentation data.
+
+    The numbers move with every trigger event, so these sensors are polled
+    at the regular scan interval instead of writing from the hot path.
+    """
+
+    _attr_has_entity_name = True
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+
+    def __init__(self, hass: HomeAssistant, entry: ConfigEntry, stats: MailboxStats, unique_id: str):
+        self.hass = hass
+        self.entry = entry
+        self._stats = stats
+        self._attr_unique_id = unique_id
 
-        self._attr_native_unit_of_measurement = "h"
-        return round(seconds / 3600, 2)
+        self._attr_device_info = hass.data[DOMAIN][entry.entry_id]["device_info"]
+
+class EventCountSensor(_MailboxStatsSensor):
+    _attr_translation_key = "events"
+    _attr_icon = "mdi:pulse"
+    _attr_state_class = SensorStateClass.TOTAL_INCREASING
+    _unrecorded_attributes = frozenset({"ignored_unavailable", "debounced", "accepted"})
+
+    @property
+    def native_value(self):
+        return self._stats.counters["received"]
+
+    @property
+    def extra_state_attributes(self):
+        counters = self._stats.counters
+        return {
+            "ignored_unavailable": counters["ignored_unavailable"],
+            "debounced": counters["debounced"],
+            "accepted": counters["accepted"],
+        }
+
+class EventLatencySensor(_MailboxStatsSensor):
+    _attr_translation_key = "event_latency"
+    _attr_icon = "mdi:timer-outline"
+    _attr_device_class = SensorDeviceClass.DURATION
+    _attr_state_class = SensorStateClass.MEASUREMENT
+    _attr_native_unit_of_measurement = UnitOfTime.MILLISECONDS
+    _attr_suggested_display_precision = 3
+    _unrecorded_attributes = frozenset({"max_ms", "count"})
+
+    @property
+    def native_value(self):
+        return self._stats.event_latency.mean
+
+    @property
+    def extra_state_attributes(self):
+        latency = self._stats.event_latency
+        return {"max_ms": round(latency.max, 3), "count": latency.count}
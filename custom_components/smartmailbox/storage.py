@@ -0,0 +1,309 @@
+from __future__ import annotations
+
+import asyncio
+from time import perf_counter
+from collections.abc import Callable
+from datetime import datetime
+from typing import Any
+
+from homeassistant.const import EVENT_HOMEASSISTANT_FINAL_WRITE
+from homeassistant.core import CALLBACK_TYPE, Event, HomeAssistant, callback
+from homeassistant.helpers.event import async_call_at
+from homeassistant.helpers.storage import Store
+from homeassistant.util import dt as dt_util
+
+from .const import DOMAIN, STORAGE_KEY_PREFIX, STORAGE_KEY_SHARED, STORAGE_VERSION
+from .instrumentation import LatencyHistogram
+from .profiler import async_get_profiler
+
+DataFunc = Callable[[], dict[str, Any]]
+
+
+_TIMESTAMP_FIELDS = ("last_delivery", "last_empty", "last_flap_trigger")
+
+
+def _iso_to_dt(value: str | None) -> datetime | None:
+    if not value:
+        return None
+    try:
+        # parse_datetime handles timezone-aware and naive strings
+        dt = dt_util.parse_datetime(value) or datetime.fromisoformat(value)
+        if dt and dt.tzinfo is None:
+            return dt.replace(tzinfo=dt_util.UTC)
+        return dt
+    except Exception:
+        return None
+
+
+def _iso_fields_to_epoch(data: dict[str, Any]) -> dict[str, Any]:
+    data = dict(data)
+    for field in _TIMESTAMP_FIELDS:
+        dt = _iso_to_dt(data.get(field))
+        data[field] = dt.timestamp() if dt else None
+    return data
+
+
+class _StateStorage(Store[dict[str, Any]]):
+    """Store that upgrades files written by older versions and times writes."""
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self.write_latency = LatencyHistogram()
+
+    async def _async_write_data(self, path: str, data: dict) -> None:
+        start = perf_counter()
+        try:
+            await super()._async_write_data(path, data)
+        finally:
+            self.write_latency.record(perf_counter() - start)
+
+    async def _async_migrate_func(
+        self, old_major_version: int, old_minor_version: int, old_data: dict
+    ) -> dict[str, Any]:
+        # v1 -> v2 only introduced the shared file; per-entry data is unchanged
+        if old_major_version < 3:
+            if self.key == STORAGE_KEY_SHARED:
+                old_data = {
+                    "entries": {
+                        entry_id: _iso_fields_to_epoch(data)
+                        for entry_id, data in old_data.get("entries", {}).items()
+                    }
+                }
+            else:
+                old_data = _iso_fields_to_epoch(old_data)
+        return old_data
+
+
+def _entry_storage(hass: HomeAssistant, entry_id: str) -> _StateStorage:
+    return _StateStorage(hass, STORAGE_VERSION, f"{STORAGE_KEY_PREFIX}{entry_id}")
+
+
+class MailboxStore:
+    """Per-entry Store that coalesces bursts of mutations into one write.
+
+    Every call to `async_schedule_save` (re)arms a single delayed write, so a
+    bouncing flap followed by a counter reset results in one JSON rewrite
+    once the flush window has passed. Pending data is written immediately by
+    `async_flush` (used on unload), and the underlying Store writes anything
+    still pending when Home Assistant reaches its final-write stage.
+    """
+
+    def __init__(self, hass: HomeAssistant, entry_id: str, delay: float) -> None:
+        self._store = _entry_storage(hass, entry_id)
+        self.delay = delay
+        self._data_func: DataFunc | None = None
+        self._profiler = async_get_profiler(hass)
+
+    async def async_load(self) -> dict[str, Any] | None:
+        return await self._store.async_load()
+
+    @callback
+    def async_schedule_save(self, data_func: DataFunc) -> None:
+        """Schedule a coalesced write; data is collected when it is flushed."""
+        self._data_func = data_func
+        self._store.async_delay_save(self._collect, self.delay)
+
+    @callback
+    def async_mark_dirty(self, data_func: DataFunc) -> None:
+        """Record pending data without arming a timer; the caller flushes."""
+        self._data_func = data_func
+
+    @property
+    def pending(self) -> bool:
+        return self._data_func is not None
+
+    @property
+    def write_latency(self) -> LatencyHistogram:
+        return self._store.write_latency
+
+    @callback
+    def _collect(self) -> dict[str, Any]:
+        # Collecting the mailbox data is the event loop side of a write
+        return self._profiler.run(self._collect_data)
+
+    @callback
+    def _collect_data(self) -> dict[str, Any]:
+        data_func, self._data_func = self._data_func, None
+        return data_func() if data_func else {}
+
+    async def async_flush(self) -> None:
+        """Write pending data now instead of waiting for the flush window."""
+        if self._data_func is not None:
+            await self._store.async_save(self._collect())
+
+
+class SharedStateStore:
+    """One storage file holding the state of many mailboxes.
+
+    Entries mark themselves dirty with a data callback; a single delayed
+    write collects every dirty entry and rewrites the file once, so a fleet
+    of mailboxes costs one file and one fsync per flush window instead of
+    one per mailbox. Each entry keeps its own window: the write is timed for
+    the earliest pending deadline, so a mailbox with a long window never
+    postpones the write of one with a short window. Entries without data in
+    the shared file are migrated from their per-entry file on first load,
+    and that file is removed once the shared file has been written.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        self.hass = hass
+        self._store = _StateStorage(hass, STORAGE_VERSION, STORAGE_KEY_SHARED)
+        self._profiler = async_get_profiler(hass)
+        self._entries: dict[str, dict[str, Any]] = {}
+        self._dirty: dict[str, DataFunc] = {}
+        # entry_id -> loop time its pending change is due on disk
+        self._deadlines: dict[str, float] = {}
+        self._write_at = 0.0
+        self._unsub_write: CALLBACK_TYPE | None = None
+        self._unsub_final_write: CALLBACK_TYPE | None = None
+        self._load_task: asyncio.Task[None] | None = None
+        self._migrated: list[Store] = []
+        self._lock = asyncio.Lock()
+
+    async def _async_ensure_loaded(self) -> None:
+        if self._load_task is None:
+            self._load_task = self.hass.async_create_task(self._async_load())
+        await self._load_task
+
+    async def _async_load(self) -> None:
+        data = await self._store.async_load() or {}
+        self._entries = dict(data.get("entries", {}))
+
+    async def async_load_entry(self, entry_id: str) -> dict[str, Any] | None:
+        await self._async_ensure_loaded()
+        if entry_id in self._entries:
+            return self._entries[entry_id]
+
+        legacy = _entry_storage(self.hass, entry_id)
+        if (data := await legacy.async_load()) is None:
+            return None
+        self._entries[entry_id] = data
+        self._migrated.append(legacy)
+        await self._async_commit_migrations()
+        return data
+
+    async def async_get_entry(self, entry_id: str) -> dict[str, Any] | None:
+        """Return stored data without migrating from a per-entry file."""
+        await self._async_ensure_loaded()
+        return self._entries.get(entry_id)
+
+    async def _async_commit_migrations(self) -> None:
+        # Entries migrating concurrently at startup share one write
+        async with self._lock:
+            if not self._migrated:
+                return
+            migrated, self._migrated = self._migrated, []
+            await self._store.async_save(self._collect())
+            await asyncio.gather(*(store.async_remove() for store in migrated))
+
+    @callback
+    def async_mark_dirty(self, entry_id: str, data_func: DataFunc) -> None:
+        self._dirty[entry_id] = data_func
+
+    @callback
+    def async_schedule_save(
+        self, entry_id: str, data_func: DataFunc, delay: float
+    ) -> None:
+        self._dirty[entry_id] = data_func
+        self._async_set_deadline(entry_id, self.hass.loop.time() + delay)
+
+    def pending(self, entry_id: str) -> bool:
+        return entry_id in self._dirty
+
+    @property
+    def write_latency(self) -> LatencyHistogram:
+        return self._store.write_latency
+
+    @callback
+    def async_remove_entry(self, entry_id: str) -> None:
+        self._dirty.pop(entry_id, None)
+        if self._entries.pop(entry_id, None) is not None:
+            self._async_set_deadline(entry_id, self.hass.loop.time())
+
+    @callback
+    def _async_set_deadline(self, entry_id: str, deadline: float) -> None:
+        # Re-arms the entry's own window; the timer only ever moves earlier
+        # here and catches up with deadlines that moved later when it fires
+        self._deadlines[entry_id] = deadline
+        if self._unsub_write is not None:
+            if deadline >= self._write_at:
+                return
+            self._unsub_write()
+        self._write_at = deadline
+        self._unsub_write = async_call_at(self.hass, self._async_write_due, deadline)
+        if self._unsub_final_write is None:
+            self._unsub_final_write = self.hass.bus.async_listen_once(
+                EVENT_HOMEASSISTANT_FINAL_WRITE, self._async_final_write
+            )
+
+    @callback
+    def _async_write_due(self, _now: datetime) -> None:
+        self._unsub_write = None
+        deadlines = self._deadlines
+        entry_id = min(deadlines, key=deadlines.__getitem__, default=None)
+        if entry_id is not None and deadlines[entry_id] > self._write_at:
+            # The entry that set the timer has re-armed its window since
+            self._async_set_deadline(entry_id, deadlines[entry_id])
+            return
+        self.hass.async_create_task(self.async_flush())
+
+    async def _async_final_write(self, _event: Event) -> None:
+        self._unsub_final_write = None
+        await self.async_flush()
+
+    @callback
+    def _collect(self) -> dict[str, Any]:
+        return self._profiler.run(self._collect_data)
+
+    @callback
+    def _collect_data(self) -> dict[str, Any]:
+        dirty, self._dirty = self._dirty, {}
+        self._deadlines.clear()
+        for entry_id, data_func in dirty.items():
+            self._entries[entry_id] = data_func()
+        return {"entries": dict(self._entries)}
+
+    async def async_flush(self) -> None:
+        if self._unsub_write is not None:
+            self._unsub_write()
+            self._unsub_write = None
+        if self._dirty or self._deadlines:
+            await self._store.async_save(self._collect())
+
+
+class SharedEntryStore:
+    """Per-entry view of the shared file with the MailboxStore interface."""
+
+    def __init__(self, shared: SharedStateStore, entry_id: str, delay: float) -> None:
+        self._shared = shared
+        self._entry_id = entry_id
+        self.delay = delay
+
+    async def async_load(self) -> dict[str, Any] | None:
+        return await self._shared.async_load_entry(self._entry_id)
+
+    @callback
+    def async_schedule_save(self, data_func: DataFunc) -> None:
+        self._shared.async_schedule_save(self._entry_id, data_func, self.delay)
+
+    @callback
+    def async_mark_dirty(self, data_func: DataFunc) -> None:
+        self._shared.async_mark_dirty(self._entry_id, data_func)
+
+    @property
+    def pending(self) -> bool:
+        return self._shared.pending(self._entry_id)
+
+    @property
+    def write_latency(self) -> LatencyHistogram:
+        """Write latency of the shared file, which covers every mailbox in it."""
+        return self._shared.write_latency
+
+    async def async_flush(self) -> None:
+        await self._shared.async_flush()
+
+
+def async_get_shared_store(hass: HomeAssistant) -> SharedStateStore:
+    if (shared := hass.data[DOMAIN].get("_shared_store")) is None:
+        shared = hass.data[DOMAIN]["_shared_store"] = SharedStateStore(hass)
+    return shared
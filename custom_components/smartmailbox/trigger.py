@@ -0,0 +1,660 @@
+from __future__ import annotations
+
+import logging
+from bisect import bisect_left, insort
+from collections import deque
+from collections.abc import Callable, Mapping
+from dataclasses import dataclass
+from math import isfinite
+from time import monotonic
+from types import MappingProxyType
+from typing import Any
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import Event, State, callback
+
+from .const import (
+    CONF_FLAP_ENTITY,
+    CONF_DOOR_ENTITY,
+    CONF_DEBOUNCE_SECONDS,
+    CONF_DOOR_DEBOUNCE_SECONDS,
+    CONF_NOTIFY_ENABLED,
+    CONF_NOTIFY_SERVICE,
+    CONF_NOTIFY_MESSAGE,
+    CONF_DOOR_NOTIFY_ENABLED,
+    CONF_DOOR_NOTIFY_SERVICE,
+    CONF_DOOR_NOTIFY_MESSAGE,
+    CONF_RESET_ON_EMPTY,
+    CONF_NOTIFY_COALESCE_SECONDS,
+    CONF_FLAP_TRIGGER_MODE,
+    CONF_FLAP_THRESHOLD,
+    CONF_FLAP_THRESHOLD_DIRECTION,
+    CONF_DOOR_TRIGGER_MODE,
+    CONF_DOOR_THRESHOLD,
+    CONF_DOOR_THRESHOLD_DIRECTION,
+    CONF_FLAP_HYSTERESIS,
+    CONF_DOOR_HYSTERESIS,
+    CONF_FLAP_DWELL,
+    CONF_DOOR_DWELL,
+    CONF_FLAP_FILTER,
+    CONF_DOOR_FILTER,
+    CONF_FLAP_FILTER_WINDOW,
+    CONF_DOOR_FILTER_WINDOW,
+    CONF_FLAP_ATTRIBUTE,
+    CONF_DOOR_ATTRIBUTE,
+    CONF_FLAP_EVENT_TYPE,
+    CONF_DOOR_EVENT_TYPE,
+    CONF_FLAP_EVENT_DATA,
+    CONF_DOOR_EVENT_DATA,
+    TRIGGER_MODE_BINARY,
+    TRIGGER_MODE_THRESHOLD,
+    TRIGGER_MODE_ATTRIBUTE,
+    THRESHOLD_DIRECTION_ABOVE,
+    FILTER_EMA,
+    FILTER_MEDIAN,
+    FILTER_MEDIAN_EMA,
+    DEFAULT_DEBOUNCE_SECONDS,
+    DEFAULT_DOOR_DEBOUNCE_SECONDS,
+    DEFAULT_TRIGGER_MODE,
+    DEFAULT_THRESHOLD,
+    DEFAULT_THRESHOLD_DIRECTION,
+    DEFAULT_HYSTERESIS,
+    DEFAULT_DWELL_SECONDS,
+    DEFAULT_FILTER,
+    DEFAULT_FILTER_WINDOW,
+    DEFAULT_NOTIFY_COALESCE_SECONDS,
+    ROLE_FLAP,
+    ROLE_DOOR,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+Evaluator = Callable[[State, State], bool]
+Predicate = Callable[[State], bool]
+ValueCheck = Callable[[float, float | None], bool]
+Smoother = Callable[[float], float]
+Getter = Callable[[State], Any]
+# Home Assistant passes the Event to bus event filters before 2024.4 and
+# only its data afterwards
+EventFilter = Callable[[Event | Mapping[str, Any]], bool]
+
+
+def _get_option(entry: ConfigEntry, key: str, default=None):
+    """Get a config value from options first, then data, then default."""
+    return entry.options.get(key, entry.data.get(key, default))
+
+
+def _is_triggered_threshold(
+    new_state_val: float, old_state_val: float | None, threshold: float, direction: str
+) -> bool:
+    """Check if a threshold crossing occurred (edge detection).
+
+    Returns True only if the new value crosses the threshold while the old value
+    did not meet the condition — preventing repeated triggers at a constant value.
+    """
+    if direction == THRESHOLD_DIRECTION_ABOVE:
+        new_meets = new_state_val >= threshold
+        old_meets = old_state_val is not None and old_state_val >= threshold
+    else:  # below
+        new_meets = new_state_val <= threshold
+        old_meets = old_state_val is not None and old_state_val <= threshold
+
+    return new_meets and not old_meets
+
+
+def _parse_float(state_str: str) -> float | None:
+    """Safely parse a state string to float."""
+    try:
+        return float(state_str)
+    except (ValueError, TypeError):
+        return None
+
+
+def _as_number(value: Any) -> float | None:
+    """Use native numbers (and booleans, as 1/0) as is; parse strings."""
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        return _parse_float(value)
+    return None
+
+
+def _get_state(state: State) -> Any:
+    return state.state
+
+
+def _make_attribute_getter(path: str) -> Getter:
+    """Build a lookup for an attribute, or a nested one as "outer.inner"."""
+    keys = tuple(path.split("."))
+    if len(keys) == 1:
+        key = keys[0]
+
+        def _get_attribute(state: State) -> Any:
+            return state.attributes.get(key)
+
+        return _get_attribute
+
+    def _get_nested(state: State) -> Any:
+        value: Any = state.attributes
+        for key in keys:
+            if not isinstance(value, Mapping):
+                return None
+            value = value.get(key)
+        return value
+
+    return _get_nested
+
+
+def _parse_services(value: list | str | None) -> tuple[tuple[str, str], ...]:
+    """Normalize notify targets into pre-split (domain, service) pairs."""
+    # Support both list (EntitySelector) and comma-separated string (legacy)
+    if not value:
+        return ()
+    if isinstance(value, str):
+        value = [s.strip() for s in value.split(",") if s.strip()]
+
+    services = []
+    for notify_service in value:
+        if "." in notify_service:
+            domain, service = notify_service.split(".", 1)
+        else:
+            domain, service = "notify", notify_service
+        services.append((domain, service))
+    return tuple(services)
+
+
+def _never(new_state: State, old_state: State) -> bool:
+    return False
+
+
+def _make_hysteresis_check(
+    threshold: float, direction: str, hysteresis: float
+) -> ValueCheck:
+    """Build a threshold check with separate trigger and re-arm levels.
+
+    After firing, the check stays disarmed until the value falls back past
+    `threshold - hysteresis` (or rises past `threshold + hysteresis` for
+    "below"), so a sensor jittering around the threshold fires only once.
+    """
+    # Mirror "below" onto "above" so one comparison covers both directions.
+    sign = 1.0 if direction == THRESHOLD_DIRECTION_ABOVE else -1.0
+    trigger_level = sign * threshold
+    rearm_level = trigger_level - hysteresis
+    armed: bool | None = None
+
+    def _check_hysteresis(new_val: float, old_val: float | None) -> bool:
+        nonlocal armed
+        if armed is None:
+            # First transition seen: behave like plain edge detection.
+            armed = old_val is None or sign * old_val < trigger_level
+
+        if armed:
+            if sign * new_val >= trigger_level:
+                armed = False
+                return True
+        elif sign * new_val <= rearm_level:
+            armed = True
+        return False
+
+    return _check_hysteresis
+
+
+def _make_in_range(
+    threshold: float, direction: str, hysteresis: float
+) -> Callable[[float], bool]:
+    """Build the check for whether a fired trigger's value still holds.
+
+    With hysteresis, a value holds until it falls back to the re-arm level:
+    a dip that leaves the hysteresis check disarmed must not abandon a
+    pending dwell either, or the trigger could neither dwell nor fire again.
+    """
+    sign = 1.0 if direction == THRESHOLD_DIRECTION_ABOVE else -1.0
+    if hysteresis > 0:
+        rearm_level = sign * threshold - hysteresis
+
+        def _above_rearm(value: float) -> bool:
+            return sign * value > rearm_level
+
+        return _above_rearm
+
+    trigger_level = sign * threshold
+
+    def _at_threshold(value: float) -> bool:
+        return sign * value >= trigger_level
+
+    return _at_threshold
+
+
+def _make_hysteresis_evaluator(
+    threshold: float, direction: str, hysteresis: float
+) -> Evaluator:
+    check = _make_hysteresis_check(threshold, direction, hysteresis)
+
+    def _evaluate_hysteresis(new_state: State, old_state: State) -> bool:
+        new_val = _parse_float(new_state.state)
+        if new_val is None:
+            return False
+        return check(new_val, _parse_float(old_state.state))
+
+    return _evaluate_hysteresis
+
+
+def _make_evaluator(
+    mode: str, threshold: float, direction: str, hysteresis: float = 0.0
+) -> Evaluator:
+    """Build a trigger check with the mode and threshold already bound."""
+    if mode == TRIGGER_MODE_BINARY:
+
+        def _evaluate_binary(new_state: State, old_state: State) -> bool:
+            return new_state.state == "on"
+
+        return _evaluate_binary
+
+    if mode == TRIGGER_MODE_THRESHOLD:
+        if hysteresis > 0:
+            return _make_hysteresis_evaluator(threshold, direction, hysteresis)
+
+        def _evaluate_threshold(new_state: State, old_state: State) -> bool:
+            new_val = _parse_float(new_state.state)
+            if new_val is None:
+                return False
+            old_val = _parse_float(old_state.state)
+            return _is_triggered_threshold(new_val, old_val, threshold, direction)
+
+        return _evaluate_threshold
+
+    return _never
+
+
+def _make_holds(
+    mode: str, threshold: float, direction: str, hysteresis: float = 0.0
+) -> Predicate:
+    """Build a check for whether a state still satisfies the trigger condition."""
+    if mode == TRIGGER_MODE_THRESHOLD:
+        in_range = _make_in_range(threshold, direction, hysteresis)
+
+        def _holds_threshold(state: State) -> bool:
+            value = _parse_float(state.state)
+            return value is not None and in_range(value)
+
+        return _holds_threshold
+
+    def _holds_binary(state: State) -> bool:
+        return state.state == "on"
+
+    return _holds_binary
+
+
+def _make_ema(window: int) -> Smoother:
+    # The usual span-equivalent factor: an N-sample EMA weighs like an N-sample mean
+    alpha = 2.0 / (window + 1)
+    value: float | None = None
+
+    def _ema(sample: float) -> float:
+        nonlocal value
+        value = sample if value is None else value + alpha * (sample - value)
+        return value
+
+    return _ema
+
+
+def _make_median(window: int) -> Smoother:
+    # Readings in arrival order (to know which one leaves) and sorted
+    ring: deque[float] = deque(maxlen=window)
+    ordered: list[float] = []
+
+    def _median(sample: float) -> float:
+        if len(ring) == window:
+            del ordered[bisect_left(ordered, ring[0])]
+        ring.append(sample)
+        insort(ordered, sample)
+        mid, odd = divmod(len(ordered), 2)
+        return ordered[mid] if odd else (ordered[mid - 1] + ordered[mid]) / 2
+
+    return _median
+
+
+def _make_filter(kind: str, window: int) -> Smoother | None:
+    """Build the smoothing stage for one entity's numeric readings.
+
+    The EMA keeps a single float. The rolling median keeps at most `window`
+    readings twice (in arrival order and sorted), so a sample costs a bisect
+    and one shift of a short list regardless of how long the sensor runs.
+    """
+    if window < 2:
+        return None
+    if kind == FILTER_EMA:
+        return _make_ema(window)
+    if kind == FILTER_MEDIAN:
+        return _make_median(window)
+    if kind == FILTER_MEDIAN_EMA:
+        median = _make_median(window)
+        ema = _make_ema(window)
+
+        def _median_ema(sample: float) -> float:
+            return ema(median(sample))
+
+        return _median_ema
+    return None
+
+
+def _make_value_trigger(
+    threshold: float,
+    direction: str,
+    hysteresis: float,
+    smooth: Smoother | None = None,
+    get: Getter = _get_state,
+) -> tuple[Evaluator, Predicate]:
+    """Build evaluate/holds checks on a value read with `get`.
+
+    For attributes, an event whose value equals the previous one is
+    rejected before any conversion, which keeps them cheap on entities that
+    update other attributes often. Native numbers are used without going
+    through a string. The state itself is read through the same path but
+    never rejected as unchanged: an event with an equal state carries
+    changed attributes, and a repeated reading is still a sample for a
+    smoothing filter.
+
+    With `smooth`, crossings are detected between consecutive smoothed
+    values instead of raw readings, so a single noisy sample neither fires
+    nor disarms the trigger, and `holds` looks at the latest smoothed value
+    so a dwell is only abandoned once the smoothed reading has left the
+    trigger range.
+    """
+    if hysteresis > 0:
+        check = _make_hysteresis_check(threshold, direction, hysteresis)
+    else:
+
+        def check(new_val: float, old_val: float | None) -> bool:
+            return _is_triggered_threshold(new_val, old_val, threshold, direction)
+
+    in_range = _make_in_range(threshold, direction, hysteresis)
+    skip_unchanged = get is not _get_state
+    last: float | None = None
+
+    def _evaluate_value(new_state: State, old_state: State) -> bool:
+        nonlocal last
+        value = get(new_state)
+        old_value = get(old_state)
+        if skip_unchanged and value == old_value:
+            return False
+        new_val = _as_number(value)
+        if new_val is None or not isfinite(new_val):
+            return False
+        old_val = _as_number(old_value)
+        if old_val is not None and not isfinite(old_val):
+            old_val = None
+        if smooth is None:
+            return check(new_val, old_val)
+        if last is None and old_val is not None:
+            # Seed with the reading that was there before the first event
+            last = smooth(old_val)
+        previous, last = last, smooth(new_val)
+        return check(last, previous)
+
+    def _holds_value(state: State) -> bool:
+        value = _as_number(get(state))
+        if value is None or not isfinite(value):
+            return False
+        if smooth is not None:
+            value = last
+        return value is not None and in_range(value)
+
+    return _evaluate_value, _holds_value
+
+
+@dataclass(frozen=True, slots=True)
+class TriggerSpec:
+    """A watched entity and the prebound check that decides if it fired.
+
+    With a non-zero `dwell`, a fired trigger is only accepted if `holds`
+    is still true for the entity's state `dwell` seconds later. Accepted
+    triggers are then rate limited to one per `debounce` seconds.
+    """
+
+    role: str
+    evaluate: Evaluator
+    holds: Predicate
+    dwell: float
+    debounce: float
+
+
+@dataclass(frozen=True, slots=True)
+class EventTrigger:
+    """A bus event that fires a role without going through an entity state.
+
+    `matches` is the bus listener's event filter, so events with other data
+    are dropped by the event bus before a mailbox callback is scheduled.
+    A trigger always has one: without event data, every event of a shared
+    type such as `zha_event` would count.
+    Accepted events are rate limited under `key` together with the role's
+    entity, so a sensor reporting both ways is counted once.
+    """
+
+    event_type: str
+    matches: EventFilter
+    key: str
+    spec: TriggerSpec
+
+
+@dataclass(frozen=True, slots=True)
+class TriggerPlan:
+    """Immutable snapshot of everything the state-change hot path needs."""
+
+    flap_entity: str
+    door_entity: str
+    triggers: Mapping[str, TriggerSpec]
+    events: tuple[EventTrigger, ...]
+    notify_services: tuple[tuple[str, str], ...]
+    notify_message: str
+    door_notify_services: tuple[tuple[str, str], ...]
+    door_notify_message: str
+    notify_window: float
+    reset_on_empty: bool
+
+
+def _compile_spec(
+    entry: ConfigEntry,
+    role: str,
+    mode_key: str,
+    threshold_key: str,
+    direction_key: str,
+    hysteresis_key: str,
+    dwell_key: str,
+    debounce_key: str,
+    default_debounce: float,
+    filter_key: str,
+    filter_window_key: str,
+    attribute_key: str,
+) -> TriggerSpec:
+    mode = _get_option(entry, mode_key, DEFAULT_TRIGGER_MODE)
+    threshold = float(_get_option(entry, threshold_key, DEFAULT_THRESHOLD))
+    direction = _get_option(entry, direction_key, DEFAULT_THRESHOLD_DIRECTION)
+    hysteresis = float(_get_option(entry, hysteresis_key, DEFAULT_HYSTERESIS))
+    attribute = (_get_option(entry, attribute_key) or "").strip()
+    smooth = None
+    if mode in (TRIGGER_MODE_THRESHOLD, TRIGGER_MODE_ATTRIBUTE):
+        smooth = _make_filter(
+            _get_option(entry, filter_key, DEFAULT_FILTER),
+            int(_get_option(entry, filter_window_key, DEFAULT_FILTER_WINDOW)),
+        )
+    if mode == TRIGGER_MODE_ATTRIBUTE and attribute:
+        evaluate, holds = _make_value_trigger(
+            threshold,
+            direction,
+            hysteresis,
+            smooth,
+            _make_attribute_getter(attribute),
+        )
+    elif smooth is not None:
+        evaluate, holds = _make_value_trigger(
+            threshold, direction, hysteresis, smooth
+        )
+    else:
+        evaluate = _make_evaluator(mode, threshold, direction, hysteresis)
+        holds = _make_holds(mode, threshold, direction, hysteresis)
+    return TriggerSpec(
+        role,
+        evaluate,
+        holds,
+        float(_get_option(entry, dwell_key, DEFAULT_DWELL_SECONDS)),
+        float(_get_option(entry, debounce_key, default_debounce)),
+    )
+
+
+def _make_event_filter(match: Mapping[str, Any]) -> EventFilter:
+    """Build a bus event filter requiring every `match` item in the event data."""
+    items = tuple(match.items())
+
+    @callback
+    def _matches(event: Event | Mapping[str, Any]) -> bool:
+        data = getattr(event, "data", event)
+        for key, value in items:
+            if data.get(key) != value:
+                return False
+        return True
+
+    return _matches
+
+
+def _compile_event_trigger(
+    entry: ConfigEntry, type_key: str, data_key: str, key: str, spec: TriggerSpec
+) -> EventTrigger | None:
+    event_type = (_get_option(entry, type_key) or "").strip()
+    if not event_type:
+        return None
+    if not (match := _get_option(entry, data_key)):
+        # The options flow requires event data; do not count the whole bus
+        _LOGGER.warning(
+            "Ignoring %s trigger on %s events without event data", spec.role, event_type
+        )
+        return None
+    return EventTrigger(event_type, _make_event_filter(match), key, spec)
+
+
+def notifications_enabled(entry: ConfigEntry) -> bool:
+    """Whether the entry sends any notification (and needs default messages)."""
+    return bool(
+        _get_option(entry, CONF_NOTIFY_ENABLED, False)
+        or _get_option(entry, CONF_DOOR_NOTIFY_ENABLED, False)
+    )
+
+
+def compile_trigger_plan(
+    entry: ConfigEntry,
+    default_notify_message: str = "",
+    default_door_notify_message: str = "",
+) -> TriggerPlan:
+    """Resolve the entry's options once into a TriggerPlan."""
+    flap = _get_option(entry, CONF_FLAP_ENTITY) or ""
+    door = _get_option(entry, CONF_DOOR_ENTITY) or ""
+
+    door_spec = _compile_spec(
+        entry,
+        ROLE_DOOR,
+        CONF_DOOR_TRIGGER_MODE,
+        CONF_DOOR_THRESHOLD,
+        CONF_DOOR_THRESHOLD_DIRECTION,
+        CONF_DOOR_HYSTERESIS,
+        CONF_DOOR_DWELL,
+        CONF_DOOR_DEBOUNCE_SECONDS,
+        DEFAULT_DOOR_DEBOUNCE_SECONDS,
+        CONF_DOOR_FILTER,
+        CONF_DOOR_FILTER_WINDOW,
+        CONF_DOOR_ATTRIBUTE,
+    )
+    flap_spec = _compile_spec(
+        entry,
+        ROLE_FLAP,
+        CONF_FLAP_TRIGGER_MODE,
+        CONF_FLAP_THRESHOLD,
+        CONF_FLAP_THRESHOLD_DIRECTION,
+        CONF_FLAP_HYSTERESIS,
+        CONF_FLAP_DWELL,
+        CONF_DEBOUNCE_SECONDS,
+        DEFAULT_DEBOUNCE_SECONDS,
+        CONF_FLAP_FILTER,
+        CONF_FLAP_FILTER_WINDOW,
+        CONF_FLAP_ATTRIBUTE,
+    )
+
+    triggers: dict[str, TriggerSpec] = {}
+    # Insert the door first so the flap wins if both point at the same entity.
+    if door:
+        triggers[door] = door_spec
+    if flap:
+        triggers[flap] = flap_spec
+
+    # Event triggers share the debounce window of the role's entity
+    events = tuple(
+        trigger
+        for trigger in (
+            _compile_event_trigger(
+                entry,
+                CONF_FLAP_EVENT_TYPE,
+                CONF_FLAP_EVENT_DATA,
+                flap or ROLE_FLAP,
+                flap_spec,
+            ),
+            _compile_event_trigger(
+                entry,
+                CONF_DOOR_EVENT_TYPE,
+                CONF_DOOR_EVENT_DATA,
+                door or ROLE_DOOR,
+                door_spec,
+            ),
+        )
+        if trigger is not None
+    )
+
+    notify_services = ()
+    if _get_option(entry, CONF_NOTIFY_ENABLED, False):
+        notify_services = _parse_services(_get_option(entry, CONF_NOTIFY_SERVICE, []))
+
+    door_notify_services = ()
+    if _get_option(entry, CONF_DOOR_NOTIFY_ENABLED, False):
+        door_notify_services = _parse_services(
+            _get_option(entry, CONF_DOOR_NOTIFY_SERVICE, [])
+        )
+
+    return TriggerPlan(
+        flap_entity=flap,
+        door_entity=door,
+        triggers=MappingProxyType(triggers),
+        events=events,
+        notify_services=notify_services,
+        notify_message=_get_option(entry, CONF_NOTIFY_MESSAGE, default_notify_message),
+        door_notify_services=door_notify_services,
+        door_notify_message=_get_option(
+            entry, CONF_DOOR_NOTIFY_MESSAGE, default_door_notify_message
+        ),
+        notify_window=float(
+            _get_option(
+                entry, CONF_NOTIFY_COALESCE_SECONDS, DEFAULT_NOTIFY_COALESCE_SECONDS
+            )
+        ),
+        reset_on_empty=bool(_get_option(entry, CONF_RESET_ON_EMPTY, False)),
+    )
+
+
+class RateLimiter:
+    """Allow at most one event per window for each key, on the monotonic clock.
+
+    Rejected events are counted per key in `dropped`. The monotonic clock
+    keeps wall-clock adjustments (NTP, DST) from opening or closing windows.
+    """
+
+    __slots__ = ("_last", "dropped")
+
+    def __init__(self) -> None:
+        self._last: dict[str, float] = {}
+        self.dropped: dict[str, int] = {}
+
+    def allow(self, key: str, window: float) -> bool:
+        now = monotonic()
+        last = self._last.get(key)
+        if last is not None and now - last < window:
+            self.dropped[key] = self.dropped.get(key, 0) + 1
+            return False
+        self._last[key] = now
+        return True
@@ -2,6 +2,8 @@
 
 from __future__ import annotations
 
+import asyncio
+
 import pytest
 from homeassistant.core import HomeAssistant
 
@@ -42,6 +44,14 @@ def auto_enable_custom_integrations(enable_custom_integrations):
     yield
 
 
+@pytest.fixture(autouse=True)
+def auto_isolate_config_dir(request, tmp_path):
+    """Keep files written outside of Store (the event journal) in tmp_path."""
+    if "hass" in request.fixturenames:
+        request.getfixturevalue("hass").config.config_dir = str(tmp_path)
+    yield
+
+
 def _base_binary_data() -> dict:
     """Return base config data for a binary-sensor-based mailbox."""
     return {
@@ -56,6 +66,44 @@ def _base_binary_data() -> dict:
     }
 
 
+def make_mailbox_entry(
+    idx: int,
+    mode: str = TRIGGER_MODE_BINARY,
+    flap: str | None = None,
+    door: str | None = None,
+    data: dict | None = None,
+    options: dict | None = None,
+) -> MockConfigEntry:
+    """Config entry for mailbox `idx` of a fleet, with sensors of its own."""
+    if mode == TRIGGER_MODE_THRESHOLD:
+        entry_data = {
+            CONF_FLAP_ENTITY: flap or f"sensor.flap_angle{idx}",
+            CONF_DOOR_ENTITY: door or f"sensor.door_angle{idx}",
+            CONF_FLAP_THRESHOLD: 30.0,
+            CONF_FLAP_THRESHOLD_DIRECTION: THRESHOLD_DIRECTION_ABOVE,
+            CONF_DOOR_THRESHOLD: 30.0,
+            CONF_DOOR_THRESHOLD_DIRECTION: THRESHOLD_DIRECTION_ABOVE,
+        }
+    else:
+        entry_data = {
+            CONF_FLAP_ENTITY: flap or f"binary_sensor.flap{idx}",
+            CONF_DOOR_ENTITY: door or f"binary_sensor.door{idx}",
+        }
+    return MockConfigEntry(
+        domain=DOMAIN,
+        version=2,
+        data={
+            CONF_NAME: f"Mailbox {idx}",
+            CONF_FLAP_TRIGGER_MODE: mode,
+            CONF_DOOR_TRIGGER_MODE: mode,
+            **entry_data,
+            **(data or {}),
+        },
+        options=options or {},
+        title=f"Mailbox {idx}",
+    )
+
+
 @pytest.fixture
 def mock_config_entry_binary() -> MockConfigEntry:
     """Config entry with both sensors as binary_sensor entities."""
@@ -150,3 +198,16 @@ async def setup_integration(hass: HomeAssistant, entry: MockConfigEntry) -> None
     entry.add_to_hass(hass)
     await hass.config_entries.async_setup(entry.entry_id)
     await hass.async_block_till_done()
+
+
+async def wait_for_notifications(hass: HomeAssistant, dispatcher=None) -> None:
+    """Wait for the notification workers and rate limited messages."""
+    await hass.async_block_till_done()
+    if dispatcher is None:
+        dispatcher = hass.data.get(DOMAIN, {}).get("_notifier")
+    while dispatcher is not None and (dispatcher._tasks or dispatcher._deferred):
+        if dispatcher._tasks:
+            await asyncio.gather(*dispatcher._tasks)
+        else:
+            await asyncio.sleep(0.01)
+    await hass.async_block_till_done()
@@ -3,12 +3,19 @@
 from __future__ import annotations
 
 from datetime import timedelta
+from time import monotonic
 from unittest.mock import patch
 
 import pytest
 from homeassistant.core import HomeAssistant
+from homeassistant.helpers import entity_registry as er
 from homeassistant.util import dt as dt_util
 
+from pytest_homeassistant_custom_component.common import (
+    MockConfigEntry,
+    async_fire_time_changed,
+)
+
 from custom_components.smartmailbox.const import (
     DOMAIN,
     CONF_FLAP_ENTITY,
@@ -24,16 +31,29 @@ from custom_components.smartmailbox.const import (
     CONF_FLAP_THRESHOLD_DIRECTION,
     CONF_DOOR_THRESHOLD,
     CONF_DOOR_THRESHOLD_DIRECTION,
+    CONF_DEBOUNCE_SECONDS,
+    CONF_DOOR_DEBOUNCE_SECONDS,
+    CONF_FLAP_HYSTERESIS,
+    CONF_FLAP_DWELL,
+    CONF_DOOR_DWELL,
+    CONF_FLAP_FILTER,
+    CONF_FLAP_FILTER_WINDOW,
+    CONF_FLAP_EVENT_TYPE,
+    CONF_FLAP_EVENT_DATA,
+    CONF_DOOR_EVENT_TYPE,
+    CONF_DOOR_EVENT_DATA,
+    CONF_INSTRUMENTATION,
+    FILTER_MEDIAN,
     TRIGGER_MODE_THRESHOLD,
     THRESHOLD_DIRECTION_ABOVE,
     THRESHOLD_DIRECTION_BELOW,
 )
-from custom_components.smartmailbox.binary_sensor import (
+from custom_components.smartmailbox.trigger import (
     _is_triggered_threshold,
     _parse_float,
 )
 
-from .conftest import setup_integration
+from .conftest import setup_integration, wait_for_notifications
 
 
 # ---------------------------------------------------------------------------
@@ -211,9 +231,9 @@ class TestThresholdTriggerMode:
         assert state.counter == 1
 
         # Wait for debounce
-        now = dt_util.utcnow() + timedelta(seconds=5)
+        now = monotonic() + 5
         with patch(
-            "custom_components.smartmailbox.binary_sensor.dt_util.utcnow",
+            "custom_components.smartmailbox.trigger.monotonic",
             return_value=now,
         ):
             hass.states.async_set("sensor.flap_angle", "40")
@@ -361,9 +381,9 @@ class TestDebounce:
         await hass.async_block_till_done()
 
         # Advance time past debounce
-        future = dt_util.utcnow() + timedelta(seconds=5)
+        future = monotonic() + 5
         with patch(
-            "custom_components.smartmailbox.binary_sensor.dt_util.utcnow",
+            "custom_components.smartmailbox.trigger.monotonic",
             return_value=future,
         ):
             hass.states.async_set("binary_sensor.flap", "on")
@@ -371,6 +391,183 @@ class TestDebounce:
 
         assert state.counter == 2
 
+    async def test_door_debounce_and_drop_counter(
+        self, hass: HomeAssistant, mock_config_entry_binary
+    ):
+        entry = MockConfigEntry(
+            domain=DOMAIN,
+            version=2,
+            data=dict(mock_config_entry_binary.data),
+            options={CONF_DOOR_DEBOUNCE_SECONDS: 5},
+        )
+        await setup_integration(hass, entry)
+        state = hass.data[DOMAIN][entry.entry_id]["state"]
+
+        hass.states.async_set("binary_sensor.door", "on")
+        await hass.async_block_till_done()
+        first_empty = state.last_empty
+        assert first_empty is not None
+
+        # A flaky contact bouncing within the window is dropped
+        for value in ("off", "on", "off", "on"):
+            hass.states.async_set("binary_sensor.door", value)
+            await hass.async_block_till_done()
+        assert state.last_empty == first_empty
+
+        # The next accepted event publishes the drop count; the entity
+        # writes its state one loop iteration after the event is handled.
+        hass.states.async_set("binary_sensor.flap", "on")
+        await hass.async_block_till_done()
+        await hass.async_block_till_done()
+        entity_id = er.async_get(hass).async_get_entity_id(
+            "binary_sensor", DOMAIN, f"{entry.entry_id}_mailbox_post"
+        )
+        attrs = hass.states.get(entity_id).attributes
+        assert attrs["door_debounced"] == 2
+        assert attrs["flap_debounced"] == 0
+
+
+# ---------------------------------------------------------------------------
+# Hysteresis and dwell tests
+# ---------------------------------------------------------------------------
+
+
+class TestHysteresisAndDwell:
+    def _with_options(self, entry: MockConfigEntry, **options) -> MockConfigEntry:
+        return MockConfigEntry(
+            domain=DOMAIN, version=2, data=dict(entry.data), options=options
+        )
+
+    async def test_hysteresis_ignores_jitter(
+        self, hass: HomeAssistant, mock_config_entry_threshold
+    ):
+        entry = self._with_options(
+            mock_config_entry_threshold,
+            **{CONF_FLAP_HYSTERESIS: 5.0, CONF_DEBOUNCE_SECONDS: 0},
+        )
+        await setup_integration(hass, entry)
+        state = hass.data[DOMAIN][entry.entry_id]["state"]
+
+        for value in ("10", "31", "29", "31", "28", "32"):
+            hass.states.async_set("sensor.flap_angle", value)
+            await hass.async_block_till_done()
+        assert state.counter == 1
+
+        # Falling below the re-arm level (25) allows the next delivery
+        hass.states.async_set("sensor.flap_angle", "20")
+        await hass.async_block_till_done()
+        hass.states.async_set("sensor.flap_angle", "35")
+        await hass.async_block_till_done()
+        assert state.counter == 2
+
+    async def test_dwell_accepts_after_holding(
+        self, hass: HomeAssistant, mock_config_entry_binary
+    ):
+        entry = self._with_options(mock_config_entry_binary, **{CONF_FLAP_DWELL: 2})
+        await setup_integration(hass, entry)
+        state = hass.data[DOMAIN][entry.entry_id]["state"]
+
+        hass.states.async_set("binary_sensor.flap", "on")
+        await hass.async_block_till_done()
+        assert state.counter == 0
+
+        async_fire_time_changed(hass, dt_util.utcnow() + timedelta(seconds=3))
+        await hass.async_block_till_done()
+        assert state.counter == 1
+        assert state.post_present is True
+
+    async def test_dwell_abandoned_when_released(
+        self, hass: HomeAssistant, mock_config_entry_binary
+    ):
+        entry = self._with_options(mock_config_entry_binary, **{CONF_DOOR_DWELL: 2})
+        await setup_integration(hass, entry)
+        state = hass.data[DOMAIN][entry.entry_id]["state"]
+
+        hass.states.async_set("binary_sensor.door", "on")
+        await hass.async_block_till_done()
+        hass.states.async_set("binary_sensor.door", "off")
+        await hass.async_block_till_done()
+
+        async_fire_time_changed(hass, dt_util.utcnow() + timedelta(seconds=3))
+        await hass.async_block_till_done()
+        assert state.last_empty is None
+
+    async def test_hysteresis_jitter_keeps_dwell(
+        self, hass: HomeAssistant, mock_config_entry_threshold
+    ):
+        entry = self._with_options(
+            mock_config_entry_threshold,
+            **{CONF_FLAP_HYSTERESIS: 5.0, CONF_FLAP_DWELL: 2},
+        )
+        await setup_integration(hass, entry)
+        state = hass.data[DOMAIN][entry.entry_id]["state"]
+
+        # The dip to 29 stays above the re-arm level (25), so it neither
+        # re-arms the trigger nor abandons the pending dwell
+        for value in ("10", "31", "29", "31"):
+            hass.states.async_set("sensor.flap_angle", value)
+            await hass.async_block_till_done()
+        async_fire_time_changed(hass, dt_util.utcnow() + timedelta(seconds=3))
+        await hass.async_block_till_done()
+        assert state.counter == 1
+
+    async def test_filtered_dip_abandons_dwell(
+        self, hass: HomeAssistant, mock_config_entry_threshold
+    ):
+        entry = self._with_options(
+            mock_config_entry_threshold,
+            **{
+                CONF_FLAP_FILTER: FILTER_MEDIAN,
+                CONF_FLAP_FILTER_WINDOW: 3,
+                CONF_FLAP_DWELL: 2,
+            },
+        )
+        await setup_integration(hass, entry)
+        state = hass.data[DOMAIN][entry.entry_id]["state"]
+        sensor = hass.data["binary_sensor"].get_entity(
+            er.async_get(hass).async_get_entity_id(
+                "binary_sensor", DOMAIN, f"{entry.entry_id}_mailbox_post"
+            )
+        )
+
+        # Median of (0, 80) is 40: the flap fires and starts its dwell
+        hass.states.async_set("sensor.flap_angle", "80")
+        await hass.async_block_till_done()
+        assert "sensor.flap_angle" in sensor._dwell_timers
+
+        # Median of (0, 80, 0) is 0: the dwell is judged on that, not on 40
+        hass.states.async_set("sensor.flap_angle", "0")
+        await hass.async_block_till_done()
+        assert "sensor.flap_angle" not in sensor._dwell_timers
+
+        async_fire_time_changed(hass, dt_util.utcnow() + timedelta(seconds=3))
+        await hass.async_block_till_done()
+        assert state.counter == 0
+
+    async def test_hysteresis_rearm_abandons_dwell(
+        self, hass: HomeAssistant, mock_config_entry_threshold
+    ):
+        entry = self._with_options(
+            mock_config_entry_threshold,
+            **{CONF_FLAP_HYSTERESIS: 5.0, CONF_FLAP_DWELL: 2},
+        )
+        await setup_integration(hass, entry)
+        state = hass.data[DOMAIN][entry.entry_id]["state"]
+
+        for value in ("10", "31", "20"):
+            hass.states.async_set("sensor.flap_angle", value)
+            await hass.async_block_till_done()
+        async_fire_time_changed(hass, dt_util.utcnow() + timedelta(seconds=3))
+        await hass.async_block_till_done()
+        assert state.counter == 0
+
+        # Falling to 20 re-armed the trigger, so the next opening dwells again
+        hass.states.async_set("sensor.flap_angle", "35")
+        await hass.async_block_till_done()
+        async_fire_time_changed(hass, dt_util.utcnow() + timedelta(seconds=6))
+        await hass.async_block_till_done()
+        assert state.counter == 1
+
 
 # ---------------------------------------------------------------------------
 # Notification tests
@@ -406,7 +603,7 @@ class TestNotifications:
         await setup_integration(hass, entry)
 
         hass.states.async_set("binary_sensor.flap", "on")
-        await hass.async_block_till_done()
+        await wait_for_notifications(hass)
 
         assert len(calls) == 1
 
@@ -424,19 +621,19 @@ class TestNotifications:
 
         # First delivery
         hass.states.async_set("binary_sensor.flap", "on")
-        await hass.async_block_till_done()
+        await wait_for_notifications(hass)
 
         hass.states.async_set("binary_sensor.flap", "off")
-        await hass.async_block_till_done()
+        await wait_for_notifications(hass)
 
         # Second delivery (within same post period) — advance past debounce
-        future = dt_util.utcnow() + timedelta(seconds=5)
+        future = monotonic() + 5
         with patch(
-            "custom_components.smartmailbox.binary_sensor.dt_util.utcnow",
+            "custom_components.smartmailbox.trigger.monotonic",
             return_value=future,
         ):
             hass.states.async_set("binary_sensor.flap", "on")
-            await hass.async_block_till_done()
+            await wait_for_notifications(hass)
 
         # Only 1 notification, not 2
         assert len(calls) == 1
@@ -453,27 +650,27 @@ class TestNotifications:
 
         # First delivery
         hass.states.async_set("binary_sensor.flap", "on")
-        await hass.async_block_till_done()
+        await wait_for_notifications(hass)
         assert len(calls) == 1
 
         hass.states.async_set("binary_sensor.flap", "off")
-        await hass.async_block_till_done()
+        await wait_for_notifications(hass)
 
         # Empty mailbox
         hass.states.async_set("binary_sensor.door", "on")
-        await hass.async_block_till_done()
+        await wait_for_notifications(hass)
 
         hass.states.async_set("binary_sensor.door", "off")
-        await hass.async_block_till_done()
+        await wait_for_notifications(hass)
 
         # New delivery after emptying
-        future = dt_util.utcnow() + timedelta(seconds=5)
+        future = monotonic() + 5
         with patch(
-            "custom_components.smartmailbox.binary_sensor.dt_util.utcnow",
+            "custom_components.smartmailbox.trigger.monotonic",
             return_value=future,
         ):
             hass.states.async_set("binary_sensor.flap", "on")
-            await hass.async_block_till_done()
+            await wait_for_notifications(hass)
 
         assert len(calls) == 2  # second notification sent
 
@@ -495,7 +692,7 @@ class TestNotifications:
         await setup_integration(hass, entry)
 
         hass.states.async_set("binary_sensor.door", "on")
-        await hass.async_block_till_done()
+        await wait_for_notifications(hass)
 
         assert len(calls) == 1
 
@@ -535,9 +732,9 @@ class TestCounter:
         hass.states.async_set("binary_sensor.flap", "off")
         await hass.async_block_till_done()
 
-        future = dt_util.utcnow() + timedelta(seconds=5)
+        future = monotonic() + 5
         with patch(
-            "custom_components.smartmailbox.binary_sensor.dt_util.utcnow",
+            "custom_components.smartmailbox.trigger.monotonic",
             return_value=future,
         ):
             hass.states.async_set("binary_sensor.flap", "on")
@@ -549,9 +746,9 @@ class TestCounter:
         await hass.async_block_till_done()
 
         # Empty
-        later = dt_util.utcnow() + timedelta(seconds=10)
+        later = monotonic() + 10
         with patch(
-            "custom_components.smartmailbox.binary_sensor.dt_util.utcnow",
+            "custom_components.smartmailbox.trigger.monotonic",
             return_value=later,
         ):
             hass.states.async_set("binary_sensor.door", "on")
@@ -577,3 +774,103 @@ class TestCounter:
         await hass.async_block_till_done()
 
         assert state.counter == 1  # not reset
+
+
+# ---------------------------------------------------------------------------
+# Bus event triggers
+# ---------------------------------------------------------------------------
+
+
+def _event_entry(mock_config_entry_binary, options=None) -> MockConfigEntry:
+    return MockConfigEntry(
+        domain=DOMAIN,
+        version=2,
+        data=dict(mock_config_entry_binary.data),
+        options={
+            CONF_FLAP_EVENT_TYPE: "zha_event",
+            CONF_FLAP_EVENT_DATA: {"device_id": "abc", "command": "on"},
+            **(options or {}),
+        },
+        title="Test Mailbox",
+    )
+
+
+class TestEventTriggers:
+    async def test_matching_event_counts_delivery(
+        self, hass: HomeAssistant, mock_config_entry_binary
+    ):
+        entry = _event_entry(
+            mock_config_entry_binary,
+            {
+                CONF_DOOR_EVENT_TYPE: "deconz_event",
+                CONF_DOOR_EVENT_DATA: {"id": "mailbox_door"},
+            },
+        )
+        await setup_integration(hass, entry)
+        state = hass.data[DOMAIN][entry.entry_id]["state"]
+
+        hass.bus.async_fire("zha_event", {"device_id": "abc", "command": "off"})
+        hass.bus.async_fire("zha_event", {"device_id": "xyz", "command": "on"})
+        await hass.async_block_till_done()
+        assert state.counter == 0
+
+        hass.bus.async_fire(
+            "zha_event", {"device_id": "abc", "command": "on", "args": []}
+        )
+        await hass.async_block_till_done()
+        assert state.counter == 1
+        assert state.post_present is True
+
+        hass.bus.async_fire("deconz_event", {"id": "mailbox_door", "event": 1002})
+        await hass.async_block_till_done()
+        assert state.post_present is False
+
+    async def test_filtered_events_never_reach_the_mailbox(
+        self, hass: HomeAssistant, mock_config_entry_binary
+    ):
+        entry = _event_entry(mock_config_entry_binary, {CONF_INSTRUMENTATION: True})
+        await setup_integration(hass, entry)
+        stats = hass.data[DOMAIN][entry.entry_id]["stats"]
+
+        for _ in range(3):
+            hass.bus.async_fire("zha_event", {"device_id": "other", "command": "on"})
+        await hass.async_block_till_done()
+
+        assert stats.counters["received"] == 0
+
+    async def test_event_shares_debounce_with_entity(
+        self, hass: HomeAssistant, mock_config_entry_binary
+    ):
+        entry = _event_entry(mock_config_entry_binary)
+        await setup_integration(hass, entry)
+        state = hass.data[DOMAIN][entry.entry_id]["state"]
+
+        # A sensor reporting both a state and an event counts once
+        hass.states.async_set("binary_sensor.flap", "on")
+        hass.bus.async_fire("zha_event", {"device_id": "abc", "command": "on"})
+        await hass.async_block_till_done()
+
+        assert state.counter == 1
+
+    async def test_options_change_and_unload_remove_listener(
+        self, hass: HomeAssistant, mock_config_entry_binary
+    ):
+        entry = _event_entry(mock_config_entry_binary)
+        await setup_integration(hass, entry)
+        state = hass.data[DOMAIN][entry.entry_id]["state"]
+        listeners = hass.bus.async_listeners().get("zha_event", 0)
+
+        hass.config_entries.async_update_entry(
+            entry, options={**entry.options, CONF_FLAP_EVENT_TYPE: "deconz_event"}
+        )
+        await hass.async_block_till_done()
+        assert hass.bus.async_listeners().get("zha_event", 0) == listeners - 1
+
+        hass.bus.async_fire("zha_event", {"device_id": "abc", "command": "on"})
+        hass.bus.async_fire("deconz_event", {"device_id": "abc", "command": "on"})
+        await hass.async_block_till_done()
+        assert state.counter == 1
+
+        assert await hass.config_entries.async_unload(entry.entry_id)
+        await hass.async_block_till_done()
+        assert "deconz_event" not in hass.bus.async_listeners()
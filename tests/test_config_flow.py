@@ -27,8 +27,13 @@ from custom_components.smartmailbox.const import (
     CONF_ENABLE_AGE,
     CONF_AGE_UNIT,
     CONF_RESET_ON_EMPTY,
+    CONF_FLAP_ATTRIBUTE,
+    CONF_FLAP_EVENT_DATA,
+    CONF_DOOR_EVENT_TYPE,
+    CONF_DOOR_EVENT_DATA,
     TRIGGER_MODE_BINARY,
     TRIGGER_MODE_THRESHOLD,
+    TRIGGER_MODE_ATTRIBUTE,
     THRESHOLD_DIRECTION_ABOVE,
 )
 from custom_components.smartmailbox.config_flow import _is_non_binary
@@ -320,3 +325,66 @@ class TestOptionsFlow:
         assert result["type"] == FlowResultType.CREATE_ENTRY
         assert result["data"][CONF_FLAP_TRIGGER_MODE] == TRIGGER_MODE_BINARY
         assert result["data"][CONF_DOOR_TRIGGER_MODE] == TRIGGER_MODE_THRESHOLD
+
+    async def test_options_attribute_selects_attribute_mode(
+        self, hass: HomeAssistant, mock_config_entry_binary
+    ):
+        await setup_integration(hass, mock_config_entry_binary)
+
+        result = await hass.config_entries.options.async_init(
+            mock_config_entry_binary.entry_id
+        )
+        result = await hass.config_entries.options.async_configure(
+            result["flow_id"],
+            user_input={
+                CONF_FLAP_ENTITY: "binary_sensor.flap",
+                CONF_DOOR_ENTITY: "binary_sensor.door",
+                CONF_FLAP_ATTRIBUTE: " angle ",
+            },
+        )
+
+        assert result["type"] == FlowResultType.CREATE_ENTRY
+        assert result["data"][CONF_FLAP_ATTRIBUTE] == "angle"
+        assert result["data"][CONF_FLAP_TRIGGER_MODE] == TRIGGER_MODE_ATTRIBUTE
+        assert result["data"][CONF_DOOR_TRIGGER_MODE] == TRIGGER_MODE_BINARY
+
+    async def test_options_rejects_event_data_that_is_not_a_mapping(
+        self, hass: HomeAssistant, mock_config_entry_binary
+    ):
+        await setup_integration(hass, mock_config_entry_binary)
+
+        result = await hass.config_entries.options.async_init(
+            mock_config_entry_binary.entry_id
+        )
+        result = await hass.config_entries.options.async_configure(
+            result["flow_id"],
+            user_input={
+                CONF_FLAP_ENTITY: "binary_sensor.flap",
+                CONF_DOOR_ENTITY: "binary_sensor.door",
+                CONF_FLAP_EVENT_DATA: ["device_id", "abc"],
+            },
+        )
+
+        assert result["type"] == FlowResultType.FORM
+        assert result["errors"] == {CONF_FLAP_EVENT_DATA: "invalid_event_data"}
+
+    async def test_options_requires_event_data_with_event_type(
+        self, hass: HomeAssistant, mock_config_entry_binary
+    ):
+        await setup_integration(hass, mock_config_entry_binary)
+
+        result = await hass.config_entries.options.async_init(
+            mock_config_entry_binary.entry_id
+        )
+        result = await hass.config_entries.options.async_configure(
+            result["flow_id"],
+            user_input={
+                CONF_FLAP_ENTITY: "binary_sensor.flap",
+                CONF_DOOR_ENTITY: "binary_sensor.door",
+                CONF_DOOR_EVENT_TYPE: "zha_event",
+                CONF_DOOR_EVENT_DATA: {},
+            },
+        )
+
+        assert result["type"] == FlowResultType.FORM
+        assert result["errors"] == {CONF_DOOR_EVENT_DATA: "event_data_required"}
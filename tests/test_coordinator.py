@@ -0,0 +1,116 @@
+"""Tests for the per-mailbox push coordinator."""
+
+from __future__ import annotations
+
+from time import monotonic
+from unittest.mock import patch
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.entity import Entity
+
+from custom_components.smartmailbox.const import DOMAIN, SERVICE_MARK_EMPTY
+from custom_components.smartmailbox.coordinator import MailboxCoordinator
+
+from .conftest import setup_integration
+
+
+def _spy_writes():
+    """Patch the state machine write and record the entity ids written."""
+    return patch.object(
+        Entity,
+        "_async_write_ha_state",
+        autospec=True,
+        side_effect=Entity._async_write_ha_state,
+    )
+
+
+def _written(spy) -> list[str]:
+    return sorted(call.args[0].entity_id for call in spy.call_args_list)
+
+
+# ---------------------------------------------------------------------------
+# Coordinator
+# ---------------------------------------------------------------------------
+
+
+class TestMailboxCoordinator:
+    async def test_listeners_called_until_removed(self, hass: HomeAssistant):
+        coordinator = MailboxCoordinator()
+        calls = []
+        remove = coordinator.async_add_listener(lambda: calls.append(1))
+
+        coordinator.async_update_listeners()
+        remove()
+        coordinator.async_update_listeners()
+
+        assert calls == [1]
+
+
+# ---------------------------------------------------------------------------
+# Entity fan-out
+# ---------------------------------------------------------------------------
+
+
+class TestFanOut:
+    async def test_delivery_writes_each_changed_entity_once(
+        self, hass: HomeAssistant, mock_config_entry_binary
+    ):
+        await setup_integration(hass, mock_config_entry_binary)
+
+        with _spy_writes() as spy:
+            hass.states.async_set("binary_sensor.flap", "on")
+            await hass.async_block_till_done()
+
+        assert _written(spy) == [
+            "binary_sensor.test_mailbox_mail",
+            "sensor.test_mailbox_delivery_counter",
+            "sensor.test_mailbox_last_delivery",
+            "sensor.test_mailbox_mail_age",
+        ]
+
+    async def test_second_delivery_skips_unchanged_entities(
+        self, hass: HomeAssistant, mock_config_entry_binary
+    ):
+        await setup_integration(hass, mock_config_entry_binary)
+        hass.states.async_set("binary_sensor.flap", "on")
+        await hass.async_block_till_done()
+        hass.states.async_set("binary_sensor.flap", "off")
+        await hass.async_block_till_done()
+
+        with _spy_writes() as spy, patch(
+            "custom_components.smartmailbox.trigger.monotonic",
+            return_value=monotonic() + 5,
+        ):
+            hass.states.async_set("binary_sensor.flap", "on")
+            await hass.async_block_till_done()
+
+        # The post sensor was already on, so it is not written again
+        assert "binary_sensor.test_mailbox_mail" not in _written(spy)
+        assert "sensor.test_mailbox_delivery_counter" in _written(spy)
+        assert hass.states.get("sensor.test_mailbox_delivery_counter").state == "2"
+
+    async def test_no_op_service_writes_nothing(
+        self, hass: HomeAssistant, mock_config_entry_binary
+    ):
+        await setup_integration(hass, mock_config_entry_binary)
+
+        with _spy_writes() as spy:
+            await hass.services.async_call(DOMAIN, SERVICE_MARK_EMPTY, {}, blocking=True)
+            await hass.async_block_till_done()
+
+        assert _written(spy) == []
+
+    async def test_entities_do_not_poll(
+        self, hass: HomeAssistant, mock_config_entry_binary
+    ):
+        await setup_integration(hass, mock_config_entry_binary)
+
+        entities = [
+            entity
+            for platform in hass.data["entity_components"].values()
+            for entity in platform.entities
+            if entity.unique_id
+            and entity.unique_id.startswith(mock_config_entry_binary.entry_id)
+        ]
+        assert entities
+        assert not any(entity.should_poll for entity in entities)
@@ -0,0 +1,69 @@
+"""Tests for the shared mailbox device descriptor."""
+
+from __future__ import annotations
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers import device_registry as dr
+
+from custom_components.smartmailbox.const import (
+    DOMAIN,
+    CONF_FLAP_ENTITY,
+    DEVICE_MANUFACTURER,
+    DEVICE_MODEL,
+)
+from custom_components.smartmailbox.device import CONFIGURATION_URL
+
+from .conftest import setup_integration
+
+
+def _mailbox_device(hass: HomeAssistant, entry) -> dr.DeviceEntry:
+    return dr.async_get(hass).async_get_device(identifiers={(DOMAIN, entry.entry_id)})
+
+
+# ---------------------------------------------------------------------------
+# Device descriptor
+# ---------------------------------------------------------------------------
+
+
+class TestDeviceInfo:
+    async def test_one_descriptor_for_all_entities(
+        self, hass: HomeAssistant, mock_config_entry_binary
+    ):
+        await setup_integration(hass, mock_config_entry_binary)
+        device_info = hass.data[DOMAIN][mock_config_entry_binary.entry_id][
+            "device_info"
+        ]
+
+        entities = [
+            entity
+            for platform in hass.data["entity_components"].values()
+            for entity in platform.entities
+            if entity.unique_id
+            and entity.unique_id.startswith(mock_config_entry_binary.entry_id)
+        ]
+        assert len(entities) >= 5
+        assert all(entity.device_info is device_info for entity in entities)
+
+    async def test_registry_entry(self, hass: HomeAssistant, mock_config_entry_binary):
+        await setup_integration(hass, mock_config_entry_binary)
+
+        device = _mailbox_device(hass, mock_config_entry_binary)
+        assert device.manufacturer == DEVICE_MANUFACTURER
+        assert device.model == DEVICE_MODEL
+        assert device.sw_version
+        assert device.hw_version is None
+        assert device.configuration_url == CONFIGURATION_URL
+
+    async def test_options_change_keeps_device(
+        self, hass: HomeAssistant, mock_config_entry_binary
+    ):
+        await setup_integration(hass, mock_config_entry_binary)
+        device = _mailbox_device(hass, mock_config_entry_binary)
+
+        hass.config_entries.async_update_entry(
+            mock_config_entry_binary,
+            options={CONF_FLAP_ENTITY: "binary_sensor.new_flap"},
+        )
+        await hass.async_block_till_done()
+
+        assert _mailbox_device(hass, mock_config_entry_binary).id == device.id
@@ -0,0 +1,65 @@
+"""Tests for the config entry diagnostics download."""
+
+from __future__ import annotations
+
+from homeassistant.components.diagnostics import REDACTED
+from homeassistant.core import HomeAssistant
+
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.smartmailbox.const import (
+    DOMAIN,
+    CONF_NOTIFY_SERVICE,
+    CONF_INSTRUMENTATION,
+)
+from custom_components.smartmailbox.diagnostics import (
+    async_get_config_entry_diagnostics,
+)
+
+from .conftest import _base_binary_data, setup_integration
+
+
+class TestDiagnostics:
+    async def test_loaded_entry(self, hass: HomeAssistant):
+        entry = MockConfigEntry(
+            domain=DOMAIN,
+            version=2,
+            data={**_base_binary_data(), CONF_NOTIFY_SERVICE: ["notify.jane_phone"]},
+            options={CONF_INSTRUMENTATION: True},
+            title="Test Mailbox",
+        )
+        await setup_integration(hass, entry)
+        hass.states.async_set("binary_sensor.flap", "on")
+        await hass.async_block_till_done()
+
+        diagnostics = await async_get_config_entry_diagnostics(hass, entry)
+
+        assert diagnostics["entry"]["data"][CONF_NOTIFY_SERVICE] == REDACTED
+        assert diagnostics["state"]["counter"] == 1
+        assert diagnostics["journal_events"] == 1
+        assert diagnostics["instrumentation"]["counters"]["accepted"] == 1
+        assert diagnostics["instrumentation"]["event_latency"]["count"] == 1
+        assert diagnostics["storage"]["pending"] is True
+        assert diagnostics["mailboxes"] == 1
+        assert diagnostics["preload"]["entries"] == 1
+
+    async def test_without_instrumentation(
+        self, hass: HomeAssistant, mock_config_entry_binary
+    ):
+        await setup_integration(hass, mock_config_entry_binary)
+
+        diagnostics = await async_get_config_entry_diagnostics(
+            hass, mock_config_entry_binary
+        )
+
+        assert diagnostics["instrumentation"] is None
+        assert diagnostics["storage"]["write_latency"]["count"] == 0
+
+    async def test_unloaded_entry(self, hass: HomeAssistant, mock_config_entry_binary):
+        mock_config_entry_binary.add_to_hass(hass)
+
+        diagnostics = await async_get_config_entry_diagnostics(
+            hass, mock_config_entry_binary
+        )
+
+        assert set(diagnostics) == {"entry"}
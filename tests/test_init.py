@@ -2,20 +2,27 @@
 
 from __future__ import annotations
 
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch
 
 import pytest
 from homeassistant.core import HomeAssistant
+from homeassistant.helpers import entity_registry as er
 from homeassistant.util import dt as dt_util
 
-from pytest_homeassistant_custom_component.common import MockConfigEntry
+from pytest_homeassistant_custom_component.common import (
+    MockConfigEntry,
+    async_fire_time_changed,
+)
 
 from custom_components.smartmailbox import (
     MailboxState,
+    _deserialize_state,
     _dt_to_iso,
-    _iso_to_dt,
+    _serialize_state,
     async_migrate_entry,
 )
+from custom_components.smartmailbox.storage import _iso_to_dt
 from custom_components.smartmailbox.const import (
     DOMAIN,
     CONF_NAME,
@@ -30,8 +37,10 @@ from custom_components.smartmailbox.const import (
     TRIGGER_MODE_THRESHOLD,
     SERVICE_RESET_COUNTER,
     SERVICE_MARK_EMPTY,
-    SIGNAL_PREFIX,
     STORAGE_KEY_PREFIX,
+    CONF_SAVE_DELAY,
+    DEFAULT_SAVE_DELAY,
+    CONF_ENABLE_COUNTER,
 )
 
 from .conftest import setup_integration
@@ -82,6 +91,39 @@ class TestIsoToDt:
         assert abs((original - restored).total_seconds()) < 1
 
 
+class TestMailboxState:
+    def test_timestamps_stored_as_epoch(self):
+        when = datetime(2025, 1, 1, 12, 0, 0, tzinfo=timezone.utc)
+        state = MailboxState(last_delivery=when)
+
+        assert state.last_delivery_ts == when.timestamp()
+        assert state.last_delivery == when
+        assert state.last_empty is None
+        assert not hasattr(state, "__dict__")
+
+    def test_serialize_roundtrip(self):
+        state = MailboxState(
+            post_present=True,
+            last_delivery=dt_util.utcnow(),
+            counter=3,
+            notified_for_current_post=True,
+        )
+
+        data = _serialize_state(state)
+        assert isinstance(data["last_delivery"], float)
+        assert data["last_empty"] is None
+
+        restored = _deserialize_state(data)
+        assert restored.last_delivery == state.last_delivery
+        assert restored.counter == 3
+        assert restored.post_present is True
+
+    def test_deserialize_ignores_bad_timestamps(self):
+        state = _deserialize_state({"last_delivery": "garbage", "last_empty": 0})
+        assert state.last_delivery is None
+        assert state.last_empty == datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
 # ---------------------------------------------------------------------------
 # Migration tests
 # ---------------------------------------------------------------------------
@@ -193,10 +235,72 @@ class TestSetup:
 
         assert state.post_present is True
         assert state.counter == 5
-        assert state.last_delivery is not None
+        assert state.last_delivery == datetime(2025, 1, 1, 12, tzinfo=timezone.utc)
         assert state.notified_for_current_post is True
 
 
+# ---------------------------------------------------------------------------
+# Persistence tests
+# ---------------------------------------------------------------------------
+
+
+class TestPersistence:
+    async def test_burst_is_coalesced_into_one_delayed_write(
+        self, hass: HomeAssistant, hass_storage, freezer, mock_config_entry_binary
+    ):
+        await setup_integration(hass, mock_config_entry_binary)
+        storage_key = f"{STORAGE_KEY_PREFIX}{mock_config_entry_binary.entry_id}"
+
+        hass.states.async_set("binary_sensor.flap", "on")
+        await hass.async_block_till_done()
+        await hass.services.async_call(DOMAIN, SERVICE_RESET_COUNTER, {}, blocking=True)
+        await hass.async_block_till_done()
+
+        # Nothing is written inside the flush window
+        assert storage_key not in hass_storage
+
+        freezer.tick(timedelta(seconds=DEFAULT_SAVE_DELAY + 1))
+        async_fire_time_changed(hass)
+        await hass.async_block_till_done()
+
+        data = hass_storage[storage_key]["data"]
+        assert data["post_present"] is True
+        assert data["counter"] == 0
+
+    async def test_unload_flushes_pending_write(
+        self, hass: HomeAssistant, hass_storage, mock_config_entry_binary
+    ):
+        await setup_integration(hass, mock_config_entry_binary)
+        storage_key = f"{STORAGE_KEY_PREFIX}{mock_config_entry_binary.entry_id}"
+
+        hass.states.async_set("binary_sensor.flap", "on")
+        await hass.async_block_till_done()
+        assert storage_key not in hass_storage
+
+        await hass.config_entries.async_unload(mock_config_entry_binary.entry_id)
+        await hass.async_block_till_done()
+
+        assert hass_storage[storage_key]["data"]["counter"] == 1
+
+    async def test_flush_window_from_options(self, hass: HomeAssistant):
+        entry = MockConfigEntry(
+            domain=DOMAIN,
+            version=2,
+            data={
+                CONF_NAME: "Test Mailbox",
+                CONF_FLAP_ENTITY: "binary_sensor.flap",
+                CONF_DOOR_ENTITY: "binary_sensor.door",
+                CONF_FLAP_TRIGGER_MODE: TRIGGER_MODE_BINARY,
+                CONF_DOOR_TRIGGER_MODE: TRIGGER_MODE_BINARY,
+            },
+            options={CONF_SAVE_DELAY: 30},
+            title="Test Mailbox",
+        )
+        await setup_integration(hass, entry)
+
+        assert hass.data[DOMAIN][entry.entry_id]["store"].delay == 30
+
+
 # ---------------------------------------------------------------------------
 # Service tests
 # ---------------------------------------------------------------------------
@@ -294,6 +398,73 @@ class TestServices:
         assert state.notified_for_current_post is False
 
 
+# ---------------------------------------------------------------------------
+# Options updates
+# ---------------------------------------------------------------------------
+
+
+class TestOptionsUpdate:
+    async def test_trigger_options_applied_in_place(
+        self, hass: HomeAssistant, mock_config_entry_binary
+    ):
+        entry = mock_config_entry_binary
+        await setup_integration(hass, entry)
+        data = hass.data[DOMAIN][entry.entry_id]
+        router = hass.data[DOMAIN]["_router"]
+        door_tracker = router._unsubs["binary_sensor.door"]
+        hass.states.async_set("binary_sensor.new_flap", "off")
+
+        with patch.object(hass.config_entries, "async_reload") as reload:
+            hass.config_entries.async_update_entry(
+                entry,
+                options={
+                    CONF_FLAP_ENTITY: "binary_sensor.new_flap",
+                    CONF_SAVE_DELAY: 30,
+                },
+            )
+            await hass.async_block_till_done()
+
+        reload.assert_not_called()
+        assert hass.data[DOMAIN][entry.entry_id] is data
+        assert data["store"].delay == data["journal"].delay == 30
+        # The door keeps its tracker; only the flap is rewired
+        assert router._unsubs["binary_sensor.door"] is door_tracker
+        assert router.entity_ids == {"binary_sensor.new_flap", "binary_sensor.door"}
+
+        hass.states.async_set("binary_sensor.flap", "on")
+        await hass.async_block_till_done()
+        assert data["state"].counter == 0
+        hass.states.async_set("binary_sensor.new_flap", "on")
+        await hass.async_block_till_done()
+        await hass.async_block_till_done()
+        assert data["state"].counter == 1
+
+        post = hass.states.get(
+            er.async_get(hass).async_get_entity_id(
+                "binary_sensor", DOMAIN, f"{entry.entry_id}_mailbox_post"
+            )
+        )
+        assert post.state == "on"
+
+    async def test_entity_composition_change_reloads(
+        self, hass: HomeAssistant, mock_config_entry_binary
+    ):
+        entry = mock_config_entry_binary
+        await setup_integration(hass, entry)
+        counter_id = er.async_get(hass).async_get_entity_id(
+            "sensor", DOMAIN, f"{entry.entry_id}_mailbox_delivery_counter"
+        )
+        assert hass.states.get(counter_id) is not None
+
+        hass.config_entries.async_update_entry(
+            entry, options={CONF_ENABLE_COUNTER: False}
+        )
+        await hass.async_block_till_done()
+
+        # The entity is no longer provided; its registry entry is left behind
+        assert hass.states.get(counter_id).state == "unavailable"
+
+
 # ---------------------------------------------------------------------------
 # Unload tests
 # ---------------------------------------------------------------------------
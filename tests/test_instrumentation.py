@@ -0,0 +1,113 @@
+"""Tests for the hot-path instrumentation and diagnostic sensors."""
+
+from __future__ import annotations
+
+from datetime import timedelta
+from time import monotonic
+from unittest.mock import patch
+
+from homeassistant.core import HomeAssistant
+from homeassistant.util import dt as dt_util
+
+from pytest_homeassistant_custom_component.common import (
+    MockConfigEntry,
+    async_fire_time_changed,
+)
+
+from custom_components.smartmailbox.const import DOMAIN, CONF_INSTRUMENTATION
+from custom_components.smartmailbox.instrumentation import LatencyHistogram
+
+from .conftest import _base_binary_data, setup_integration
+
+
+async def _setup_instrumented(hass: HomeAssistant) -> MockConfigEntry:
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        version=2,
+        data=_base_binary_data(),
+        options={CONF_INSTRUMENTATION: True},
+        title="Test Mailbox",
+    )
+    hass.states.async_set("binary_sensor.flap", "off")
+    hass.states.async_set("binary_sensor.door", "off")
+    entry.add_to_hass(hass)
+    await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+    return entry
+
+
+# ---------------------------------------------------------------------------
+# Histogram
+# ---------------------------------------------------------------------------
+
+
+class TestLatencyHistogram:
+    def test_empty(self):
+        assert LatencyHistogram().as_dict()["mean_ms"] is None
+
+    def test_records_into_buckets(self):
+        histogram = LatencyHistogram()
+        for seconds in (0.00005, 0.002, 0.004, 7.0):
+            histogram.record(seconds)
+
+        result = histogram.as_dict()
+        assert result["count"] == 4
+        assert result["max_ms"] == 7000.0
+        assert result["mean_ms"] == 1751.513
+        assert result["buckets_ms"]["0.1"] == 1
+        assert result["buckets_ms"]["5"] == 2
+        assert result["buckets_ms"]["inf"] == 1
+
+
+# ---------------------------------------------------------------------------
+# Mailbox counters
+# ---------------------------------------------------------------------------
+
+
+class TestMailboxStats:
+    async def test_disabled_by_default(
+        self, hass: HomeAssistant, mock_config_entry_binary
+    ):
+        await setup_integration(hass, mock_config_entry_binary)
+
+        assert hass.data[DOMAIN][mock_config_entry_binary.entry_id]["stats"] is None
+        assert hass.states.get("sensor.test_mailbox_trigger_events") is None
+
+    async def test_events_counted(self, hass: HomeAssistant):
+        entry = await _setup_instrumented(hass)
+        stats = hass.data[DOMAIN][entry.entry_id]["stats"]
+
+        hass.states.async_set("binary_sensor.flap", "on")
+        hass.states.async_set("binary_sensor.flap", "off")
+        hass.states.async_set("binary_sensor.flap", "on")  # debounced
+        hass.states.async_set("binary_sensor.door", "unavailable")
+        with patch(
+            "custom_components.smartmailbox.trigger.monotonic",
+            return_value=monotonic() + 5,
+        ):
+            hass.states.async_set("binary_sensor.door", "on")  # from unavailable
+            await hass.async_block_till_done()
+
+        assert stats.counters == {
+            "received": 5,
+            "ignored_unavailable": 2,
+            "debounced": 1,
+            "accepted": 1,
+        }
+        assert stats.event_latency.count == 5
+
+    async def test_diagnostic_sensors(self, hass: HomeAssistant):
+        await _setup_instrumented(hass)
+        hass.states.async_set("binary_sensor.flap", "on")
+        await hass.async_block_till_done()
+
+        # The sensors are polled, not written from the event path
+        async_fire_time_changed(hass, dt_util.utcnow() + timedelta(seconds=31))
+        await hass.async_block_till_done()
+
+        events = hass.states.get("sensor.test_mailbox_trigger_events")
+        assert events.state == "1"
+        assert events.attributes["accepted"] == 1
+        latency = hass.states.get("sensor.test_mailbox_trigger_latency")
+        assert float(latency.state) >= 0
+        assert latency.attributes["unit_of_measurement"] == "ms"
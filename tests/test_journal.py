@@ -0,0 +1,229 @@
+"""Tests for the delivery/empty event journal."""
+
+from __future__ import annotations
+
+import asyncio
+import os
+from datetime import timedelta
+from unittest.mock import patch
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.storage import STORAGE_DIR
+from homeassistant.util import dt as dt_util
+
+from custom_components.smartmailbox.const import (
+    DOMAIN,
+    JOURNAL_EVENT_COUNTER_RESET,
+    JOURNAL_EVENT_DELIVERY,
+    JOURNAL_EVENT_EMPTY,
+    JOURNAL_KEY_PREFIX,
+    ROLE_DOOR,
+    ROLE_FLAP,
+    SERVICE_RESET_COUNTER,
+    SOURCE_BUTTON,
+    SOURCE_SERVICE,
+)
+from custom_components.smartmailbox.journal import MailboxJournal
+
+from .conftest import setup_integration
+
+
+def _journal_path(hass: HomeAssistant, entry_id: str) -> str:
+    return hass.config.path(STORAGE_DIR, f"{JOURNAL_KEY_PREFIX}{entry_id}")
+
+
+def _read(path: str) -> list[str]:
+    with open(path, encoding="utf-8") as fp:
+        return fp.readlines()
+
+
+# ---------------------------------------------------------------------------
+# Ring buffer
+# ---------------------------------------------------------------------------
+
+
+class TestRingBuffer:
+    async def test_events_oldest_first(self, hass: HomeAssistant):
+        journal = MailboxJournal(hass, "abc", delay=0, capacity=3)
+        start = dt_util.utcnow()
+
+        for minutes in range(5):
+            journal.async_append(
+                JOURNAL_EVENT_DELIVERY, ROLE_FLAP, start + timedelta(minutes=minutes)
+            )
+
+        events = journal.events()
+        assert len(journal) == 3
+        assert [e["time"] for e in events] == [
+            start + timedelta(minutes=m) for m in (2, 3, 4)
+        ]
+        assert events[0]["event"] == JOURNAL_EVENT_DELIVERY
+        assert events[0]["source"] == ROLE_FLAP
+
+        await journal.async_flush()
+
+    async def test_flush_appends_only_new_lines(self, hass: HomeAssistant):
+        journal = MailboxJournal(hass, "abc", delay=0, capacity=10)
+        path = _journal_path(hass, "abc")
+
+        journal.async_append(JOURNAL_EVENT_DELIVERY, ROLE_FLAP, dt_util.utcnow())
+        await journal.async_flush()
+        assert len(_read(path)) == 1
+
+        journal.async_append(JOURNAL_EVENT_EMPTY, ROLE_DOOR, dt_util.utcnow())
+        await journal.async_flush()
+        assert len(_read(path)) == 2
+
+    async def test_file_is_compacted(self, hass: HomeAssistant):
+        journal = MailboxJournal(hass, "abc", delay=0, capacity=2)
+        path = _journal_path(hass, "abc")
+
+        for _ in range(5):
+            journal.async_append(JOURNAL_EVENT_DELIVERY, ROLE_FLAP, dt_util.utcnow())
+            await journal.async_flush()
+
+        assert len(_read(path)) <= 4
+
+    async def test_compaction_failure_keeps_old_file(self, hass: HomeAssistant):
+        journal = MailboxJournal(hass, "abc", delay=0, capacity=2)
+        path = _journal_path(hass, "abc")
+        for _ in range(4):
+            journal.async_append(JOURNAL_EVENT_DELIVERY, ROLE_FLAP, dt_util.utcnow())
+            await journal.async_flush()
+        before = _read(path)
+
+        journal.async_append(JOURNAL_EVENT_EMPTY, ROLE_DOOR, dt_util.utcnow())
+        with patch("os.replace", side_effect=OSError("disk gone")):
+            await journal.async_flush()
+
+        assert _read(path) == before
+
+    async def test_failed_append_kept_for_next_flush(self, hass: HomeAssistant):
+        journal = MailboxJournal(hass, "abc", delay=0, capacity=10)
+        path = _journal_path(hass, "abc")
+        journal.async_append(JOURNAL_EVENT_DELIVERY, ROLE_FLAP, dt_util.utcnow())
+        with patch(
+            "custom_components.smartmailbox.journal.open",
+            side_effect=OSError("disk full"),
+            create=True,
+        ):
+            await journal.async_flush()
+        assert not os.path.exists(path)
+
+        journal.async_append(JOURNAL_EVENT_EMPTY, ROLE_DOOR, dt_util.utcnow())
+        await journal.async_flush()
+
+        reloaded = MailboxJournal(hass, "abc", delay=0, capacity=10)
+        await reloaded.async_load()
+        assert [event["event"] for event in reloaded.events()] == [
+            JOURNAL_EVENT_DELIVERY,
+            JOURNAL_EVENT_EMPTY,
+        ]
+
+    async def test_append_waits_for_compaction(self, hass: HomeAssistant):
+        journal = MailboxJournal(hass, "abc", delay=0, capacity=2)
+        for _ in range(4):
+            journal.async_append(JOURNAL_EVENT_DELIVERY, ROLE_FLAP, dt_util.utcnow())
+        await journal.async_flush()
+
+        journal.async_append(JOURNAL_EVENT_DELIVERY, ROLE_FLAP, dt_util.utcnow())
+        compaction = hass.async_create_task(journal.async_flush())
+        await asyncio.sleep(0)
+        journal.async_append(JOURNAL_EVENT_EMPTY, ROLE_DOOR, dt_util.utcnow())
+        await asyncio.gather(compaction, journal.async_flush())
+
+        assert len(_read(_journal_path(hass, "abc"))) == 3
+        reloaded = MailboxJournal(hass, "abc", delay=0, capacity=2)
+        await reloaded.async_load()
+        assert reloaded.events()[-1]["event"] == JOURNAL_EVENT_EMPTY
+
+    async def test_load_restores_tail(self, hass: HomeAssistant):
+        journal = MailboxJournal(hass, "abc", delay=0, capacity=10)
+        start = dt_util.utcnow()
+        journal.async_append(JOURNAL_EVENT_DELIVERY, ROLE_FLAP, start)
+        journal.async_append(JOURNAL_EVENT_EMPTY, SOURCE_BUTTON, start)
+        await journal.async_flush()
+
+        # Corrupt lines are skipped on load
+        with open(_journal_path(hass, "abc"), "a", encoding="utf-8") as fp:
+            fp.write("garbage\n1.0,99,0\n")
+
+        restored = MailboxJournal(hass, "abc", delay=0, capacity=10)
+        await restored.async_load()
+
+        assert [(e["event"], e["source"]) for e in restored.events()] == [
+            (JOURNAL_EVENT_DELIVERY, ROLE_FLAP),
+            (JOURNAL_EVENT_EMPTY, SOURCE_BUTTON),
+        ]
+        assert abs((restored.events()[0]["time"] - start).total_seconds()) < 0.01
+
+
+# ---------------------------------------------------------------------------
+# Integration
+# ---------------------------------------------------------------------------
+
+
+class TestJournalIntegration:
+    async def test_records_flap_door_and_service(
+        self, hass: HomeAssistant, mock_config_entry_binary
+    ):
+        await setup_integration(hass, mock_config_entry_binary)
+        journal = hass.data[DOMAIN][mock_config_entry_binary.entry_id]["journal"]
+
+        hass.states.async_set("binary_sensor.flap", "on")
+        await hass.async_block_till_done()
+        hass.states.async_set("binary_sensor.door", "on")
+        await hass.async_block_till_done()
+        await hass.services.async_call(DOMAIN, SERVICE_RESET_COUNTER, {}, blocking=True)
+
+        assert [(e["event"], e["source"]) for e in journal.events()] == [
+            (JOURNAL_EVENT_DELIVERY, ROLE_FLAP),
+            (JOURNAL_EVENT_EMPTY, ROLE_DOOR),
+            (JOURNAL_EVENT_COUNTER_RESET, SOURCE_SERVICE),
+        ]
+
+    async def test_button_press_recorded(
+        self, hass: HomeAssistant, mock_config_entry_binary
+    ):
+        await setup_integration(hass, mock_config_entry_binary)
+        journal = hass.data[DOMAIN][mock_config_entry_binary.entry_id]["journal"]
+
+        await hass.services.async_call(
+            "button",
+            "press",
+            {"entity_id": "button.test_mailbox_mark_as_empty"},
+            blocking=True,
+        )
+
+        assert journal.events()[-1]["source"] == SOURCE_BUTTON
+
+    async def test_unload_flushes_journal(
+        self, hass: HomeAssistant, mock_config_entry_binary
+    ):
+        await setup_integration(hass, mock_config_entry_binary)
+        path = _journal_path(hass, mock_config_entry_binary.entry_id)
+
+        hass.states.async_set("binary_sensor.flap", "on")
+        await hass.async_block_till_done()
+        assert not os.path.exists(path)
+
+        await hass.config_entries.async_unload(mock_config_entry_binary.entry_id)
+        await hass.async_block_till_done()
+
+        assert len(_read(path)) == 1
+
+    async def test_remove_entry_deletes_journal(
+        self, hass: HomeAssistant, mock_config_entry_binary
+    ):
+        await setup_integration(hass, mock_config_entry_binary)
+        path = _journal_path(hass, mock_config_entry_binary.entry_id)
+        hass.states.async_set("binary_sensor.flap", "on")
+        await hass.async_block_till_done()
+        await hass.config_entries.async_unload(mock_config_entry_binary.entry_id)
+        await hass.async_block_till_done()
+        assert os.path.exists(path)
+
+        await hass.config_entries.async_remove(mock_config_entry_binary.entry_id)
+        await hass.async_block_till_done()
+
+        assert not os.path.exists(path)
@@ -0,0 +1,303 @@
+"""Tests for the notification dispatcher and default message cache."""
+
+from __future__ import annotations
+
+import asyncio
+from datetime import timedelta
+from unittest.mock import AsyncMock, patch
+
+from homeassistant.core import HomeAssistant, ServiceCall
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers.translation import async_get_translations
+from homeassistant.util import dt as dt_util
+
+from pytest_homeassistant_custom_component.common import (
+    MockConfigEntry,
+    async_fire_time_changed,
+)
+
+from custom_components.smartmailbox.const import (
+    DOMAIN,
+    CONF_NOTIFY_ENABLED,
+    CONF_NOTIFY_SERVICE,
+    CONF_NOTIFY_MESSAGE,
+    CONF_NOTIFY_COALESCE_SECONDS,
+)
+from custom_components.smartmailbox.notifications import (
+    NotificationDispatcher,
+    async_get_default_messages,
+    coalesce_messages,
+)
+
+from .conftest import make_mailbox_entry, wait_for_notifications
+
+
+def _entry(idx: int, notify: bool = True, **options) -> MockConfigEntry:
+    return make_mailbox_entry(
+        idx,
+        data={CONF_NOTIFY_ENABLED: notify, CONF_NOTIFY_SERVICE: ["notify.test"]},
+        options=options,
+    )
+
+
+async def _setup_bank(hass: HomeAssistant, count: int, **kwargs) -> None:
+    for idx in range(count):
+        hass.states.async_set(f"binary_sensor.flap{idx}", "off")
+        entry = _entry(idx, **kwargs)
+        entry.add_to_hass(hass)
+        await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+
+
+def _register(hass: HomeAssistant, fail: int = 0) -> list[ServiceCall]:
+    """Register notify.test; the first `fail` calls raise."""
+    calls: list[ServiceCall] = []
+
+    async def _notify(call: ServiceCall) -> None:
+        calls.append(call)
+        if len(calls) <= fail:
+            raise HomeAssistantError("backend down")
+
+    hass.services.async_register("notify", "test", _notify)
+    return calls
+
+
+# ---------------------------------------------------------------------------
+# Dispatcher unit tests
+# ---------------------------------------------------------------------------
+
+
+class TestCoalesceMessages:
+    def test_single_message_unchanged(self):
+        assert coalesce_messages(["Mail!"]) == "Mail!"
+
+    def test_identical_messages_counted(self):
+        assert coalesce_messages(["Mail!"] * 3) == "3× Mail!"
+
+    def test_distinct_messages_joined(self):
+        assert coalesce_messages(["A", "B", "A"]) == "A\nB"
+
+
+class TestNotificationDispatcher:
+    async def test_sends_to_every_service(self, hass: HomeAssistant):
+        calls = _register(hass)
+        dispatcher = NotificationDispatcher(hass)
+
+        dispatcher.async_notify([("notify", "test"), ("notify", "test")], "Mail!")
+        await wait_for_notifications(hass, dispatcher)
+
+        assert [call.data["message"] for call in calls] == ["Mail!", "Mail!"]
+        assert dispatcher.metrics["sent"] == 2
+        assert dispatcher.metrics["latency"]["count"] == 2
+
+    async def test_retries_with_backoff(self, hass: HomeAssistant):
+        calls = _register(hass, fail=2)
+        dispatcher = NotificationDispatcher(hass, backoff=0.01)
+
+        dispatcher.async_notify([("notify", "test")], "Mail!")
+        await wait_for_notifications(hass, dispatcher)
+
+        assert len(calls) == 3
+        assert dispatcher.metrics["retried"] == 2
+        assert dispatcher.metrics["sent"] == 1
+        assert dispatcher.metrics["failed"] == 0
+
+    async def test_gives_up_and_counts_failure(self, hass: HomeAssistant):
+        calls = _register(hass, fail=10)
+        dispatcher = NotificationDispatcher(hass, retries=1, backoff=0.01)
+
+        dispatcher.async_notify([("notify", "test")], "Mail!")
+        await wait_for_notifications(hass, dispatcher)
+
+        assert len(calls) == 2
+        assert dispatcher.metrics["failed"] == 1
+        assert dispatcher.metrics["failures"] == {"notify.test": 1}
+        assert dispatcher.metrics["latency"]["count"] == 0
+
+    async def test_missing_service_not_retried(self, hass: HomeAssistant):
+        dispatcher = NotificationDispatcher(hass, backoff=0.01)
+
+        dispatcher.async_notify([("notify", "missing")], "Mail!")
+        await wait_for_notifications(hass, dispatcher)
+
+        assert dispatcher.metrics["retried"] == 0
+        assert dispatcher.metrics["failures"] == {"notify.missing": 1}
+
+    async def test_full_queue_drops_oldest(self, hass: HomeAssistant):
+        calls = _register(hass)
+        dispatcher = NotificationDispatcher(hass, max_queue=2, concurrency=1)
+
+        # Nothing runs until the loop yields, so all three land in the queue
+        for idx in range(3):
+            dispatcher.async_notify([("notify", "test")], f"msg {idx}")
+        await wait_for_notifications(hass, dispatcher)
+
+        assert [call.data["message"] for call in calls] == ["msg 1", "msg 2"]
+        assert dispatcher.metrics["dropped"] == 1
+
+    async def test_rate_limit_per_service(self, hass: HomeAssistant):
+        _register(hass)
+        dispatcher = NotificationDispatcher(hass, burst=2, rate=1.0)
+
+        with patch(
+            "custom_components.smartmailbox.notifications.monotonic",
+            return_value=100.0,
+        ):
+            waits = [dispatcher._reserve(("notify", "test")) for _ in range(4)]
+            other = dispatcher._reserve(("notify", "other"))
+
+        assert waits == [0.0, 0.0, 1.0, 2.0]
+        assert other == 0.0
+
+    async def test_throttled_service_does_not_delay_others(self, hass: HomeAssistant):
+        sent: list[str] = []
+
+        async def _notify(call: ServiceCall) -> None:
+            sent.append(f"{call.service} {call.data['message']}")
+
+        hass.services.async_register("notify", "alice", _notify)
+        hass.services.async_register("notify", "bob", _notify)
+        dispatcher = NotificationDispatcher(hass, concurrency=1, burst=1, rate=10.0)
+
+        for idx in range(3):
+            dispatcher.async_notify([("notify", "alice")], f"msg {idx}")
+        dispatcher.async_notify([("notify", "bob")], "msg 0")
+        await hass.async_block_till_done()
+
+        # Alice's throttled messages wait on timers, not in the only worker
+        assert sent == ["alice msg 0", "bob msg 0"]
+        assert dispatcher.metrics["deferred"] == 2
+
+        await wait_for_notifications(hass, dispatcher)
+        assert sent[2:] == ["alice msg 1", "alice msg 2"]
+
+    async def test_full_queue_drops_oldest_deferred(self, hass: HomeAssistant):
+        calls = _register(hass)
+        dispatcher = NotificationDispatcher(
+            hass, max_queue=2, concurrency=1, burst=1, rate=10.0
+        )
+
+        for idx in range(2):
+            dispatcher.async_notify([("notify", "test")], f"msg {idx}")
+        await hass.async_block_till_done()
+        # msg 1 waits for a token and is the oldest message when msg 3 arrives
+        for idx in range(2, 4):
+            dispatcher.async_notify([("notify", "test")], f"msg {idx}")
+        await wait_for_notifications(hass, dispatcher)
+
+        assert [call.data["message"] for call in calls] == ["msg 0", "msg 2", "msg 3"]
+        assert dispatcher.metrics["dropped"] == 1
+
+    async def test_coalesces_within_window(self, hass: HomeAssistant):
+        calls = _register(hass)
+        dispatcher = NotificationDispatcher(hass)
+
+        for _ in range(3):
+            dispatcher.async_notify([("notify", "test")], "Mail!", window=10)
+        await wait_for_notifications(hass, dispatcher)
+        assert calls == []
+
+        async_fire_time_changed(hass, dt_util.utcnow() + timedelta(seconds=11))
+        await wait_for_notifications(hass, dispatcher)
+
+        assert [call.data["message"] for call in calls] == ["3× Mail!"]
+        assert dispatcher.metrics["coalesced"] == 2
+
+
+# ---------------------------------------------------------------------------
+# Mailbox bank integration
+# ---------------------------------------------------------------------------
+
+
+class TestMailboxBank:
+    async def test_burst_across_mailboxes_is_coalesced(self, hass: HomeAssistant):
+        calls = _register(hass)
+        await _setup_bank(
+            hass,
+            5,
+            **{CONF_NOTIFY_MESSAGE: "New mail", CONF_NOTIFY_COALESCE_SECONDS: 30},
+        )
+
+        for idx in range(5):
+            hass.states.async_set(f"binary_sensor.flap{idx}", "on")
+        await wait_for_notifications(hass)
+        assert calls == []
+
+        async_fire_time_changed(hass, dt_util.utcnow() + timedelta(seconds=31))
+        await wait_for_notifications(hass)
+
+        assert [call.data["message"] for call in calls] == ["5× New mail"]
+
+
+# ---------------------------------------------------------------------------
+# Default message cache
+# ---------------------------------------------------------------------------
+
+_TRANSLATIONS = "custom_components.smartmailbox.notifications.async_get_translations"
+
+
+class TestDefaultMessages:
+    async def test_loaded_once_for_many_mailboxes(self, hass: HomeAssistant):
+        calls = _register(hass)
+        with patch(_TRANSLATIONS, wraps=async_get_translations) as load:
+            await _setup_bank(hass, 5)
+        assert load.call_count == 1
+
+        hass.states.async_set("binary_sensor.flap3", "on")
+        await wait_for_notifications(hass)
+        assert calls[0].data["message"] == "\U0001f4ec New mail in the mailbox!"
+
+    async def test_not_loaded_without_notifications(self, hass: HomeAssistant):
+        with patch(_TRANSLATIONS, AsyncMock(return_value={})) as load:
+            await _setup_bank(hass, 3, notify=False)
+        assert load.call_count == 0
+
+    async def test_reloaded_after_language_change(self, hass: HomeAssistant):
+        await _setup_bank(hass, 1)
+        assert (await async_get_default_messages(hass))[0].endswith(
+            "New mail in the mailbox!"
+        )
+
+        await hass.config.async_update(language="de")
+        await hass.async_block_till_done()
+
+        assert (await async_get_default_messages(hass))[0].endswith(
+            "Neue Post im Briefkasten!"
+        )
+
+
+# ---------------------------------------------------------------------------
+# Background workers
+# ---------------------------------------------------------------------------
+
+
+class TestWorkers:
+    async def test_slow_backend_does_not_block(self, hass: HomeAssistant):
+        _register(hass, fail=10)
+        dispatcher = NotificationDispatcher(hass, backoff=30)
+
+        dispatcher.async_notify([("notify", "test")], "Mail!")
+        # Retry backoff is spent in a background task
+        async with asyncio.timeout(5):
+            await hass.async_block_till_done()
+        assert dispatcher.metrics["workers"] == 1
+
+        dispatcher.async_shutdown()
+        await hass.async_block_till_done()
+        await asyncio.sleep(0)
+        assert dispatcher.metrics["workers"] == 0
+
+    async def test_last_unload_stops_dispatcher(self, hass: HomeAssistant):
+        _register(hass)
+        await _setup_bank(hass, 1, **{CONF_NOTIFY_COALESCE_SECONDS: 30})
+        dispatcher = hass.data[DOMAIN]["_notifier"]
+        hass.states.async_set("binary_sensor.flap0", "on")
+        await hass.async_block_till_done()
+        assert dispatcher._pending
+
+        entry = hass.config_entries.async_entries(DOMAIN)[0]
+        assert await hass.config_entries.async_unload(entry.entry_id)
+        await hass.async_block_till_done()
+
+        assert not dispatcher._pending
+        assert "_notifier" not in hass.data[DOMAIN]
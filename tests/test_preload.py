@@ -0,0 +1,95 @@
+"""Tests for the concurrent state preload at startup."""
+
+from __future__ import annotations
+
+from unittest.mock import patch
+
+from homeassistant.config_entries import ConfigEntryState
+from homeassistant.core import HomeAssistant
+
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.smartmailbox.const import (
+    DOMAIN,
+    STORAGE_KEY_PREFIX,
+    STORAGE_VERSION,
+)
+from custom_components.smartmailbox.storage import MailboxStore
+
+from .conftest import make_mailbox_entry
+
+
+def _stored(hass_storage, entry: MockConfigEntry, counter: int) -> None:
+    hass_storage[f"{STORAGE_KEY_PREFIX}{entry.entry_id}"] = {
+        "version": STORAGE_VERSION,
+        "key": f"{STORAGE_KEY_PREFIX}{entry.entry_id}",
+        "data": {"counter": counter, "post_present": True},
+    }
+
+
+# ---------------------------------------------------------------------------
+# Startup preload
+# ---------------------------------------------------------------------------
+
+
+class TestPreload:
+    async def test_all_entries_loaded_in_one_pass(
+        self, hass: HomeAssistant, hass_storage
+    ):
+        entries = [make_mailbox_entry(idx) for idx in range(5)]
+        for idx, entry in enumerate(entries):
+            _stored(hass_storage, entry, idx + 10)
+            entry.add_to_hass(hass)
+
+        loads = []
+        original = MailboxStore.async_load
+
+        async def _counting_load(store):
+            loads.append(store)
+            return await original(store)
+
+        with patch.object(MailboxStore, "async_load", _counting_load):
+            # Setting up the first entry sets up the whole domain
+            await hass.config_entries.async_setup(entries[0].entry_id)
+            await hass.async_block_till_done()
+
+        assert len(loads) == 5
+        assert all(e.state is ConfigEntryState.LOADED for e in entries)
+        counters = [hass.data[DOMAIN][e.entry_id]["state"].counter for e in entries]
+        assert counters == [10, 11, 12, 13, 14]
+
+        preloader = hass.data[DOMAIN]["_preload"]
+        assert preloader._loaded == {}
+        assert preloader.stats["entries"] == 5
+        assert preloader.stats["preload_seconds"] is not None
+        assert preloader.stats["setup_seconds"] >= preloader.stats["preload_seconds"]
+
+    async def test_reload_reads_from_disk(self, hass: HomeAssistant, hass_storage):
+        entry = make_mailbox_entry(0)
+        _stored(hass_storage, entry, 3)
+        entry.add_to_hass(hass)
+        await hass.config_entries.async_setup(entry.entry_id)
+        await hass.async_block_till_done()
+
+        _stored(hass_storage, entry, 7)
+        await hass.config_entries.async_reload(entry.entry_id)
+        await hass.async_block_till_done()
+
+        assert hass.data[DOMAIN][entry.entry_id]["state"].counter == 7
+
+    async def test_entry_added_later_loads_itself(
+        self, hass: HomeAssistant, hass_storage
+    ):
+        first = make_mailbox_entry(0)
+        first.add_to_hass(hass)
+        await hass.config_entries.async_setup(first.entry_id)
+        await hass.async_block_till_done()
+
+        later = make_mailbox_entry(1)
+        _stored(hass_storage, later, 4)
+        later.add_to_hass(hass)
+        await hass.config_entries.async_setup(later.entry_id)
+        await hass.async_block_till_done()
+
+        assert hass.data[DOMAIN][later.entry_id]["state"].counter == 4
+        assert hass.data[DOMAIN]["_preload"].stats["entries"] == 1
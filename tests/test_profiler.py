@@ -0,0 +1,122 @@
+"""Tests for the profile service."""
+
+from __future__ import annotations
+
+import asyncio
+import cProfile
+import os
+import pstats
+from unittest.mock import Mock
+
+import pytest
+from homeassistant.core import Event, HomeAssistant, callback
+from homeassistant.exceptions import HomeAssistantError
+
+from custom_components.smartmailbox.const import DOMAIN, SERVICE_PROFILE
+from custom_components.smartmailbox.profiler import DomainProfiler
+
+from .conftest import setup_integration
+
+
+def _names(stats: pstats.Stats) -> set[str]:
+    return {name for _, _, name in stats.stats}
+
+
+class TestProfileService:
+    async def test_profiles_entry_points_only(
+        self, hass: HomeAssistant, mock_config_entry_binary
+    ):
+        await setup_integration(hass, mock_config_entry_binary)
+
+        @callback
+        def _unrelated_listener(event: Event) -> None:
+            pass
+
+        hass.bus.async_listen("unrelated_event", _unrelated_listener)
+
+        call = hass.async_create_task(
+            hass.services.async_call(
+                DOMAIN,
+                SERVICE_PROFILE,
+                {"seconds": 1},
+                blocking=True,
+                return_response=True,
+            )
+        )
+        await asyncio.sleep(0)
+        hass.states.async_set("binary_sensor.flap", "on")
+        hass.bus.async_fire("unrelated_event")
+        response = await call
+
+        assert os.path.dirname(response["path"]) == hass.config.config_dir
+        stats = pstats.Stats(response["path"])
+        assert len(stats.stats) == response["functions"]
+        assert {"_async_route", "_changed"} <= _names(stats)
+        # Other callbacks on the loop run unprofiled
+        assert "_unrelated_listener" not in _names(stats)
+
+    async def test_one_profile_at_a_time(
+        self, hass: HomeAssistant, mock_config_entry_binary
+    ):
+        await setup_integration(hass, mock_config_entry_binary)
+
+        first = hass.async_create_task(
+            hass.services.async_call(
+                DOMAIN, SERVICE_PROFILE, {"seconds": 1}, blocking=True
+            )
+        )
+        await asyncio.sleep(0)
+        with pytest.raises(HomeAssistantError):
+            await hass.services.async_call(
+                DOMAIN, SERVICE_PROFILE, {"seconds": 1}, blocking=True
+            )
+        await first
+
+
+class TestDomainProfiler:
+    def test_nested_entry_points_stay_profiled(self, hass: HomeAssistant):
+        profiler = DomainProfiler(hass)
+        profiler.profile = cProfile.Profile()
+
+        def _inner() -> None:
+            pass
+
+        def _after_inner() -> None:
+            pass
+
+        def _outer() -> int:
+            profiler.run(_inner)
+            _after_inner()
+            return 1
+
+        assert profiler.run(_outer) == 1
+        assert {"_outer", "_inner", "_after_inner"} <= _names(
+            pstats.Stats(profiler.profile)
+        )
+
+    def test_not_running_calls_through(self, hass: HomeAssistant):
+        profiler = DomainProfiler(hass)
+
+        assert profiler.run(len, "abc") == 3
+        assert profiler.running is False
+
+    def test_other_profiler_active_calls_through(self, hass: HomeAssistant):
+        profiler = DomainProfiler(hass)
+        profiler.profile = cProfile.Profile()
+        other = cProfile.Profile()
+        other.enable()
+        try:
+            assert profiler.run(len, "abc") == 3
+        finally:
+            other.disable()
+
+    def test_enable_failure_stops_session(self, hass: HomeAssistant):
+        profiler = DomainProfiler(hass)
+        profiler.profile = Mock(
+            enable=Mock(side_effect=ValueError("Another profiling tool is active"))
+        )
+
+        assert profiler.run(len, "abc") == 3
+        assert profiler.running is False
+        # Later entry points no longer try to profile
+        assert profiler.run(len, "abcd") == 4
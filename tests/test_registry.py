@@ -0,0 +1,220 @@
+"""Tests for the mailbox registry (service targeting and batched saves)."""
+
+from __future__ import annotations
+
+from datetime import timedelta
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers import area_registry as ar
+from homeassistant.helpers import device_registry as dr
+from homeassistant.helpers import entity_registry as er
+
+from pytest_homeassistant_custom_component.common import (
+    MockConfigEntry,
+    async_fire_time_changed,
+)
+
+from custom_components.smartmailbox.const import (
+    DOMAIN,
+    SERVICE_RESET_COUNTER,
+    SERVICE_MARK_EMPTY,
+    SERVICE_GET_STATE,
+    STORAGE_KEY_PREFIX,
+    DEFAULT_SAVE_DELAY,
+)
+
+from .conftest import make_mailbox_entry
+
+
+async def _setup_many(hass: HomeAssistant, count: int) -> list[MockConfigEntry]:
+    entries = []
+    for idx in range(count):
+        hass.states.async_set(f"binary_sensor.flap{idx}", "off")
+        hass.states.async_set(f"binary_sensor.door{idx}", "off")
+        entry = make_mailbox_entry(idx)
+        entry.add_to_hass(hass)
+        await hass.config_entries.async_setup(entry.entry_id)
+        entries.append(entry)
+    await hass.async_block_till_done()
+    for entry in entries:
+        hass.data[DOMAIN][entry.entry_id]["state"].counter = 5
+    return entries
+
+
+def _device_id(hass: HomeAssistant, entry: MockConfigEntry) -> str:
+    device_registry = dr.async_get(hass)
+    return device_registry.async_get_device(identifiers={(DOMAIN, entry.entry_id)}).id
+
+
+def _counters(hass: HomeAssistant, entries: list[MockConfigEntry]) -> list[int]:
+    return [hass.data[DOMAIN][e.entry_id]["state"].counter for e in entries]
+
+
+# ---------------------------------------------------------------------------
+# Lookup tests
+# ---------------------------------------------------------------------------
+
+
+class TestResolve:
+    async def test_all_when_no_target(self, hass: HomeAssistant):
+        entries = await _setup_many(hass, 3)
+        registry = hass.data[DOMAIN]["_registry"]
+
+        assert set(registry.async_resolve()) == {e.entry_id for e in entries}
+        assert len(registry) == 3
+
+    async def test_by_entry_device_and_area(self, hass: HomeAssistant):
+        entries = await _setup_many(hass, 3)
+        registry = hass.data[DOMAIN]["_registry"]
+
+        area = ar.async_get(hass).async_create("Hallway")
+        dr.async_get(hass).async_update_device(
+            _device_id(hass, entries[2]), area_id=area.id
+        )
+
+        assert set(registry.async_resolve(entry_ids=[entries[0].entry_id])) == {
+            entries[0].entry_id
+        }
+        assert set(
+            registry.async_resolve(device_ids=[_device_id(hass, entries[1])])
+        ) == {entries[1].entry_id}
+        assert set(registry.async_resolve(area_ids=[area.id])) == {
+            entries[2].entry_id
+        }
+        assert registry.async_resolve(entry_ids=["unknown"]) == {}
+
+    async def test_unload_removes_from_registry(self, hass: HomeAssistant):
+        entries = await _setup_many(hass, 2)
+        registry = hass.data[DOMAIN]["_registry"]
+
+        await hass.config_entries.async_unload(entries[0].entry_id)
+        await hass.async_block_till_done()
+
+        assert entries[0].entry_id not in registry
+        assert entries[1].entry_id in registry
+
+
+# ---------------------------------------------------------------------------
+# Service targeting and batched saves
+# ---------------------------------------------------------------------------
+
+
+class TestServiceTargets:
+    async def test_reset_counter_by_device(self, hass: HomeAssistant):
+        entries = await _setup_many(hass, 3)
+
+        await hass.services.async_call(
+            DOMAIN,
+            SERVICE_RESET_COUNTER,
+            {"device_id": _device_id(hass, entries[1])},
+            blocking=True,
+        )
+
+        assert _counters(hass, entries) == [5, 0, 5]
+
+    async def test_entry_id_list(self, hass: HomeAssistant):
+        entries = await _setup_many(hass, 3)
+
+        await hass.services.async_call(
+            DOMAIN,
+            SERVICE_RESET_COUNTER,
+            {"entry_id": [entries[0].entry_id, entries[2].entry_id]},
+            blocking=True,
+        )
+
+        assert _counters(hass, entries) == [0, 5, 0]
+
+    async def test_area_and_entity_targets(self, hass: HomeAssistant):
+        entries = await _setup_many(hass, 3)
+        area = ar.async_get(hass).async_create("Hallway")
+        dr.async_get(hass).async_update_device(
+            _device_id(hass, entries[0]), area_id=area.id
+        )
+        counter_entity = er.async_get(hass).async_get_entity_id(
+            "sensor", DOMAIN, f"{entries[2].entry_id}_mailbox_delivery_counter"
+        )
+
+        await hass.services.async_call(
+            DOMAIN,
+            SERVICE_RESET_COUNTER,
+            {"area_id": area.id, "entity_id": counter_entity},
+            blocking=True,
+        )
+
+        assert _counters(hass, entries) == [0, 5, 0]
+
+    async def test_unmatched_target_touches_nothing(self, hass: HomeAssistant):
+        entries = await _setup_many(hass, 2)
+
+        await hass.services.async_call(
+            DOMAIN, SERVICE_RESET_COUNTER, {"device_id": "missing"}, blocking=True
+        )
+
+        assert _counters(hass, entries) == [5, 5]
+
+    async def test_batch_is_flushed_once(
+        self, hass: HomeAssistant, hass_storage, freezer
+    ):
+        entries = await _setup_many(hass, 4)
+        registry = hass.data[DOMAIN]["_registry"]
+
+        await hass.services.async_call(DOMAIN, SERVICE_MARK_EMPTY, {}, blocking=True)
+        await hass.services.async_call(DOMAIN, SERVICE_RESET_COUNTER, {}, blocking=True)
+
+        # One shared timer for every touched mailbox, nothing written yet
+        assert registry._unsub_flush is not None
+        assert len(registry._dirty) == 4
+        for entry in entries:
+            assert f"{STORAGE_KEY_PREFIX}{entry.entry_id}" not in hass_storage
+
+        freezer.tick(timedelta(seconds=DEFAULT_SAVE_DELAY + 1))
+        async_fire_time_changed(hass)
+        await hass.async_block_till_done()
+
+        assert registry._unsub_flush is None
+        for entry in entries:
+            data = hass_storage[f"{STORAGE_KEY_PREFIX}{entry.entry_id}"]["data"]
+            assert data["counter"] == 0
+
+
+# ---------------------------------------------------------------------------
+# get_state service
+# ---------------------------------------------------------------------------
+
+
+class TestGetState:
+    async def test_returns_many_mailboxes(self, hass: HomeAssistant):
+        entries = await _setup_many(hass, 3)
+        hass.states.async_set("binary_sensor.flap1", "on")
+        await hass.async_block_till_done()
+
+        response = await hass.services.async_call(
+            DOMAIN, SERVICE_GET_STATE, {}, blocking=True, return_response=True
+        )
+
+        mailboxes = response["mailboxes"]
+        assert set(mailboxes) == {e.entry_id for e in entries}
+        second = mailboxes[entries[1].entry_id]
+        assert second["title"] == "Mailbox 1"
+        assert second["post_present"] is True
+        assert second["counter"] == 6
+        assert isinstance(second["last_delivery"], str)
+        assert "journal" not in second
+
+    async def test_targeted_with_journal(self, hass: HomeAssistant):
+        entries = await _setup_many(hass, 2)
+        hass.states.async_set("binary_sensor.flap0", "on")
+        await hass.async_block_till_done()
+
+        response = await hass.services.async_call(
+            DOMAIN,
+            SERVICE_GET_STATE,
+            {"entry_id": entries[0].entry_id, "include_journal": True},
+            blocking=True,
+            return_response=True,
+        )
+
+        mailbox = response["mailboxes"][entries[0].entry_id]
+        assert list(response["mailboxes"]) == [entries[0].entry_id]
+        assert [event["event"] for event in mailbox["journal"]] == ["delivery"]
+        assert mailbox["journal"][0]["source"] == "flap"
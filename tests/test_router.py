@@ -0,0 +1,144 @@
+"""Tests for the domain-wide state-change router."""
+
+from __future__ import annotations
+
+from homeassistant.core import HomeAssistant
+
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.smartmailbox.const import (
+    DOMAIN,
+    CONF_NAME,
+    CONF_FLAP_ENTITY,
+    CONF_DOOR_ENTITY,
+    CONF_DEBOUNCE_SECONDS,
+    CONF_FLAP_TRIGGER_MODE,
+    CONF_DOOR_TRIGGER_MODE,
+    TRIGGER_MODE_BINARY,
+    ROLE_FLAP,
+    ROLE_DOOR,
+)
+from custom_components.smartmailbox.router import StateChangeRouter
+
+
+def _tracked(router: StateChangeRouter) -> set[str]:
+    return set(router._unsubs)
+
+
+# ---------------------------------------------------------------------------
+# Router unit tests
+# ---------------------------------------------------------------------------
+
+
+class TestStateChangeRouter:
+    async def test_dispatches_to_every_route(self, hass: HomeAssistant):
+        router = StateChangeRouter(hass)
+        seen = []
+        router.async_set_entry(
+            "a", {"binary_sensor.shared": ROLE_FLAP}, lambda e: seen.append("a")
+        )
+        router.async_set_entry(
+            "b", {"binary_sensor.shared": ROLE_DOOR}, lambda e: seen.append("b")
+        )
+
+        hass.states.async_set("binary_sensor.shared", "on")
+        await hass.async_block_till_done()
+
+        assert seen == ["a", "b"]
+        assert [r.role for r in router.routes("binary_sensor.shared")] == [
+            ROLE_FLAP,
+            ROLE_DOOR,
+        ]
+        # One tracker for the shared entity
+        assert _tracked(router) == {"binary_sensor.shared"}
+
+    async def test_incremental_replace_and_remove(self, hass: HomeAssistant):
+        router = StateChangeRouter(hass)
+        seen = []
+        router.async_set_entry(
+            "a",
+            {"binary_sensor.flap": ROLE_FLAP, "binary_sensor.door": ROLE_DOOR},
+            lambda e: seen.append(e.data["entity_id"]),
+        )
+        router.async_set_entry("b", {"binary_sensor.door": ROLE_DOOR}, lambda e: None)
+
+        # Options change: entry "a" now watches a different flap
+        router.async_set_entry(
+            "a",
+            {"binary_sensor.flap2": ROLE_FLAP, "binary_sensor.door": ROLE_DOOR},
+            lambda e: seen.append(e.data["entity_id"]),
+        )
+        assert router.entity_ids == {"binary_sensor.flap2", "binary_sensor.door"}
+        assert _tracked(router) == router.entity_ids
+
+        hass.states.async_set("binary_sensor.flap", "on")
+        hass.states.async_set("binary_sensor.flap2", "on")
+        await hass.async_block_till_done()
+        assert seen == ["binary_sensor.flap2"]
+
+        # The door stays tracked while entry "b" still watches it
+        router.async_remove_entry("a")
+        assert router.entity_ids == {"binary_sensor.door"}
+        router.async_remove_entry("b")
+        assert router.entity_ids == set()
+        assert _tracked(router) == set()
+
+    async def test_failing_handler_does_not_block_others(self, hass: HomeAssistant):
+        router = StateChangeRouter(hass)
+        seen = []
+
+        def _boom(event):
+            raise RuntimeError("boom")
+
+        router.async_set_entry("a", {"sensor.angle": ROLE_FLAP}, _boom)
+        router.async_set_entry("b", {"sensor.angle": ROLE_FLAP}, seen.append)
+
+        hass.states.async_set("sensor.angle", "42")
+        await hass.async_block_till_done()
+
+        assert len(seen) == 1
+
+
+# ---------------------------------------------------------------------------
+# Shared sensors across mailboxes
+# ---------------------------------------------------------------------------
+
+
+class TestSharedSensor:
+    async def test_one_flap_feeds_several_mailboxes(self, hass: HomeAssistant):
+        hass.states.async_set("binary_sensor.building_flap", "off")
+        entries = []
+        for idx in (1, 2, 3):
+            hass.states.async_set(f"binary_sensor.door{idx}", "off")
+            entry = MockConfigEntry(
+                domain=DOMAIN,
+                version=2,
+                data={
+                    CONF_NAME: f"Flat {idx}",
+                    CONF_FLAP_ENTITY: "binary_sensor.building_flap",
+                    CONF_DOOR_ENTITY: f"binary_sensor.door{idx}",
+                    CONF_DEBOUNCE_SECONDS: 3,
+                    CONF_FLAP_TRIGGER_MODE: TRIGGER_MODE_BINARY,
+                    CONF_DOOR_TRIGGER_MODE: TRIGGER_MODE_BINARY,
+                },
+                title=f"Flat {idx}",
+            )
+            entry.add_to_hass(hass)
+            await hass.config_entries.async_setup(entry.entry_id)
+            entries.append(entry)
+        await hass.async_block_till_done()
+
+        router = hass.data[DOMAIN]["_router"]
+        assert len(router.routes("binary_sensor.building_flap")) == 3
+        assert len(_tracked(router)) == 4
+
+        hass.states.async_set("binary_sensor.building_flap", "on")
+        await hass.async_block_till_done()
+        counters = [hass.data[DOMAIN][e.entry_id]["state"].counter for e in entries]
+        assert counters == [1, 1, 1]
+
+        # Unloading one flat keeps the others subscribed
+        await hass.config_entries.async_unload(entries[0].entry_id)
+        await hass.async_block_till_done()
+        assert len(router.routes("binary_sensor.building_flap")) == 2
+        assert "binary_sensor.door1" not in router.entity_ids
@@ -29,6 +29,7 @@ from custom_components.smartmailbox.const import (
     CONF_AGE_UNIT,
     TRIGGER_MODE_BINARY,
 )
+from custom_components.smartmailbox.sensor import _next_age_change
 
 from .conftest import setup_integration
 
@@ -127,6 +128,10 @@ class TestMailAgeSensor:
         two_hours_ago = dt_util.utcnow() - timedelta(hours=2)
         state_ref.post_present = True
         state_ref.last_delivery = two_hours_ago
+        # Age is refreshed when the mailbox state changes, then on schedule
+        hass.data[DOMAIN][mock_config_entry_binary.entry_id][
+            "coordinator"
+        ].async_update_listeners()
 
         # Force update via time interval
         async_fire_time_changed(hass, dt_util.utcnow() + timedelta(minutes=1))
@@ -165,6 +170,7 @@ class TestMailAgeSensor:
         state_ref = hass.data[DOMAIN][entry.entry_id]["state"]
         state_ref.post_present = True
         state_ref.last_delivery = dt_util.utcnow() - timedelta(days=2)
+        hass.data[DOMAIN][entry.entry_id]["coordinator"].async_update_listeners()
 
         async_fire_time_changed(hass, dt_util.utcnow() + timedelta(minutes=1))
         await hass.async_block_till_done()
@@ -214,6 +220,113 @@ class TestMailAgeSensor:
         assert entity_state is None
 
 
+class TestNextAgeChange:
+    def test_hours_first_step(self):
+        start = dt_util.utcnow()
+        # 0.00 h → 0.01 h happens at 0.005 h = 18 s
+        change = _next_age_change(start, start, 3600)
+        assert abs((change - start).total_seconds() - 18) < 0.01
+
+    def test_hours_after_boundary(self):
+        start = dt_util.utcnow()
+        change = _next_age_change(start, start + timedelta(seconds=18.5), 3600)
+        assert abs((change - start).total_seconds() - 54) < 0.01
+
+    def test_days_step(self):
+        start = dt_util.utcnow()
+        now = start + timedelta(days=2)
+        change = _next_age_change(start, now, 86400)
+        # One day has 100 steps of 864 s; the next change is half a step ahead
+        assert abs((change - now).total_seconds() - 432) < 0.01
+
+    def test_always_in_future(self):
+        start = dt_util.utcnow()
+        # Exactly on a boundary must schedule the following one
+        now = start + timedelta(seconds=18)
+        assert _next_age_change(start, now, 3600) > now
+
+
+class TestMailAgeScheduler:
+    async def _setup_two(self, hass: HomeAssistant) -> list[MockConfigEntry]:
+        entries = []
+        for idx in (1, 2):
+            entry = MockConfigEntry(
+                domain=DOMAIN,
+                version=2,
+                data={
+                    CONF_NAME: f"Mailbox {idx}",
+                    CONF_FLAP_ENTITY: f"binary_sensor.flap{idx}",
+                    CONF_DOOR_ENTITY: f"binary_sensor.door{idx}",
+                    CONF_DEBOUNCE_SECONDS: 3,
+                    CONF_NOTIFY_ENABLED: False,
+                    CONF_NOTIFY_SERVICE: [],
+                    CONF_FLAP_TRIGGER_MODE: TRIGGER_MODE_BINARY,
+                    CONF_DOOR_TRIGGER_MODE: TRIGGER_MODE_BINARY,
+                },
+                title=f"Mailbox {idx}",
+            )
+            hass.states.async_set(f"binary_sensor.flap{idx}", "off")
+            hass.states.async_set(f"binary_sensor.door{idx}", "off")
+            entry.add_to_hass(hass)
+            await hass.config_entries.async_setup(entry.entry_id)
+            entries.append(entry)
+        await hass.async_block_till_done()
+        return entries
+
+    async def test_no_timer_without_mail(self, hass: HomeAssistant):
+        await self._setup_two(hass)
+        scheduler = hass.data[DOMAIN]["_age_scheduler"]
+
+        assert not scheduler._due
+        assert scheduler._unsub is None
+
+    async def test_single_timer_for_earliest_deadline(self, hass: HomeAssistant):
+        await self._setup_two(hass)
+        scheduler = hass.data[DOMAIN]["_age_scheduler"]
+
+        hass.states.async_set("binary_sensor.flap1", "on")
+        hass.states.async_set("binary_sensor.flap2", "on")
+        await hass.async_block_till_done()
+
+        assert len(scheduler._due) == 2
+        assert scheduler._next == min(scheduler._due.values())
+
+        # Emptying one mailbox drops its deadline
+        hass.states.async_set("binary_sensor.door1", "on")
+        await hass.async_block_till_done()
+
+        assert len(scheduler._due) == 1
+
+    async def test_refresh_when_rounded_value_changes(
+        self, hass: HomeAssistant, freezer, mock_config_entry_binary
+    ):
+        await setup_integration(hass, mock_config_entry_binary)
+
+        hass.states.async_set("binary_sensor.flap", "on")
+        await hass.async_block_till_done()
+        assert hass.states.get("sensor.test_mailbox_mail_age").state == "0.0"
+
+        freezer.tick(timedelta(seconds=20))
+        async_fire_time_changed(hass)
+        await hass.async_block_till_done()
+
+        assert hass.states.get("sensor.test_mailbox_mail_age").state == "0.01"
+
+    async def test_unload_stops_timer(self, hass: HomeAssistant):
+        entries = await self._setup_two(hass)
+        scheduler = hass.data[DOMAIN]["_age_scheduler"]
+        hass.states.async_set("binary_sensor.flap1", "on")
+        await hass.async_block_till_done()
+        assert scheduler._unsub is not None
+
+        for entry in entries:
+            await hass.config_entries.async_unload(entry.entry_id)
+        await hass.async_block_till_done()
+
+        assert not scheduler._due
+        assert scheduler._unsub is None
+
+
 # ---------------------------------------------------------------------------
 # Dispatcher tests
 # ---------------------------------------------------------------------------
@@ -0,0 +1,245 @@
+"""Tests for the per-entry and shared state storage backends."""
+
+from __future__ import annotations
+
+from datetime import timedelta
+
+from homeassistant.const import EVENT_HOMEASSISTANT_FINAL_WRITE
+from homeassistant.core import HomeAssistant
+
+from pytest_homeassistant_custom_component.common import (
+    MockConfigEntry,
+    async_fire_time_changed,
+)
+
+from custom_components.smartmailbox.const import (
+    DOMAIN,
+    CONF_STORAGE_BACKEND,
+    CONF_SAVE_DELAY,
+    STORAGE_BACKEND_ENTRY,
+    STORAGE_BACKEND_SHARED,
+    STORAGE_KEY_PREFIX,
+    STORAGE_KEY_SHARED,
+    STORAGE_VERSION,
+    DEFAULT_SAVE_DELAY,
+)
+from custom_components.smartmailbox.storage import SharedStateStore
+
+from .conftest import make_mailbox_entry
+
+
+def _entry(
+    idx: int, backend: str = STORAGE_BACKEND_SHARED, **options
+) -> MockConfigEntry:
+    return make_mailbox_entry(idx, options={CONF_STORAGE_BACKEND: backend, **options})
+
+
+async def _setup(hass: HomeAssistant, entries: list[MockConfigEntry]) -> None:
+    for idx, entry in enumerate(entries):
+        hass.states.async_set(f"binary_sensor.flap{idx}", "off")
+        entry.add_to_hass(hass)
+    await hass.config_entries.async_setup(entries[0].entry_id)
+    await hass.async_block_till_done()
+
+
+def _entry_key(entry: MockConfigEntry) -> str:
+    return f"{STORAGE_KEY_PREFIX}{entry.entry_id}"
+
+
+# ---------------------------------------------------------------------------
+# Shared backend
+# ---------------------------------------------------------------------------
+
+
+class TestSharedStore:
+    async def test_fleet_written_to_one_file(
+        self, hass: HomeAssistant, hass_storage, freezer
+    ):
+        entries = [_entry(idx) for idx in range(3)]
+        await _setup(hass, entries)
+
+        for idx in range(3):
+            hass.states.async_set(f"binary_sensor.flap{idx}", "on")
+        await hass.async_block_till_done()
+        assert STORAGE_KEY_SHARED not in hass_storage
+
+        freezer.tick(timedelta(seconds=DEFAULT_SAVE_DELAY + 1))
+        async_fire_time_changed(hass)
+        await hass.async_block_till_done()
+
+        stored = hass_storage[STORAGE_KEY_SHARED]
+        assert stored["version"] == STORAGE_VERSION
+        assert {
+            entry_id: data["counter"]
+            for entry_id, data in stored["data"]["entries"].items()
+        } == {entry.entry_id: 1 for entry in entries}
+        assert not any(_entry_key(entry) in hass_storage for entry in entries)
+
+    async def test_short_window_not_postponed_by_long_one(
+        self, hass: HomeAssistant, hass_storage, freezer
+    ):
+        entries = [
+            _entry(0, **{CONF_SAVE_DELAY: 300}),
+            _entry(1, **{CONF_SAVE_DELAY: 5}),
+        ]
+        await _setup(hass, entries)
+
+        hass.states.async_set("binary_sensor.flap1", "on")
+        hass.states.async_set("binary_sensor.flap0", "on")
+        await hass.async_block_till_done()
+
+        freezer.tick(timedelta(seconds=6))
+        async_fire_time_changed(hass)
+        await hass.async_block_till_done()
+
+        # Written at the short deadline, with every entry pending by then
+        stored = hass_storage[STORAGE_KEY_SHARED]["data"]["entries"]
+        assert {entry_id: data["counter"] for entry_id, data in stored.items()} == {
+            entry.entry_id: 1 for entry in entries
+        }
+
+    async def test_rearmed_window_delays_write(
+        self, hass: HomeAssistant, hass_storage, freezer
+    ):
+        shared = SharedStateStore(hass)
+        shared.async_schedule_save("a", lambda: {"counter": 1}, 10)
+
+        freezer.tick(timedelta(seconds=6))
+        async_fire_time_changed(hass)
+        shared.async_schedule_save("a", lambda: {"counter": 2}, 10)
+        await hass.async_block_till_done()
+
+        # The first deadline passes, but the entry has re-armed its window
+        freezer.tick(timedelta(seconds=6))
+        async_fire_time_changed(hass)
+        await hass.async_block_till_done()
+        assert STORAGE_KEY_SHARED not in hass_storage
+
+        freezer.tick(timedelta(seconds=6))
+        async_fire_time_changed(hass)
+        await hass.async_block_till_done()
+        assert hass_storage[STORAGE_KEY_SHARED]["data"]["entries"] == {
+            "a": {"counter": 2}
+        }
+
+    async def test_final_write_flushes_pending(self, hass: HomeAssistant, hass_storage):
+        shared = SharedStateStore(hass)
+        shared.async_schedule_save("a", lambda: {"counter": 1}, 300)
+
+        hass.bus.async_fire(EVENT_HOMEASSISTANT_FINAL_WRITE)
+        await hass.async_block_till_done()
+
+        assert hass_storage[STORAGE_KEY_SHARED]["data"]["entries"] == {
+            "a": {"counter": 1}
+        }
+
+    async def test_unload_flushes_shared_file(self, hass: HomeAssistant, hass_storage):
+        entry = _entry(0)
+        await _setup(hass, [entry])
+        hass.states.async_set("binary_sensor.flap0", "on")
+        await hass.async_block_till_done()
+
+        await hass.config_entries.async_unload(entry.entry_id)
+        await hass.async_block_till_done()
+
+        entries = hass_storage[STORAGE_KEY_SHARED]["data"]["entries"]
+        assert entries[entry.entry_id]["post_present"] is True
+        assert hass.data[DOMAIN]["_shared_store"].write_latency.count == 1
+
+    async def test_removed_entry_dropped(self, hass: HomeAssistant, hass_storage):
+        entries = [_entry(idx) for idx in range(2)]
+        hass_storage[STORAGE_KEY_SHARED] = {
+            "version": STORAGE_VERSION,
+            "key": STORAGE_KEY_SHARED,
+            "data": {"entries": {e.entry_id: {"counter": 2} for e in entries}},
+        }
+        await _setup(hass, entries)
+
+        await hass.config_entries.async_remove(entries[0].entry_id)
+        await hass.async_block_till_done()
+        async_fire_time_changed(hass)
+        await hass.async_block_till_done()
+
+        assert set(hass_storage[STORAGE_KEY_SHARED]["data"]["entries"]) == {
+            entries[1].entry_id
+        }
+
+
+# ---------------------------------------------------------------------------
+# Migration between backends
+# ---------------------------------------------------------------------------
+
+
+class TestMigration:
+    async def test_v1_entry_files_moved_into_shared_file(
+        self, hass: HomeAssistant, hass_storage
+    ):
+        entries = [_entry(idx) for idx in range(3)]
+        for idx, entry in enumerate(entries):
+            hass_storage[_entry_key(entry)] = {
+                "version": 1,
+                "key": _entry_key(entry),
+                "data": {"counter": idx + 1, "post_present": True},
+            }
+
+        await _setup(hass, entries)
+
+        counters = [hass.data[DOMAIN][e.entry_id]["state"].counter for e in entries]
+        assert counters == [1, 2, 3]
+        shared = hass_storage[STORAGE_KEY_SHARED]["data"]["entries"]
+        assert {e.entry_id: shared[e.entry_id]["counter"] for e in entries} == {
+            e.entry_id: idx + 1 for idx, e in enumerate(entries)
+        }
+        assert not any(_entry_key(entry) in hass_storage for entry in entries)
+
+    async def test_switch_back_to_entry_file(self, hass: HomeAssistant, hass_storage):
+        entry = _entry(0, backend=STORAGE_BACKEND_ENTRY)
+        other = _entry(1)
+        hass_storage[STORAGE_KEY_SHARED] = {
+            "version": STORAGE_VERSION,
+            "key": STORAGE_KEY_SHARED,
+            "data": {
+                "entries": {entry.entry_id: {"counter": 9}, other.entry_id: {}}
+            },
+        }
+
+        await _setup(hass, [entry, other])
+        async_fire_time_changed(hass)
+        await hass.async_block_till_done()
+
+        assert hass.data[DOMAIN][entry.entry_id]["state"].counter == 9
+        assert hass_storage[_entry_key(entry)]["data"]["counter"] == 9
+        assert set(hass_storage[STORAGE_KEY_SHARED]["data"]["entries"]) == {
+            other.entry_id
+        }
+
+    async def test_v2_iso_timestamps_converted(self, hass: HomeAssistant, hass_storage):
+        entry = _entry(0)
+        hass_storage[STORAGE_KEY_SHARED] = {
+            "version": 2,
+            "key": STORAGE_KEY_SHARED,
+            "data": {
+                "entries": {
+                    entry.entry_id: {
+                        "counter": 1,
+                        "last_delivery": "2025-01-01T12:00:00+00:00",
+                        "last_empty": None,
+                    }
+                }
+            },
+        }
+
+        await _setup(hass, [entry])
+        state = hass.data[DOMAIN][entry.entry_id]["state"]
+        assert state.last_delivery_ts == 1735732800.0
+        assert state.last_empty is None
+
+        hass.states.async_set("binary_sensor.flap0", "on")
+        await hass.async_block_till_done()
+        await hass.config_entries.async_unload(entry.entry_id)
+        await hass.async_block_till_done()
+
+        stored = hass_storage[STORAGE_KEY_SHARED]
+        assert stored["version"] == STORAGE_VERSION
+        saved = stored["data"]["entries"][entry.entry_id]
+        assert isinstance(saved["last_delivery"], float)
@@ -0,0 +1,478 @@
+"""Tests for the compiled trigger plan."""
+
+from __future__ import annotations
+
+from unittest.mock import patch
+
+import pytest
+from homeassistant.core import Event, State
+
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.smartmailbox.const import (
+    DOMAIN,
+    CONF_DEBOUNCE_SECONDS,
+    CONF_DOOR_DEBOUNCE_SECONDS,
+    CONF_NOTIFY_ENABLED,
+    CONF_NOTIFY_SERVICE,
+    CONF_NOTIFY_MESSAGE,
+    CONF_DOOR_NOTIFY_ENABLED,
+    CONF_DOOR_NOTIFY_SERVICE,
+    CONF_RESET_ON_EMPTY,
+    CONF_FLAP_ENTITY,
+    CONF_DOOR_ENTITY,
+    CONF_FLAP_DWELL,
+    CONF_FLAP_HYSTERESIS,
+    CONF_FLAP_THRESHOLD,
+    CONF_FLAP_TRIGGER_MODE,
+    CONF_FLAP_FILTER,
+    CONF_FLAP_FILTER_WINDOW,
+    CONF_FLAP_ATTRIBUTE,
+    CONF_FLAP_EVENT_TYPE,
+    CONF_FLAP_EVENT_DATA,
+    CONF_DOOR_TRIGGER_MODE,
+    FILTER_NONE,
+    FILTER_EMA,
+    FILTER_MEDIAN,
+    FILTER_MEDIAN_EMA,
+    THRESHOLD_DIRECTION_ABOVE,
+    THRESHOLD_DIRECTION_BELOW,
+    TRIGGER_MODE_BINARY,
+    TRIGGER_MODE_THRESHOLD,
+    TRIGGER_MODE_ATTRIBUTE,
+    ROLE_FLAP,
+    ROLE_DOOR,
+)
+from custom_components.smartmailbox.trigger import (
+    _make_attribute_getter,
+    _make_evaluator,
+    _make_event_filter,
+    _make_filter,
+    _make_value_trigger,
+    _make_holds,
+    _parse_services,
+    RateLimiter,
+    compile_trigger_plan,
+)
+
+
+def _states(entity_id: str, old: str, new: str) -> tuple[State, State]:
+    return State(entity_id, new), State(entity_id, old)
+
+
+class TestParseServices:
+    def test_list(self):
+        assert _parse_services(["notify.phone", "notify.tablet"]) == (
+            ("notify", "phone"),
+            ("notify", "tablet"),
+        )
+
+    def test_legacy_comma_string(self):
+        assert _parse_services("phone, notify.tablet,") == (
+            ("notify", "phone"),
+            ("notify", "tablet"),
+        )
+
+    def test_empty(self):
+        assert _parse_services([]) == ()
+        assert _parse_services(None) == ()
+
+
+def _run(evaluate, values: list[str]) -> list[bool]:
+    """Feed consecutive sensor values through an evaluator."""
+    return [
+        evaluate(State("sensor.angle", new), State("sensor.angle", old))
+        for old, new in zip(values, values[1:])
+    ]
+
+
+class TestHysteresis:
+    def test_jitter_around_threshold_fires_once(self):
+        evaluate = _make_evaluator(
+            TRIGGER_MODE_THRESHOLD, 30.0, THRESHOLD_DIRECTION_ABOVE, 5.0
+        )
+
+        assert _run(evaluate, ["10", "31", "29", "31", "28", "32"]) == [
+            True, False, False, False, False
+        ]
+
+    def test_rearms_past_band(self):
+        evaluate = _make_evaluator(
+            TRIGGER_MODE_THRESHOLD, 30.0, THRESHOLD_DIRECTION_ABOVE, 5.0
+        )
+
+        assert _run(evaluate, ["10", "31", "25", "31"]) == [True, False, True]
+
+    def test_below_direction(self):
+        evaluate = _make_evaluator(
+            TRIGGER_MODE_THRESHOLD, 30.0, THRESHOLD_DIRECTION_BELOW, 5.0
+        )
+
+        assert _run(evaluate, ["50", "29", "31", "29", "36", "30"]) == [
+            True, False, False, False, True
+        ]
+
+    def test_starts_disarmed_when_already_triggered(self):
+        evaluate = _make_evaluator(
+            TRIGGER_MODE_THRESHOLD, 30.0, THRESHOLD_DIRECTION_ABOVE, 5.0
+        )
+
+        assert _run(evaluate, ["40", "35", "20", "35"]) == [False, False, True]
+
+    def test_zero_hysteresis_is_edge_detection(self):
+        evaluate = _make_evaluator(
+            TRIGGER_MODE_THRESHOLD, 30.0, THRESHOLD_DIRECTION_ABOVE, 0.0
+        )
+
+        assert _run(evaluate, ["10", "31", "29", "31"]) == [True, False, True]
+
+
+class TestHolds:
+    def test_threshold(self):
+        holds = _make_holds(TRIGGER_MODE_THRESHOLD, 30.0, THRESHOLD_DIRECTION_ABOVE)
+
+        assert holds(State("sensor.angle", "30")) is True
+        assert holds(State("sensor.angle", "29.9")) is False
+        assert holds(State("sensor.angle", "abc")) is False
+
+    def test_hysteresis_holds_down_to_rearm_level(self):
+        holds = _make_holds(
+            TRIGGER_MODE_THRESHOLD, 30.0, THRESHOLD_DIRECTION_BELOW, 5.0
+        )
+
+        assert holds(State("sensor.angle", "34.9")) is True
+        assert holds(State("sensor.angle", "35")) is False
+
+    def test_binary(self):
+        holds = _make_holds("binary", 30.0, THRESHOLD_DIRECTION_ABOVE)
+
+        assert holds(State("binary_sensor.flap", "on")) is True
+        assert holds(State("binary_sensor.flap", "off")) is False
+
+
+class TestCompileTriggerPlan:
+    def test_binary_plan(self, mock_config_entry_binary):
+        plan = compile_trigger_plan(mock_config_entry_binary)
+
+        assert set(plan.triggers) == {"binary_sensor.flap", "binary_sensor.door"}
+        assert plan.triggers["binary_sensor.flap"].role == ROLE_FLAP
+        assert plan.triggers["binary_sensor.door"].role == ROLE_DOOR
+        assert plan.triggers["binary_sensor.flap"].debounce == 3.0
+        # Door events are not debounced unless configured
+        assert plan.triggers["binary_sensor.door"].debounce == 0.0
+        assert plan.notify_services == ()
+        assert plan.reset_on_empty is False
+
+        evaluate = plan.triggers["binary_sensor.flap"].evaluate
+        assert evaluate(*_states("binary_sensor.flap", "off", "on")) is True
+        assert evaluate(*_states("binary_sensor.flap", "on", "off")) is False
+
+    def test_threshold_plan(self, mock_config_entry_threshold):
+        plan = compile_trigger_plan(mock_config_entry_threshold)
+        evaluate = plan.triggers["sensor.flap_angle"].evaluate
+
+        assert evaluate(*_states("sensor.flap_angle", "10", "35")) is True
+        assert evaluate(*_states("sensor.flap_angle", "35", "40")) is False
+        assert evaluate(*_states("sensor.flap_angle", "10", "abc")) is False
+
+    def test_plan_is_immutable(self, mock_config_entry_binary):
+        plan = compile_trigger_plan(mock_config_entry_binary)
+
+        with pytest.raises(AttributeError):
+            plan.reset_on_empty = True
+        with pytest.raises(TypeError):
+            plan.triggers["sensor.other"] = plan.triggers["binary_sensor.flap"]
+
+    def test_options_override_data(self):
+        entry = MockConfigEntry(
+            domain=DOMAIN,
+            version=2,
+            data={
+                CONF_FLAP_ENTITY: "binary_sensor.flap",
+                CONF_DOOR_ENTITY: "binary_sensor.door",
+                CONF_DEBOUNCE_SECONDS: 3,
+            },
+            options={
+                CONF_DEBOUNCE_SECONDS: 10,
+                CONF_DOOR_DEBOUNCE_SECONDS: 2,
+                CONF_RESET_ON_EMPTY: True,
+                CONF_NOTIFY_ENABLED: True,
+                CONF_NOTIFY_SERVICE: ["notify.phone"],
+                CONF_NOTIFY_MESSAGE: "Post!",
+                CONF_DOOR_NOTIFY_ENABLED: False,
+                CONF_DOOR_NOTIFY_SERVICE: ["notify.phone"],
+            },
+        )
+        plan = compile_trigger_plan(entry, "default", "default door")
+
+        assert plan.triggers["binary_sensor.flap"].debounce == 10.0
+        assert plan.triggers["binary_sensor.door"].debounce == 2.0
+        assert plan.reset_on_empty is True
+        assert plan.notify_services == (("notify", "phone"),)
+        assert plan.notify_message == "Post!"
+        # Disabled door notifications compile to no targets at all
+        assert plan.door_notify_services == ()
+        assert plan.door_notify_message == "default door"
+
+    def test_same_entity_prefers_flap(self):
+        entry = MockConfigEntry(
+            domain=DOMAIN,
+            version=2,
+            data={
+                CONF_FLAP_ENTITY: "binary_sensor.both",
+                CONF_DOOR_ENTITY: "binary_sensor.both",
+            },
+        )
+        plan = compile_trigger_plan(entry)
+
+        assert plan.triggers["binary_sensor.both"].role == ROLE_FLAP
+
+    def test_hysteresis_and_dwell_from_options(self):
+        entry = MockConfigEntry(
+            domain=DOMAIN,
+            version=2,
+            data={
+                CONF_FLAP_ENTITY: "sensor.flap_angle",
+                CONF_DOOR_ENTITY: "binary_sensor.door",
+                CONF_FLAP_TRIGGER_MODE: TRIGGER_MODE_THRESHOLD,
+                CONF_FLAP_THRESHOLD: 30.0,
+            },
+            options={CONF_FLAP_HYSTERESIS: 5.0, CONF_FLAP_DWELL: 1.5},
+        )
+        plan = compile_trigger_plan(entry)
+        flap = plan.triggers["sensor.flap_angle"]
+
+        assert flap.dwell == 1.5
+        assert plan.triggers["binary_sensor.door"].dwell == 0.0
+        assert _run(flap.evaluate, ["10", "31", "29", "31"]) == [True, False, False]
+
+
+class TestRateLimiter:
+    def test_window_per_key(self):
+        limiter = RateLimiter()
+        with patch(
+            "custom_components.smartmailbox.trigger.monotonic", return_value=100.0
+        ):
+            assert limiter.allow("binary_sensor.flap", 3) is True
+            assert limiter.allow("binary_sensor.flap", 3) is False
+            # Other entities have their own window
+            assert limiter.allow("binary_sensor.door", 3) is True
+
+        with patch(
+            "custom_components.smartmailbox.trigger.monotonic", return_value=103.0
+        ):
+            assert limiter.allow("binary_sensor.flap", 3) is True
+
+        assert limiter.dropped == {"binary_sensor.flap": 1}
+
+    def test_zero_window_never_drops(self):
+        limiter = RateLimiter()
+
+        assert all(limiter.allow("binary_sensor.door", 0) for _ in range(5))
+        assert limiter.dropped == {}
+
+
+# ---------------------------------------------------------------------------
+# Smoothing filters
+# ---------------------------------------------------------------------------
+
+
+def _feed(evaluate, values, start="0"):
+    old = State("sensor.angle", start)
+    fired = []
+    for value in values:
+        new = State("sensor.angle", str(value))
+        fired.append(evaluate(new, old))
+        old = new
+    return fired
+
+
+class TestFilters:
+    def test_ema(self):
+        ema = _make_filter(FILTER_EMA, 3)
+        assert [ema(v) for v in (10.0, 20.0, 20.0)] == [10.0, 15.0, 17.5]
+
+    def test_rolling_median(self):
+        median = _make_filter(FILTER_MEDIAN, 3)
+        assert [median(v) for v in (1.0, 100.0, 2.0, 3.0, 4.0)] == [
+            1.0,
+            50.5,
+            2.0,
+            3.0,
+            3.0,
+        ]
+
+    def test_median_ema_chains_both(self):
+        smooth = _make_filter(FILTER_MEDIAN_EMA, 3)
+        assert [smooth(v) for v in (0.0, 90.0, 0.0)] == [0.0, 22.5, 11.25]
+
+    def test_none_or_single_sample_window(self):
+        assert _make_filter(FILTER_NONE, 5) is None
+        assert _make_filter(FILTER_EMA, 1) is None
+
+    def test_median_ignores_single_spike(self):
+        evaluate, _ = _make_value_trigger(
+            30.0, THRESHOLD_DIRECTION_ABOVE, 0.0, _make_filter(FILTER_MEDIAN, 3)
+        )
+        assert _feed(evaluate, [0, 0, 80, 0, 0]) == [False] * 5
+        # A real opening still crosses once the majority is above
+        assert _feed(evaluate, [80, 80, 80]) == [False, True, False]
+
+    def test_raw_spike_fires_without_filter(self):
+        evaluate = _make_evaluator(
+            TRIGGER_MODE_THRESHOLD, 30.0, THRESHOLD_DIRECTION_ABOVE
+        )
+        assert _feed(evaluate, [0, 0, 80, 0, 0]) == [False, False, True, False, False]
+
+    def test_holds_uses_smoothed_value(self):
+        evaluate, holds = _make_value_trigger(
+            30.0, THRESHOLD_DIRECTION_ABOVE, 0.0, _make_filter(FILTER_MEDIAN, 3)
+        )
+        _feed(evaluate, [80, 80, 0])
+        # Raw reading dropped to 0, but the median is still 80
+        assert holds(State("sensor.angle", "0")) is True
+        assert holds(State("sensor.angle", "unavailable")) is False
+
+    def test_compiled_from_options(self):
+        entry = MockConfigEntry(
+            domain=DOMAIN,
+            data={
+                CONF_FLAP_ENTITY: "sensor.angle",
+                CONF_DOOR_ENTITY: "binary_sensor.door",
+                CONF_FLAP_TRIGGER_MODE: TRIGGER_MODE_THRESHOLD,
+                CONF_FLAP_THRESHOLD: 30.0,
+                CONF_DOOR_TRIGGER_MODE: TRIGGER_MODE_BINARY,
+            },
+            options={CONF_FLAP_FILTER: FILTER_MEDIAN, CONF_FLAP_FILTER_WINDOW: 3},
+        )
+        plan = compile_trigger_plan(entry)
+
+        flap = plan.triggers["sensor.angle"]
+        assert _feed(flap.evaluate, [0, 80, 0, 0]) == [False] * 4
+
+
+# ---------------------------------------------------------------------------
+# Attribute triggers
+# ---------------------------------------------------------------------------
+
+
+def _attrs(**attributes) -> State:
+    return State("sensor.vibration", "on", attributes)
+
+
+class TestAttributeTriggers:
+    def test_native_numeric_value(self):
+        evaluate, holds = _make_value_trigger(
+            30.0, THRESHOLD_DIRECTION_ABOVE, 0.0, get=_make_attribute_getter("angle")
+        )
+        assert evaluate(_attrs(angle=45), _attrs(angle=10)) is True
+        assert evaluate(_attrs(angle=50), _attrs(angle=45)) is False
+        assert evaluate(_attrs(angle=10.5), _attrs(angle=50)) is False
+        assert holds(_attrs(angle=45)) is True
+        assert holds(_attrs(angle=12)) is False
+
+    def test_boolean_and_string_values(self):
+        evaluate, _ = _make_value_trigger(
+            0.5, THRESHOLD_DIRECTION_ABOVE, 0.0, get=_make_attribute_getter("open")
+        )
+        assert evaluate(_attrs(open=True), _attrs(open=False)) is True
+        assert evaluate(_attrs(open="1"), _attrs(open="0")) is True
+        assert evaluate(_attrs(open="tilt"), _attrs(open="0")) is False
+        assert evaluate(_attrs(open=None), _attrs(open=0)) is False
+
+    def test_nested_path(self):
+        get = _make_attribute_getter("position.angle")
+        assert get(_attrs(position={"angle": 42})) == 42
+        assert get(_attrs(position=42)) is None
+        assert get(_attrs()) is None
+
+    def test_unchanged_attribute_rejected_before_conversion(self):
+        evaluate, _ = _make_value_trigger(
+            30.0, THRESHOLD_DIRECTION_ABOVE, 0.0, get=_make_attribute_getter("angle")
+        )
+        with patch(
+            "custom_components.smartmailbox.trigger._as_number"
+        ) as as_number:
+            assert evaluate(
+                _attrs(angle=45, linkquality=80), _attrs(angle=45, linkquality=90)
+            ) is False
+        as_number.assert_not_called()
+
+    def test_compiled_from_options(self):
+        entry = MockConfigEntry(
+            domain=DOMAIN,
+            data={
+                CONF_FLAP_ENTITY: "sensor.vibration",
+                CONF_DOOR_ENTITY: "binary_sensor.door",
+                CONF_FLAP_TRIGGER_MODE: TRIGGER_MODE_ATTRIBUTE,
+                CONF_FLAP_THRESHOLD: 30.0,
+                CONF_DOOR_TRIGGER_MODE: TRIGGER_MODE_BINARY,
+            },
+            options={CONF_FLAP_ATTRIBUTE: "angle"},
+        )
+        plan = compile_trigger_plan(entry)
+
+        flap = plan.triggers["sensor.vibration"]
+        assert flap.evaluate(_attrs(angle=45), _attrs(angle=0)) is True
+        # The state itself is not what is compared
+        assert flap.evaluate(
+            State("sensor.vibration", "45"), State("sensor.vibration", "0")
+        ) is False
+
+
+# ---------------------------------------------------------------------------
+# Bus event triggers
+# ---------------------------------------------------------------------------
+
+
+class TestEventTriggers:
+    def test_filter_requires_every_item(self):
+        matches = _make_event_filter({"device_id": "abc", "endpoint_id": 1})
+        assert matches(Event("zha_event", {"device_id": "abc", "endpoint_id": 1}))
+        assert not matches(Event("zha_event", {"device_id": "abc", "endpoint_id": 2}))
+        assert not matches(Event("zha_event", {"device_id": "abc"}))
+
+    def test_filter_accepts_event_data(self):
+        # Home Assistant 2024.4 and later pass only the event data
+        matches = _make_event_filter({"command": "on"})
+        assert matches({"device_id": "abc", "command": "on"})
+        assert not matches({"device_id": "abc", "command": "off"})
+
+    def test_event_type_without_data_ignored(self):
+        entry = MockConfigEntry(
+            domain=DOMAIN,
+            data={
+                CONF_FLAP_ENTITY: "binary_sensor.flap",
+                CONF_DOOR_ENTITY: "binary_sensor.door",
+                CONF_FLAP_TRIGGER_MODE: TRIGGER_MODE_BINARY,
+                CONF_DOOR_TRIGGER_MODE: TRIGGER_MODE_BINARY,
+            },
+            options={CONF_FLAP_EVENT_TYPE: "zha_event", CONF_FLAP_EVENT_DATA: {}},
+        )
+
+        # It would count every zha_event in the house
+        assert compile_trigger_plan(entry).events == ()
+
+    def test_compiled_from_options(self):
+        entry = MockConfigEntry(
+            domain=DOMAIN,
+            data={
+                CONF_FLAP_ENTITY: "binary_sensor.flap",
+                CONF_DOOR_ENTITY: "binary_sensor.door",
+                CONF_FLAP_TRIGGER_MODE: TRIGGER_MODE_BINARY,
+                CONF_DOOR_TRIGGER_MODE: TRIGGER_MODE_BINARY,
+                CONF_DEBOUNCE_SECONDS: 7,
+            },
+            options={
+                CONF_FLAP_EVENT_TYPE: " zha_event ",
+                CONF_FLAP_EVENT_DATA: {"command": "on"},
+            },
+        )
+        plan = compile_trigger_plan(entry)
+
+        (trigger,) = plan.events
+        assert trigger.event_type == "zha_event"
+        assert trigger.key == "binary_sensor.flap"
+        assert trigger.spec.role == ROLE_FLAP
+        assert trigger.spec.debounce == 7.0
+        assert trigger.matches(Event("zha_event", {"command": "on"}))